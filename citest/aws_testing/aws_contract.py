@@ -15,7 +15,6 @@
 
 """Support for specifying citest.json_contract.Contract on AWS resources."""
 
-import json
 
 from .. import json_contract as jc
 from ..json_predicate import JsonError
@@ -39,25 +38,24 @@ class AwsObjectObserver(jc.ObjectObserver):
   def __str__(self):
     return 'AwsObjectObserver({0})'.format(self.__args)
 
+  def get_cache_key(self, context):
+    """Implements ObjectObserver interface."""
+    return self._make_cache_key(id(self.__aws), context.eval(self.__args))
+
   def collect_observation(self, context, observation, trace=True):
     args = context.eval(self.__args)
-    aws_response = self.__aws.run(args, trace)
+    aws_response, doc, e = self.__aws.run_and_decode_json(args, trace)
     if not aws_response.ok():
       observation.add_error(
           cli_agent.CliAgentRunError(self.__aws, aws_response))
       return []
 
-    decoder = json.JSONDecoder()
-    try:
-      doc = decoder.decode(aws_response.output)
-    except (ValueError, UnicodeError) as e:
+    if e is not None:
       error = 'Invalid JSON in response: %s' % str(aws_response)
       print 'ERROR:' + error
       observation.add_error(JsonError(error, e))
       return []
 
-    if not isinstance(doc, list):
-      doc = [doc]
     self.filter_all_objects_to_observation(context, doc, observation)
 
     return observation.objects
@@ -28,19 +28,30 @@ from record_stream import (
     RecordInputStream,
     RecordOutputStream)
 
-from journal import Journal
+from journal import (
+    CapturingJournal,
+    Journal)
 from journal_logger import (
     JournalLogger,
     JournalLogHandler)
 
 from global_journal import (
+    call_with_captured_journal,
     get_global_journal,
+    map_with_captured_journals,
     new_global_journal_with_path,
     set_global_journal,
-    unset_global_journal)
+    set_thread_journal,
+    unset_global_journal,
+    write_captured_outcomes)
 
 from execution_context import ExecutionContext
 from json_scrubber import JsonScrubber
+from json_stream import iter_json_values
+from retry_policy import (
+    RetryPolicy,
+    ExponentialBackoffRetryPolicy,
+    FixedIntervalRetryPolicy)
 from base_test_case import BaseTestCase
 from test_runner import TestRunner
 
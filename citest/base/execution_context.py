@@ -22,9 +22,15 @@ needed later in the tests execution or evaluation.
 """
 
 import logging
+import threading
 from .snapshot import JsonSnapshotable
 
 
+# Each thread has a stack of the (context, {key: version}) for the callables
+# it is in the middle of evaluating, recording the keys each has looked up.
+_EVAL_TRACKING = threading.local()
+
+
 class ExecutionContext(JsonSnapshotable):
   """Execution context"""
 
@@ -37,12 +43,22 @@ class ExecutionContext(JsonSnapshotable):
     self.__external = dict(kwargs or {})
     self.__internal = {}
 
+    # The number of times each key was changed.
+    self.__versions = {}
+
+    # Results of evaluating callables keyed by the callable's id.
+    # Each entry is (callable, result, {key: version looked up}).
+    self.__eval_memo = {}
+    self.__eval_memo_lock = threading.Lock()
+
   def __contains__(self, key):
     """Determine if key is a known attribute."""
+    self.__note_lookup(key)
     return key in self.__internal or key in self.__external
 
   def __delitem__(self, key):
     """Remove keys if they exist."""
+    self.__note_change(key)
     if key in self.__internal:
       del self.__internal[key]
     elif key in self.__external:
@@ -52,6 +68,7 @@ class ExecutionContext(JsonSnapshotable):
     self.set_snapshotable(key, value)
 
   def __getitem__(self, key):
+    self.__note_lookup(key)
     return (self.__internal[key]
             if key in self.__internal
             else self.__external[key])
@@ -60,8 +77,21 @@ class ExecutionContext(JsonSnapshotable):
     return 'external={0!r}, internal={1!r}'.format(
         self.__external, self.__internal)
 
+  def copy(self):
+    """Returns a shallow copy of this context.
+
+    The copy has its own attribute bindings so that subsequent changes to
+    either context are not visible to the other, but the attribute values
+    themselves are shared.
+    """
+    result = ExecutionContext(**self.__external)
+    for key, value in self.__internal.items():
+      result.set_internal(key, value)
+    return result
+
   def clear_key(self, key):
     """Remove key whether or not it exists."""
+    self.__note_change(key)
     if key in self.__internal:
       del self.__internal[key]
     elif key in self.__external:
@@ -69,6 +99,7 @@ class ExecutionContext(JsonSnapshotable):
 
   def get(self, key, default_value):
     """Lookup value of attribute, or default_value if attribute isn't known."""
+    self.__note_lookup(key)
     return (self.__internal[key]
             if key in self.__internal
             else self.__external[key] if key in self.__external
@@ -80,6 +111,7 @@ class ExecutionContext(JsonSnapshotable):
       KeyError('Key cannot be empty')
     if key in self.__internal:
       KeyError('{0} is already an internal key'.format(key))
+    self.__note_change(key)
     self.__external[key] = value
 
   def set_internal(self, key, value):
@@ -88,6 +120,7 @@ class ExecutionContext(JsonSnapshotable):
       KeyError('Key cannot be empty')
     if key in self.__external:
       KeyError('{0} is already a snapshotable key'.format(key))
+    self.__note_change(key)
     self.__internal[key] = value
 
   def add_snapshotable(self, key, value):
@@ -102,6 +135,7 @@ class ExecutionContext(JsonSnapshotable):
       KeyError('{0} is already an internal key'.format(key))
     if key in self.__external:
       KeyError('{0} already exists'.format(key))
+    self.__note_change(key)
     self.__external[key] = value
 
   def add_internal(self, key, value):
@@ -116,12 +150,21 @@ class ExecutionContext(JsonSnapshotable):
       KeyError('{0} is already a snapshotable key'.format(key))
     if key in self.__internal:
       KeyError('{0} already exists'.format(key))
+    self.__note_change(key)
     self.__internal[key] = value
 
   def snapshotable_items(self):
     """Return list of snapshotable (name, value) tuples."""
     return self.__external.items()
 
+  def key_versions(self):
+    """Returns the number of times each key was changed, keyed by name.
+
+    Comparing these before and after an operation determines which keys
+    the operation changed.
+    """
+    return dict(self.__versions)
+
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     for key, value in self.__external.items():
@@ -130,6 +173,14 @@ class ExecutionContext(JsonSnapshotable):
   def eval(self, value):
     """Evaluate value in this ExecutionContext.
 
+    Lists and dicts are only copied if they contain callables, otherwise
+    they are returned as is.
+
+    The results of callables that look up attributes in this context are
+    remembered until one of those attributes is set or removed. Callables
+    are expected to depend only on the context (and not on values changed
+    in place) so they can be evaluated once and shared.
+
     Args:
       value: [any] The value to evaluate.
 
@@ -137,14 +188,77 @@ class ExecutionContext(JsonSnapshotable):
       The actual value.
     """
     if isinstance(value, list):
-      return [self.eval(elem) for elem in value]
+      result = None
+      for index, elem in enumerate(value):
+        evaluated = self.eval(elem)
+        if result is None:
+          if evaluated is elem:
+            continue
+          result = value[:index]
+        result.append(evaluated)
+      return value if result is None else result
     elif isinstance(value, dict):
-      return {key: self.eval(data) for key, data in value.items()}
+      result = None
+      for key, data in value.items():
+        evaluated = self.eval(data)
+        if result is None:
+          if evaluated is data:
+            continue
+          result = dict(value)
+        result[key] = evaluated
+      return value if result is None else result
     elif callable(value):
-      try:
-        return value(self)
-      except TypeError as terr:
-        logging.getLogger(__name__).error('Error evaluating {0}'.format(value))
-        raise terr
+      return self.__eval_callable(value)
     else:
       return value
+
+  def __eval_callable(self, func):
+    """Evaluate a callable, or reuse the result from a previous evaluation."""
+    with self.__eval_memo_lock:
+      memo = self.__eval_memo.get(id(func))
+    if memo is not None and memo[0] is func and self.__is_current(memo[2]):
+      self.__note_lookups(memo[2])
+      return memo[1]
+
+    stack = getattr(_EVAL_TRACKING, 'stack', None)
+    if stack is None:
+      stack = []
+      _EVAL_TRACKING.stack = stack
+    stack.append((self, {}))
+    try:
+      result = func(self)
+    except TypeError as terr:
+      logging.getLogger(__name__).error('Error evaluating {0}'.format(func))
+      raise terr
+    finally:
+      lookups = stack.pop()[1]
+
+    # The result of any callable evaluating this one depends on these too.
+    self.__note_lookups(lookups)
+    if lookups:
+      with self.__eval_memo_lock:
+        self.__eval_memo[id(func)] = (func, result, lookups)
+    return result
+
+  def __is_current(self, lookups):
+    """Determine if none of the keys looked up have changed since."""
+    for key, version in lookups.items():
+      if self.__versions.get(key, 0) != version:
+        return False
+    return True
+
+  def __note_lookup(self, key):
+    """Record that the callable being evaluated looked up key."""
+    stack = getattr(_EVAL_TRACKING, 'stack', None)
+    if stack and stack[-1][0] is self:
+      stack[-1][1][key] = self.__versions.get(key, 0)
+
+  def __note_lookups(self, lookups):
+    """Record that the callable being evaluated depends on these lookups."""
+    stack = getattr(_EVAL_TRACKING, 'stack', None)
+    if stack and stack[-1][0] is self:
+      stack[-1][1].update(lookups)
+
+  def __note_change(self, key):
+    """Record that key is being changed, invalidating results that used it."""
+    self.__versions[key] = self.__versions.get(key, 0) + 1
@@ -15,17 +15,22 @@
 
 """Implements a globally available journal."""
 
+from multiprocessing.pool import ThreadPool
 import atexit
 import os
+import sys
 import threading
 
-from . import Journal
+from . import (
+    CapturingJournal,
+    Journal)
 
 # pylint: disable=invalid-name
 # pylint: disable=global-statement
 _added_atexit = False
 _global_lock = threading.Lock()
 _global_journal = None
+_thread_state = threading.local()
 
 
 def _atexit_handler():
@@ -96,9 +101,17 @@ def set_global_journal(journal):
 
 
 def get_global_journal():
-  """Returns the global journal."""
+  """Returns the global journal.
+
+  If set_thread_journal was called on the current thread then this returns
+  that journal instead.
+  """
   # pylint: disable=global-variable-not-assigned
   global _global_journal
+  thread_journal = getattr(_thread_state, 'journal', None)
+  if thread_journal is not None:
+    return thread_journal
+
   _global_lock.acquire(True)
   result = _global_journal
   _global_lock.release()
@@ -117,3 +130,107 @@ def unset_global_journal():
   _global_journal = None
   _global_lock.release()
   return result
+
+
+def set_thread_journal(journal):
+  """Overrides the global journal for the current thread only.
+
+  This is typically used with a CapturingJournal so that concurrent work
+  does not interleave its entries within the real journal.
+
+  Args:
+    journal: [Journal] The journal to use in this thread, or None to
+       return to using the global journal.
+
+  Returns:
+    The previous override for this thread, if any.
+  """
+  result = getattr(_thread_state, 'journal', None)
+  _thread_state.journal = journal
+  return result
+
+
+def call_with_captured_journal(journal, func, *args):
+  """Calls a function, capturing the entries it journals in this thread.
+
+  This is typically called from a worker thread so that the entries can be
+  written into the journal later without interleaving with other threads.
+
+  Args:
+    journal: [Journal] The journal the entries are ultimately for, or None
+       if there is none, in which case nothing is captured.
+    func: [callable] The function to call.
+    args: [list] The arguments to call func with.
+
+  Returns:
+    A tuple of the value func returned, the CapturingJournal holding the
+    entries (or None), and the sys.exc_info() if func raised (or None).
+    These are consumed by write_captured_outcomes.
+  """
+  capture = None if journal is None else CapturingJournal()
+  previous_journal = set_thread_journal(capture)
+  try:
+    return func(*args), capture, None
+  except BaseException:
+    # Even KeyboardInterrupt is returned so that it does not stop the
+    # worker thread without the pool ever learning of the call's outcome.
+    return None, capture, sys.exc_info()
+  finally:
+    set_thread_journal(previous_journal)
+
+
+def write_captured_outcomes(journal, outcomes):
+  """Writes the entries captured by call_with_captured_journal, in order.
+
+  Args:
+    journal: [Journal] The journal to write into, or None.
+    outcomes: [list] The tuples returned by call_with_captured_journal.
+
+  Raises:
+    The exception raised by the first call that raised, if any. This is
+    only raised after all the entries were written.
+
+  Returns:
+    The list of values the calls returned, in order.
+  """
+  for _, capture, _ in outcomes:
+    if capture is not None and journal is not None:
+      capture.write_into(journal)
+  for _, _, exc_info in outcomes:
+    if exc_info is not None:
+      raise exc_info[0], exc_info[1], exc_info[2]
+  return [result for result, _, _ in outcomes]
+
+
+def map_with_captured_journals(func, items, max_concurrent):
+  """Applies a function to each item concurrently using a pool of threads.
+
+  Each call journals into its own CapturingJournal. Once all the calls
+  have finished, their entries are written into the current journal in the
+  order of the items, so that the journal contexts of the calls remain
+  well nested.
+
+  Args:
+    func: [callable] The function to call on each item.
+    items: [list] The items to call func on.
+    max_concurrent: [int] The maximum number of calls in flight at once.
+
+  Raises:
+    The exception raised by the call on the first item that raised, if any.
+
+  Returns:
+    The list of values func returned, in the order of the items.
+  """
+  items = list(items)
+  if not items:
+    return []
+
+  journal = get_global_journal()
+  pool = ThreadPool(processes=max(1, min(max_concurrent, len(items))))
+  try:
+    outcomes = pool.map(
+        lambda item: call_with_captured_journal(journal, func, item), items)
+  finally:
+    pool.close()
+    pool.join()
+  return write_captured_outcomes(journal, outcomes)
@@ -71,17 +71,25 @@ class Journal(object):
       output: [FileObject] Takes ownership of the file to store snapshots into.
       metadata: [kwargs] Metadata for initial message.
     """
+    self._attach_output(RecordOutputStream(_output))
+    self.write_message('Starting journal.', **metadata)
+
+  def _attach_output(self, record_output):
+    """Binds the record stream that entries are written into.
+
+    Args:
+      record_output: [RecordOutputStream] Takes ownership of the stream,
+         or any object with append(text) and close() methods.
+    """
     self.__lock.acquire(True)
     try:
       if self.__output is not None:
         raise ValueError('Journal is already open.')
 
-      self.__output = RecordOutputStream(_output)
+      self.__output = record_output
     finally:
       self.__lock.release()
 
-    self.write_message('Starting journal.', **metadata)
-
   def terminate(self, **metadata):
     """Stops writing into journal.
 
@@ -154,6 +162,23 @@ class Journal(object):
     snapshot.add_object(obj)
     self.__write_json_object(snapshot.to_json_object())
 
+  def write_encoded_entry(self, text):
+    """Write an entry that was already encoded by another journal.
+
+    This is used to transfer entries from a CapturingJournal. The entry
+    retains the timestamp and thread it was originally recorded with.
+
+    Args:
+      text: [string] The JSON encoded entry.
+    """
+    self.__lock.acquire(True)
+    try:
+      if self.__output is None:
+        raise ValueError('Journal is not open')
+      self.__output.append(text)
+    finally:
+      self.__lock.release()
+
   def _do_close(self):
     """Actually closes the journal output file.
 
@@ -182,3 +207,45 @@ class Journal(object):
       self.__output.append(text)
     finally:
       self.__lock.release()
+
+
+class CapturingJournal(Journal):
+  """A Journal that holds its entries in memory to write elsewhere later.
+
+  This is used to keep journal contexts well nested when work is performed
+  concurrently. Each concurrent task captures its entries into its own
+  CapturingJournal (see set_thread_journal), then the captured entries are
+  written into the real journal in a deterministic order.
+  """
+
+  @property
+  def num_entries(self):
+    """The number of entries captured so far."""
+    return len(self.__entries)
+
+  def __init__(self, now_function=time.time):
+    """Constructor.
+
+    Args:
+      now_function: [time] See Journal.
+    """
+    super(CapturingJournal, self).__init__(now_function=now_function)
+    self.__entries = []
+    self._attach_output(self)
+
+  def append(self, text):
+    """Implements the record output stream interface to capture the entry."""
+    self.__entries.append(text)
+
+  def close(self):
+    """Implements the record output stream interface."""
+    pass
+
+  def write_into(self, journal):
+    """Write the captured entries into another journal, in order.
+
+    Args:
+      journal: [Journal] The journal to write into.
+    """
+    for text in self.__entries:
+      journal.write_encoded_entry(text)
@@ -0,0 +1,131 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Decodes a JSON document from a stream as it is read.
+
+Decoding the entire text of a large JSON list at once requires holding
+both the text and all the decoded values. Decoding the elements of the
+list one at a time only requires the text of the element being decoded.
+"""
+
+import json
+import re
+
+
+# The default number of bytes to read from the stream at a time.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+
+class _StreamBuffer(object):
+  """The text read from a stream that has not been decoded yet."""
+
+  def __init__(self, stream, chunk_size):
+    self.__stream = stream
+    self.__chunk_size = chunk_size
+    self.__decoder = json.JSONDecoder()
+    self.__text = ''
+    self.__pos = 0
+    self.__eof = False
+
+  def __read_more(self):
+    """Append more of the stream, discarding the text already decoded.
+
+    The amount read grows with the pending text so that decoding a large
+    value takes a number of attempts logarithmic in its size.
+
+    Returns:
+      False if the stream has no more text.
+    """
+    if self.__eof:
+      return False
+    data = self.__stream.read(
+        max(self.__chunk_size, len(self.__text) - self.__pos))
+    if not data:
+      self.__eof = True
+      return False
+    self.__text = self.__text[self.__pos:] + data
+    self.__pos = 0
+    return True
+
+  def peek(self):
+    """Returns the next character that is not whitespace, or None at the end."""
+    while True:
+      self.__pos = _WHITESPACE_RE.match(self.__text, self.__pos).end()
+      if self.__pos < len(self.__text):
+        return self.__text[self.__pos]
+      if not self.__read_more():
+        return None
+
+  def skip(self):
+    """Consume the character that peek() returned."""
+    self.__pos += 1
+
+  def decode(self):
+    """Decode the JSON value starting at the next character.
+
+    Raises:
+      ValueError if the text is not a JSON value.
+    """
+    self.peek()
+    while True:
+      try:
+        value, end = self.__decoder.raw_decode(self.__text, self.__pos)
+        # A number at the end of the text might continue in the stream.
+        if end < len(self.__text) or not self.__read_more():
+          self.__pos = end
+          return value
+      except ValueError:
+        if not self.__read_more():
+          raise
+
+
+def iter_json_values(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+  """Decode a JSON document from a stream a top-level element at a time.
+
+  Args:
+    stream: [file] The stream to read the document from.
+    chunk_size: [int] The number of bytes to read from the stream at a time.
+
+  Raises:
+    ValueError if the stream does not contain a JSON document.
+
+  Yields:
+    The elements of the document if it is a list, otherwise the document.
+  """
+  text = _StreamBuffer(stream, chunk_size)
+  if text.peek() != '[':
+    value = text.decode()
+    if text.peek() is not None:
+      raise ValueError('Extra data after JSON document.')
+    yield value
+    return
+
+  text.skip()
+  if text.peek() == ']':
+    text.skip()
+  else:
+    while True:
+      yield text.decode()
+      delimiter = text.peek()
+      text.skip()
+      if delimiter == ']':
+        break
+      if delimiter != ',':
+        raise ValueError('Expecting , delimiter in JSON list.')
+
+  if text.peek() is not None:
+    raise ValueError('Extra data after JSON document.')
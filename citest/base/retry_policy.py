@@ -0,0 +1,174 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Policies that determine how long to wait between retry attempts.
+
+A RetryPolicy is consulted by the various polling and retry loops
+(waiting on operation status, retrying contract clauses, and retrying
+test case operations) to decide how long to sleep before the next attempt.
+
+Policies are stateless so that a single instance can be shared among
+threads and call sites. The caller keeps track of the attempt number and
+previous delay and passes them back in on each call.
+"""
+
+import random
+
+
+class RetryPolicy(object):
+  """Base class for determining the delay before the next retry attempt."""
+
+  def next_sleep_secs(self, attempt, prev_sleep_secs=None,
+                      secs_remaining=None, hint_secs=None):
+    """Determine how long to sleep before the next attempt.
+
+    Args:
+      attempt: [int] The number of attempts made so far (starting at 0
+         before the first retry).
+      prev_sleep_secs: [float] The value returned for the previous attempt,
+         or None if this is the first time.
+      secs_remaining: [float] If not None then the time remaining before
+         the caller's deadline. The delay will not exceed this.
+      hint_secs: [float] If not None then a hint from the server
+         (e.g. an HTTP Retry-After header) as to how long to wait.
+         The delay will be at least this long unless limited by
+         secs_remaining.
+
+    Returns:
+      Number of seconds to sleep.
+    """
+    return self._bound_sleep_secs(
+        self._do_next_sleep_secs(attempt, prev_sleep_secs),
+        secs_remaining, hint_secs)
+
+  def _do_next_sleep_secs(self, attempt, prev_sleep_secs):
+    """Hook for specialized policies to determine the unbounded delay.
+
+    Args:
+      attempt: [int] See next_sleep_secs.
+      prev_sleep_secs: [float] See next_sleep_secs.
+
+    Returns:
+      Number of seconds to sleep before considering hints and deadlines.
+    """
+    raise NotImplementedError(
+        '{0}._do_next_sleep_secs not implemented'.format(
+            self.__class__.__name__))
+
+  @staticmethod
+  def _bound_sleep_secs(sleep_secs, secs_remaining, hint_secs):
+    """Adjust a proposed delay to honor a server hint and a deadline."""
+    if hint_secs is not None:
+      sleep_secs = max(sleep_secs, hint_secs)
+    if secs_remaining is not None:
+      sleep_secs = min(sleep_secs, max(0, secs_remaining))
+    return sleep_secs
+
+
+class FixedIntervalRetryPolicy(RetryPolicy):
+  """A RetryPolicy that waits the same amount of time between each attempt."""
+
+  @property
+  def interval_secs(self):
+    """The number of seconds between attempts."""
+    return self.__interval_secs
+
+  def __init__(self, interval_secs):
+    """Constructor.
+
+    Args:
+      interval_secs: [float] The number of seconds between attempts.
+    """
+    self.__interval_secs = interval_secs
+
+  def __str__(self):
+    return 'Every {0}s'.format(self.__interval_secs)
+
+  def _do_next_sleep_secs(self, attempt, prev_sleep_secs):
+    """Implements RetryPolicy interface."""
+    return self.__interval_secs
+
+
+class ExponentialBackoffRetryPolicy(RetryPolicy):
+  """A RetryPolicy that backs off exponentially between attempts.
+
+  When jitter is enabled this uses "decorrelated jitter" where each delay
+  is chosen uniformly between the initial delay and a multiple of the
+  previous delay. This spreads out retries from concurrent callers while
+  still growing the delay over time.
+  """
+
+  @property
+  def initial_secs(self):
+    """The delay before the first retry."""
+    return self.__initial_secs
+
+  @property
+  def max_secs(self):
+    """The upper bound on any individual delay."""
+    return self.__max_secs
+
+  @property
+  def multiplier(self):
+    """The growth factor applied to the delay between attempts."""
+    return self.__multiplier
+
+  @property
+  def jitter(self):
+    """Whether delays are randomized."""
+    return self.__jitter
+
+  def __init__(self, initial_secs=1, max_secs=30, multiplier=3,
+               jitter=True, rng=None):
+    """Constructor.
+
+    Args:
+      initial_secs: [float] The delay before the first retry and the
+         smallest delay that will be chosen (deadlines notwithstanding).
+      max_secs: [float] The largest delay that will be chosen
+         (server hints notwithstanding).
+      multiplier: [float] The growth factor between successive delays.
+      jitter: [bool] Whether to randomize the delays.
+      rng: [random.Random] The random number generator to use for jitter,
+         or None to use the module-level generator.
+    """
+    if initial_secs <= 0 or max_secs < initial_secs:
+      raise ValueError('Expected 0 < initial_secs <= max_secs,'
+                       ' got initial_secs={0} max_secs={1}'.format(
+                           initial_secs, max_secs))
+    if multiplier < 1:
+      raise ValueError('multiplier={0} is not >= 1'.format(multiplier))
+
+    self.__initial_secs = initial_secs
+    self.__max_secs = max_secs
+    self.__multiplier = multiplier
+    self.__jitter = jitter
+    self.__rng = rng or random
+
+  def __str__(self):
+    return 'Backoff from {0}s to {1}s x{2}{3}'.format(
+        self.__initial_secs, self.__max_secs, self.__multiplier,
+        ' with jitter' if self.__jitter else '')
+
+  def _do_next_sleep_secs(self, attempt, prev_sleep_secs):
+    """Implements RetryPolicy interface."""
+    if not self.__jitter:
+      return min(self.__max_secs,
+                 self.__initial_secs * self.__multiplier ** attempt)
+
+    if prev_sleep_secs is None or prev_sleep_secs < self.__initial_secs:
+      prev_sleep_secs = self.__initial_secs
+    return min(self.__max_secs,
+               self.__rng.uniform(self.__initial_secs,
+                                  prev_sleep_secs * self.__multiplier))
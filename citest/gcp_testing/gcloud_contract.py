@@ -16,28 +16,53 @@
 """Provides a means for specifying and verifying expectations of GCE state."""
 
 # Standard python modules.
-import json
 import logging
-import traceback
 
 # Our modules.
 from .. import json_contract as jc
 from ..json_predicate import JsonError
+from ..json_predicate import make_filter_expression
 from ..service_testing import cli_agent
 
+
+def make_gcloud_filter_expression(pred):
+  """Translate the simple conditions of a predicate into a gcloud --filter.
+
+  Args:
+    pred: [ValuePredicate] The predicate that observed objects must satisfy.
+
+  Returns:
+    A gcloud filter expression accepting every object that pred accepts,
+    or None if pred has no conditions that can be expressed.
+  """
+  return make_filter_expression(pred, '{0}={1}'.format)
+
+
 class GCloudObjectObserver(jc.ObjectObserver):
   """Observe GCP resources."""
 
-  def __init__(self, gcloud, args, filter=None):
+  def __init__(self, gcloud, args, filter=None, filter_flag=None):
     """Construct observer.
 
     Args:
       gcloud: GCloudAgent instance to use.
       args: Command-line argument list to execute.
+      filter: [ValuePredicate] Filters the objects observed.
+      filter_flag: [string] If not None then the command's flag for
+         filtering what it returns (e.g. '--filter' for list commands).
+         The conditions of the filter that can be expressed are passed in
+         this flag unless args already has it. The filter is still applied
+         to the objects that are returned.
     """
     super(GCloudObjectObserver, self).__init__(filter)
     self.__gcloud = gcloud
     self.__args = args
+    expression = (None if filter_flag is None
+                  else make_gcloud_filter_expression(filter))
+    if expression is not None and not any(
+        isinstance(arg, basestring) and arg.startswith(filter_flag)
+        for arg in args):
+      self.__args = list(args) + ['{0}={1}'.format(filter_flag, expression)]
 
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
@@ -47,27 +72,27 @@ class GCloudObjectObserver(jc.ObjectObserver):
   def __str__(self):
     return 'GCloudObjectObserver({0})'.format(self.__args)
 
+  def get_cache_key(self, context):
+    """Implements ObjectObserver interface."""
+    return self._make_cache_key(id(self.__gcloud), context.eval(self.__args))
+
   def collect_observation(self, context, observation, trace=True):
     args = context.eval(self.__args)
-    gcloud_response = self.__gcloud.run(args, trace=trace)
+    gcloud_response, doc, vex = self.__gcloud.run_and_decode_json(
+        args, trace=trace)
     if not gcloud_response.ok():
       observation.add_error(
           cli_agent.CliAgentRunError(self.__gcloud, gcloud_response))
       return []
 
-    decoder = json.JSONDecoder()
-    try:
-      doc = decoder.decode(gcloud_response.output)
-      if not isinstance(doc, list):
-        doc = [doc]
-      observation.add_all_objects(doc)
-    except ValueError as vex:
+    if vex is not None:
       error = 'Invalid JSON in response: %s' % str(gcloud_response)
       logging.getLogger(__name__).info('%s\n%s\n----------------\n',
-                                       error, traceback.format_exc())
+                                       error, vex)
       observation.add_error(JsonError(error, vex))
       return []
 
+    self.filter_all_objects_to_observation(context, doc, observation)
     return observation.objects
 
 
@@ -76,11 +101,14 @@ class GCloudObjectFactory(object):
   def __init__(self, gcloud):
     self.__gcloud = gcloud
 
-  def new_list_resources(self, type, extra_args=None):
+  def new_list_resources(self, type, extra_args=None, object_filter=None):
     """Specify a resource list to be returned later.
 
     Args:
       type: gcloud's name for the GCE resource type.
+      object_filter: [ValuePredicate] If not None then only observe the
+         resources satisfying this predicate. Where possible gcloud filters
+         the resources itself as well.
 
     Returns:
       A jc.ObjectObserver to return the specified resource list when called.
@@ -99,7 +127,8 @@ class GCloudObjectFactory(object):
 
     cmd = self.__gcloud.build_gcloud_command_args(
         type, ['list'] + extra_args, project=self.__gcloud.project, zone=zone)
-    return GCloudObjectObserver(self.__gcloud, cmd)
+    return GCloudObjectObserver(self.__gcloud, cmd, filter=object_filter,
+                                filter_flag='--filter')
 
   def new_inspect_resource(self, type, name, extra_args=None):
     """Specify a resource instance to inspect later.
@@ -155,12 +184,17 @@ class GCloudClauseBuilder(jc.ContractClauseBuilder):
     self.__factory = GCloudObjectFactory(gcloud)
     self.__strict = strict
 
-  def list_resources(self, type, extra_args=None):
+  def list_resources(self, type, extra_args=None, object_filter=None):
     """Observe resources of a particular type.
 
     This ultimately calls a "gcloud ... |type| list |extra_args|"
+
+    Args:
+      object_filter: [ValuePredicate] If not None then only observe the
+         resources satisfying this predicate. See new_list_resources.
     """
-    self.observer = self.__factory.new_list_resources(type, extra_args)
+    self.observer = self.__factory.new_list_resources(
+        type, extra_args, object_filter=object_filter)
     observation_builder = jc.ValueObservationVerifierBuilder(
         'List ' + type, strict=self.__strict)
     self.verifier_builder.append_verifier_builder(observation_builder)
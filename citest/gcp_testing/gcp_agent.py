@@ -233,6 +233,21 @@ class GcpAgent(BaseAgent):
                        .format(method, missing))
     return result
 
+  def resource_method_accepts(self, method, resource_type, parameter):
+    """Determine if a method accepts a parameter.
+
+    Args:
+      method: [string] The name of the method (in the resource_type).
+      resource_type: [string] The resource type the method operates on.
+      parameter: [string] The name of the parameter.
+
+    Returns:
+      True if the method's discovery document specifies the parameter.
+    """
+    resource_info = self.resource_type_to_discovery_info(resource_type)
+    method_spec = resource_info.get('methods', {}).get(method, {})
+    return parameter in method_spec.get('parameters', {})
+
   def get_resource(self, context, resource_type, resource_id=None, **kwargs):
     """Get instance metadata details.
 
@@ -300,6 +315,27 @@ class GcpAgent(BaseAgent):
     Returns:
       A list of resources.
     """
+    all_objects = []
+    for page in self.iter_resource_pages(
+        context, resource_type, method_variant=method_variant,
+        item_list_transform=item_list_transform, **kwargs):
+      all_objects.extend(page)
+    return all_objects
+
+  def iter_resource_pages(self, context, resource_type, method_variant='list',
+                          item_list_transform=None, **kwargs):
+    """List the contents of the specified resource a page at a time.
+
+    This is a generator that only requests the next page once the
+    previous page has been consumed, so callers can stop listing early.
+    Callers that stop early should close the generator.
+
+    Args:
+      See list_resource.
+
+    Yields:
+      The list of resources in each page.
+    """
     resource_obj = self.resource_type_to_resource_obj(resource_type)
     method_container = resource_obj()
     variables = self.resource_method_to_variables(
@@ -308,8 +344,8 @@ class GcpAgent(BaseAgent):
     request = getattr(method_container, method_variant)(**variables)
 
     JournalLogger.begin_context('List {0}'.format(resource_type))
+    total = 0
     try:
-      all_objects = []
       more = ''
       while request:
         JournalLogger.journal_or_log(
@@ -333,19 +369,20 @@ class GcpAgent(BaseAgent):
                      else response_items)
         if not isinstance(all_items, list):
           all_items = [all_items]
-        all_objects.extend(all_items)
+        total += len(all_items)
         try:
           request = method_container.list_next(request, response)
         except AttributeError:
           request = None
         more = ' more '
+        yield all_items
 
-      self.logger.info('Found total=%d %s', len(all_objects), resource_type)
+      self.logger.info('Found total=%d %s', total, resource_type)
     finally:
+      if request:
+        self.logger.info('Stopped listing %s after %d', resource_type, total)
       JournalLogger.end_context()
 
-    return all_objects
-
   def resource_type_to_discovery_info(self, resource_type):
     parts = resource_type.split('.')
     node = self.discovery_document
@@ -54,7 +54,27 @@ class GcpComputeAgent(GcpAgent):
     Returns:
       A list of resources.
     """
+    return self.list_resource(
+        context, resource_type, method_variant='aggregatedList',
+        item_list_transform=self.__make_aggregated_transform(resource_type),
+        **kwargs)
 
+  def iter_aggregated_resource_pages(self, context, resource_type, **kwargs):
+    """List the contents of the specified resource a page at a time.
+
+    This is to aggregated_list_resource as iter_resource_pages is to
+    list_resource.
+
+    Yields:
+      The list of resources in each page.
+    """
+    return self.iter_resource_pages(
+        context, resource_type, method_variant='aggregatedList',
+        item_list_transform=self.__make_aggregated_transform(resource_type),
+        **kwargs)
+
+  def __make_aggregated_transform(self, resource_type):
+    """Returns the item_list_transform for an aggregatedList response."""
     # We need to figure out where the data is in the response.
     # It is going to be in a dictionary key specific to the type,
     # which is the tail of the underlying method URL path so let's
@@ -69,7 +89,4 @@ class GcpComputeAgent(GcpAgent):
         if data_values:
           result.extend(data_values)
       return result
-
-    return self.list_resource(context, resource_type,
-                              method_variant='aggregatedList',
-                              item_list_transform=transform, **kwargs)
+    return transform
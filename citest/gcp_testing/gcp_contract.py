@@ -23,24 +23,60 @@ from googleapiclient.errors import HttpError
 
 # Our modules.
 from .. import json_contract as jc
+from ..json_predicate import make_filter_expression
 from .gcp_error_predicates import GoogleAgentObservationFailureVerifier
 
 
+def make_gcp_filter_expression(pred):
+  """Translate the simple conditions of a predicate into a GCP list filter.
+
+  Args:
+    pred: [ValuePredicate] The predicate that observed objects must satisfy.
+
+  Returns:
+    A filter expression (as for the filter parameter of GCP list methods)
+    accepting every object that pred accepts, or None if pred has no
+    conditions that can be expressed.
+  """
+  return make_filter_expression(pred, '({0} = {1})'.format)
+
+
 class GcpObjectObserver(jc.ObjectObserver):
   """Observe GCP resources."""
 
-  def __init__(self, method, filter=None, **kwargs):
+  @property
+  def supports_streaming(self):
+    """Implements ObjectObserver interface."""
+    return self.__page_method is not None
+
+  def __init__(self, method, filter=None, page_method=None, filter_param=None,
+               **kwargs):
     """Construct observer.
 
     Args:
       gcp_agent: GcpAgent instance to use.
       method: [method] The method to invoke.
+      filter: [ValuePredicate] Filters the objects observed.
+      page_method: [method] If not None, a generator method taking the same
+         arguments as method that yields the results a page at a time
+         (e.g. GcpAgent.iter_resource_pages for GcpAgent.list_resource).
+         This is used to stream observations.
+      filter_param: [string] If not None then the name of the method's
+         parameter for filtering on the server. The conditions of the filter
+         that can be expressed are passed in this parameter so that objects
+         the filter would reject are not returned in the first place.
+         The filter is still applied to the objects that are returned.
       kwargs: [kwargs] arguments to pass to method.
     """
     super(GcpObjectObserver, self).__init__(filter)
 
     self.__method = method
+    self.__page_method = page_method
     self.__kwargs = dict(kwargs)
+    if filter_param is not None and filter_param not in kwargs:
+      expression = make_gcp_filter_expression(filter)
+      if expression is not None:
+        self.__kwargs[filter_param] = expression
 
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
@@ -50,7 +86,20 @@ class GcpObjectObserver(jc.ObjectObserver):
   def __str__(self):
     return 'GcpObjectObserver({0})'.format(self.__kwargs)
 
+  def get_cache_key(self, context):
+    """Implements ObjectObserver interface."""
+    method = self.__method
+    bound_to = getattr(method, '__self__', None)
+    method_id = ([id(bound_to), method.__name__] if bound_to is not None
+                 else id(method))
+    return self._make_cache_key(method_id, context.eval(self.__kwargs))
+
   def collect_observation(self, context, observation, trace=True):
+    if self.__page_method is not None:
+      for _ in self.stream_observation(context, observation, trace=trace):
+        pass
+      return observation.objects
+
     try:
       doc = self.__method(context, **self.__kwargs)
       if not isinstance(doc, list):
@@ -64,6 +113,26 @@ class GcpObjectObserver(jc.ObjectObserver):
 
     return observation.objects
 
+  def stream_observation(self, context, observation, trace=True):
+    """Implements ObjectObserver interface."""
+    if self.__page_method is None:
+      for objects in super(GcpObjectObserver, self).stream_observation(
+          context, observation, trace=trace):
+        yield objects
+      return
+
+    pages = self.__page_method(context, **self.__kwargs)
+    try:
+      for page in pages:
+        yield self.filter_all_objects_to_observation(context, page,
+                                                     observation)
+    except HttpError as http_error:
+      logging.getLogger(__name__).info('%s\n%s\n----------------\n',
+                                       http_error, traceback.format_exc())
+      observation.add_error(http_error)
+    finally:
+      pages.close()
+
 
 class GcpClauseBuilder(jc.ContractClauseBuilder):
   """A ContractClause that facilitates observing GCE state."""
@@ -92,21 +161,68 @@ class GcpClauseBuilder(jc.ContractClauseBuilder):
     self.__gcp_agent = gcp_agent
     self.__strict = strict
 
-  def list_resource(self, resource_type, **kwargs):
-    """Observe resources of a particular type."""
+  @staticmethod
+  def __pop_object_filter(object_filter, kwargs):
+    """Returns the object filter, which callers may also pass as filter.
+
+    The filter keyword is what GcpObjectObserver calls the object filter,
+    so it is removed from kwargs rather than passed to the method.
+    """
+    old_filter = kwargs.pop('filter', None)
+    if old_filter is None:
+      return object_filter
+    if object_filter is not None:
+      raise ValueError('Only one of filter and object_filter may be given.')
+    return old_filter
+
+  def __filter_param(self, method, resource_type, object_filter):
+    """Returns the parameter for filtering the method on the server, if any."""
+    if (object_filter is None
+        or not self.__gcp_agent.resource_method_accepts(
+            method, resource_type, 'filter')):
+      return None
+    return 'filter'
+
+  def list_resource(self, resource_type, object_filter=None, **kwargs):
+    """Observe resources of a particular type.
+
+    Args:
+      resource_type: [string] The type of resource to list.
+      object_filter: [ValuePredicate] If not None then only observe the
+         resources satisfying this predicate. Where possible the resources
+         are also filtered by the server so that they are not listed at all.
+      kwargs: [kwargs] Additional parameters to the list method.
+         For compatibility, filter is the same as object_filter.
+    """
+    object_filter = self.__pop_object_filter(object_filter, kwargs)
     self.observer = GcpObjectObserver(
-        self.__gcp_agent.list_resource, resource_type=resource_type, **kwargs)
+        self.__gcp_agent.list_resource,
+        filter=object_filter,
+        page_method=self.__gcp_agent.iter_resource_pages,
+        filter_param=self.__filter_param(
+            'list', resource_type, object_filter),
+        resource_type=resource_type, **kwargs)
     observation_builder = jc.ValueObservationVerifierBuilder(
         'List ' + resource_type, strict=self.__strict)
     self.verifier_builder.append_verifier_builder(observation_builder)
 
     return observation_builder
 
-  def aggregated_list_resource(self, resource_type, **kwargs):
-    """Observe resources of a particular type."""
+  def aggregated_list_resource(self, resource_type, object_filter=None,
+                               **kwargs):
+    """Observe resources of a particular type.
+
+    Args:
+      See list_resource.
+    """
+    object_filter = self.__pop_object_filter(object_filter, kwargs)
     self.observer = GcpObjectObserver(
-        self.__gcp_agent.aggregated_list_resource, resource_type=resource_type,
-        **kwargs)
+        self.__gcp_agent.aggregated_list_resource,
+        filter=object_filter,
+        page_method=self.__gcp_agent.iter_aggregated_resource_pages,
+        filter_param=self.__filter_param(
+            'aggregatedList', resource_type, object_filter),
+        resource_type=resource_type, **kwargs)
     observation_builder = jc.ValueObservationVerifierBuilder(
         'List Aggregated ' + resource_type, strict=self.__strict)
     self.verifier_builder.append_verifier_builder(observation_builder)
@@ -21,7 +21,8 @@
 # observations onto a system to collect the data supporting verification.
 from observer import (
     ObjectObserver,
-    Observation)
+    Observation,
+    ObservationCache)
 
 
 # The verifier module provides support for verifying observations meet
@@ -30,7 +31,8 @@ from observation_verifier import (
     ObservationVerifier,
     ObservationVerifierBuilder,
     ObservationVerifyResultBuilder,
-    ObservationVerifyResult)
+    ObservationVerifyResult,
+    StreamingCheck)
 
 
 from value_observation_verifier import (
@@ -23,11 +23,15 @@ attempting to make it (e.g. the observed resource does not exist).
 """
 
 
+import hashlib
+import json
 import logging
 import time
 
+from ..base import FixedIntervalRetryPolicy
 from ..base import JournalLogger
 from ..base import JsonSnapshotableEntity
+from ..base import map_with_captured_journals
 from ..json_predicate import predicate
 from . import observer as ob
 from . import observation_verifier as ov
@@ -45,6 +49,16 @@ class ContractClauseVerifyResult(predicate.PredicateResult):
     """The results from applying the clause verifier."""
     return self.__verify_results
 
+  @property
+  def attempts(self):
+    """The number of observations made to arrive at this result."""
+    return self.__attempts
+
+  @property
+  def timestamp(self):
+    """The time at which the observation for this result was made."""
+    return self.__timestamp
+
   @property
   def enumerated_summary_message(self):
     """Human readable verification result summary string."""
@@ -67,14 +81,21 @@ class ContractClauseVerifyResult(predicate.PredicateResult):
       clause: [ContractClause] The clause being validated
       verify_results: [ObservationVerifyResult] The result of verifying
          the clause (against an observation).
+      attempts: [int] The number of observations made to arrive at
+         this result. Defaults to 1.
+      timestamp: [float] The time the observation was made.
+         Defaults to now.
 
       See base class (PredicateResult) for additional kwargs.
     """
+    self.__attempts = kwargs.pop('attempts', 1)
+    self.__timestamp = kwargs.pop('timestamp', None) or time.time()
     super(ContractClauseVerifyResult, self).__init__(valid, **kwargs)
     self.__clause = clause
     self.__verify_results = verify_results
 
   def __eq__(self, result):
+    # The attempts and timestamp are bookkeeping so are not compared.
     return  (super(ContractClauseVerifyResult, self).__eq__(result)
              and self.__clause == result.clause
              and self.__verify_results == result.verify_results)
@@ -98,6 +119,8 @@ class ContractClauseVerifyResult(predicate.PredicateResult):
 
     relation = builder.determine_valid_relation(self.__verify_results)
     builder.make_control(entity, 'Clause', self.__clause)
+    if self.__attempts > 1:
+      builder.make(entity, 'Attempts', self.__attempts)
     builder.make(entity, 'Results', self.__verify_results, relation=relation)
     super(ContractClauseVerifyResult, self).export_to_json_snapshot(
         snapshot, entity)
@@ -143,15 +166,23 @@ class ContractClause(predicate.ValuePredicate):
       verifier: A ObservationVerifier on the observer's Observations.
       retryable_for_secs: If > 0, then how long to continue retrying
         when a verification attempt fails.
+      retry_policy: [RetryPolicy] Determines how long to wait between
+        attempts. If None then poll at 1/10 of retryable_for_secs,
+        but no more than every second nor less than every 5 seconds.
+      trace_observations: [bool] If False then the observer does not
+        journal the details producing each observation (e.g. response
+        bodies), so large observations can be decoded as they are read.
     """
     self.logger = logging.getLogger(__name__)
     self.__retryable_for_secs = kwargs.pop('retryable_for_secs', 0)
+    self.__retry_policy = kwargs.pop('retry_policy', None)
+    self.__trace_observations = kwargs.pop('trace_observations', True)
     self.__title = title
     self.__observer = observer
     self.__verifier = verifier
     super(ContractClause, self).__init__(**kwargs)
 
-  def verify(self, context):
+  def verify(self, context, operation_completed=None, observation_cache=None):
     """Attempt to make an observation and verify it.
 
     This call will repeatedly attempt to observe new data and verify it
@@ -161,6 +192,13 @@ class ContractClause(predicate.ValuePredicate):
     Args:
       context: Runtime citest execution context may contain operation status
          and other testing parameters used by downstream verifiers.
+      operation_completed: [threading.Event] If provided then the operation
+         being verified may still be running. The clause will be observed
+         speculatively until the event is set, but only an observation made
+         after the event was set can satisfy the clause. The
+         retryable_for_secs period starts once the event is set.
+      observation_cache: [ObservationCache] If provided then share
+         observations with the other clauses verified with this cache.
 
     Returns:
       ContractClauseVerifyResult with details.
@@ -172,13 +210,14 @@ class ContractClause(predicate.ValuePredicate):
     try:
       JournalLogger.delegate("store", self, _title='Clause Specification')
 
-      result = self.__do_verify(context)
+      result = self.__do_verify(context, operation_completed,
+                                observation_cache)
       context_relation = 'VALID' if result else 'INVALID'
     finally:
       JournalLogger.end_context(relation=context_relation)
     return result
 
-  def __do_verify(self, context):
+  def __do_verify(self, context, operation_completed, cache):
     """Helper function that implements the clause verification policy.
 
     We will periodically attempt to verify the clause until we succeed
@@ -187,18 +226,58 @@ class ContractClause(predicate.ValuePredicate):
 
     Args:
       context: Runtime citest execution context.
+      operation_completed: [threading.Event] See verify().
+      cache: [ObservationCache] See verify() observation_cache.
     Returns:
       VerifyClauseResult specifying the final outcome.
     """
 
+    # If no policy was given then we probably want to have an idea of when
+    # it actually becomes available so keep the interval low. But if we are
+    # going to wait a long time, then dont poll very frequently.
+    # The numbers here are arbitrary otherwise.
+    #
+    # 1/10 total time or 5 seconds if that is pretty long,
+    # but no less than 1 second unless there is less than 1 second left.
+    retry_policy = (self.__retry_policy
+                    or FixedIntervalRetryPolicy(
+                        min(5, max(1, self.__retryable_for_secs / 10))))
+    # The speculative observations made while the operation was running
+    # already advanced through the retry policy, so retries afterwards
+    # continue from there rather than restarting the backoff.
+    if operation_completed is None:
+      policy_attempt, sleep, fingerprint, clause_result = 0, None, None, None
+    else:
+      policy_attempt, sleep, fingerprint, clause_result = (
+          self.__verify_speculatively(context, operation_completed,
+                                      retry_policy, cache))
+
     # self.logger.debug('Verifying Contract: %s', self.__title)
     start_time = time.time()
     end_time = start_time + self.__retryable_for_secs
+    attempt = 0
 
     while True:
-      clause_result = self.verify_once(context)
+      observation = self.__collect_observation(context, cache)
+      prev_fingerprint = fingerprint
+      # The fingerprint is only compared against that of another attempt,
+      # so do not bother with it if there is neither a previous attempt
+      # nor time left for another.
+      if prev_fingerprint is not None or time.time() < end_time:
+        fingerprint = self.__fingerprint_observation(context, observation)
+      else:
+        fingerprint = None
+      if fingerprint is not None and fingerprint == prev_fingerprint:
+        # The verifier would only reach the same conclusion again.
+        clause_result = ContractClauseVerifyResult(
+            clause_result.valid, self, clause_result.verify_results,
+            attempts=attempt + 1)
+      else:
+        clause_result = self.__verify_observation(
+            context, observation, attempts=attempt + 1)
       if clause_result:
         break
+      self.__invalidate_cached_observation(context, cache)
 
       now = time.time()
       if end_time <= now:
@@ -209,15 +288,10 @@ class ContractClause(predicate.ValuePredicate):
         break
 
       secs_remaining = end_time - now
-
-      # This could be a bounded exponential backoff, but we probably
-      # want to have an idea of when it actually becomes available so keep low.
-      # But if we are going to wait a long time, then dont poll very frequently.
-      # The numbers here are arbitrary otherwise.
-      #
-      # 1/10 total time or 5 seconds if that is pretty long,
-      # but no less than 1 second unless there is less than 1 second left.
-      sleep = min(secs_remaining, min(5, max(1, self.__retryable_for_secs / 10)))
+      sleep = retry_policy.next_sleep_secs(
+          policy_attempt, prev_sleep_secs=sleep, secs_remaining=secs_remaining)
+      policy_attempt += 1
+      attempt += 1
       self.logger.debug(
           '%s not yet satisfied with secs_remaining=%r. Retry in %r\n%s',
           self.__title, secs_remaining, sleep, clause_result)
@@ -232,11 +306,78 @@ class ContractClause(predicate.ValuePredicate):
                       ok_str, self.__title, summary)
     return clause_result
 
-  def verify_once(self, context):
+  def __verify_speculatively(self, context, operation_completed, retry_policy,
+                             cache):
+    """Observe the clause until the operation being verified completes.
+
+    The results here are not conclusive since the operation is still
+    running. Errors are expected (e.g. the context may not yet have the
+    values that the status_extractor will provide) so are not fatal.
+
+    The state at completion is returned so that verification can carry on
+    from it. The first observation after completion is still made right
+    away, but if neither it nor the context changed since the last
+    speculative observation then the speculative result is reused rather
+    than verified again.
+
+    Args:
+      context: Runtime citest execution context.
+      operation_completed: [threading.Event] Set when the operation completes.
+      retry_policy: [RetryPolicy] Determines how often to observe.
+      cache: [ObservationCache] See verify() observation_cache.
+
+    Returns:
+      A tuple of the number of retries taken from the retry_policy, the
+      last sleep it returned, and the fingerprint and ContractClauseVerifyResult
+      of the last observation. The fingerprint and result are None if the
+      last observation could not be verified.
+    """
+    attempt = 0
+    sleep = None
+    fingerprint = None
+    clause_result = None
+    while not operation_completed.is_set():
+      try:
+        observation = self.__collect_observation(context, cache)
+        prev_fingerprint = fingerprint
+        fingerprint = self.__fingerprint_observation(context, observation)
+        if (fingerprint is None or fingerprint != prev_fingerprint
+            or clause_result is None):
+          clause_result = self.__verify_observation(context, observation)
+        summary = 'OK' if clause_result else 'not yet satisfied'
+      except Exception as ex:
+        fingerprint = None
+        clause_result = None
+        summary = 'not yet observable ({0})'.format(ex)
+
+      # Do not let these observations outlive the operation.
+      self.__invalidate_cached_observation(context, cache)
+      if operation_completed.is_set():
+        break
+
+      sleep = retry_policy.next_sleep_secs(attempt, prev_sleep_secs=sleep)
+      attempt += 1
+      self.logger.debug(
+          '%s is %s while the operation is still running. Check in %r',
+          self.__title, summary, sleep)
+      operation_completed.wait(sleep)
+
+    return attempt, sleep, fingerprint, clause_result
+
+  def __invalidate_cached_observation(self, context, cache):
+    """Remove our observation from the ObservationCache, if any."""
+    if cache is None or self.__observer is None:
+      return
+    key = self.__observer.get_cache_key(context)
+    if key is not None:
+      cache.invalidate(key)
+
+  def verify_once(self, context, observation_cache=None):
     """Make a single attempt to collect an observation and verify it.
 
     Args:
       context: Runtime citest execution context.
+      observation_cache: [ObservationCache] See verify().
 
     Raises:
       ValueError of the clause is not yet fully specified.
@@ -244,6 +385,44 @@ class ContractClause(predicate.ValuePredicate):
     Returns:
       ContractClauseVerifyResult from verifying the observation
     """
+    return self.__verify_observation(
+        context, self.__collect_observation(context, observation_cache))
+
+  @staticmethod
+  def __fingerprint_observation(context, observation):
+    """Determine a digest of the observation and the context verifying it.
+
+    The verifier may read values from the context (e.g. those a
+    status_extractor sets when the operation completes), so the versions
+    of the context's keys are part of the digest.
+
+    Returns:
+      A string that is the same for equivalent observations verified in an
+      unchanged context, or None if the observation cannot be fingerprinted.
+    """
+    # Exceptions are compared by their representation, which includes their
+    # arguments. Other error types might not reveal all their details.
+    if not all([isinstance(error, Exception) for error in observation.errors]):
+      return None
+    try:
+      text = json.dumps(
+          [sorted(context.key_versions().items()),
+           observation.objects, [repr(error) for error in observation.errors]],
+          sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+      return None
+    return hashlib.sha1(text).hexdigest()
+
+  def __collect_observation(self, context, cache):
+    """Collect an observation for the clause to verify.
+
+    Args:
+      context: Runtime citest execution context.
+      cache: [ObservationCache] If not None then share the observation.
+
+    Raises:
+      ValueError of the clause is not yet fully specified.
+    """
     if not self.__observer:
       raise ValueError(
           'No ObjectObserver bound to clause {0!r}'.format(self.__title))
@@ -252,11 +431,48 @@ class ContractClause(predicate.ValuePredicate):
           'No ObservationVerifier bound to clause {0!r}'.format(self.__title))
 
     observation = ob.Observation()
-    self.__observer.collect_observation(context, observation)
+    key = None if cache is None else self.__observer.get_cache_key(context)
+    if key is None:
+      self.__stream_observation(context, observation)
+    else:
+      observation.extend(cache.get_or_collect(
+          key,
+          lambda fresh: self.__observer.collect_observation(
+              context, fresh, trace=self.__trace_observations)))
+    return observation
+
+  def __stream_observation(self, context, observation):
+    """Collect the observation, stopping once the verifier is satisfied.
+
+    If the observer collects the observation incrementally (e.g. page by
+    page) and the verifier can tell when what was observed so far is
+    certain to be verified, then the remaining objects are not collected.
+    Observations shared through an ObservationCache are always collected
+    in full since other clauses may need the rest.
+    """
+    check = (self.__verifier.begin_streaming(context)
+             if self.__observer.supports_streaming else None)
+    if check is None:
+      self.__observer.collect_observation(
+          context, observation, trace=self.__trace_observations)
+      return
+
+    stream = self.__observer.stream_observation(
+        context, observation, trace=self.__trace_observations)
+    try:
+      for objects in stream:
+        if not observation.errors and check.add_objects(context, objects):
+          self.logger.debug('%s satisfied after observing %d objects.',
+                            self.__title, len(observation.objects))
+          break
+    finally:
+      stream.close()
 
+  def __verify_observation(self, context, observation, attempts=1):
+    """Verify an observation collected by __collect_observation."""
     verify_result = self.__verifier(context, observation)
     return ContractClauseVerifyResult(
-        verify_result.__nonzero__(), self, verify_result)
+        verify_result.__nonzero__(), self, verify_result, attempts=attempts)
 
 
 class ContractClauseBuilder(object):
@@ -285,6 +501,26 @@ class ContractClauseBuilder(object):
     """Set how long to continue validating the clause until it holds."""
     self.__retryable_for_secs = secs
 
+  @property
+  def retry_policy(self):
+    """The RetryPolicy determining the interval between retries, if any."""
+    return self.__retry_policy
+
+  @retry_policy.setter
+  def retry_policy(self, policy):
+    """Set the RetryPolicy determining the interval between retries."""
+    self.__retry_policy = policy
+
+  @property
+  def trace_observations(self):
+    """Whether the observer journals the details producing observations."""
+    return self.__trace_observations
+
+  @trace_observations.setter
+  def trace_observations(self, trace):
+    """Set whether the observer journals the details producing observations."""
+    self.__trace_observations = trace
+
   @property
   def observer(self):
     """The observer used to gather the required data to verify."""
@@ -306,6 +542,9 @@ class ContractClauseBuilder(object):
       verifier_builder: Builds the clause verifier.
       retryable_for_secs: [int] How long the clause can continue colllecting
          observation data until it can be confirmed to hold.
+      retry_policy: [RetryPolicy] Determines the interval between retries.
+      trace_observations: [bool] Whether the observer journals the details
+         producing each observation. See ContractClause.
     """
     strict = kwargs.pop('strict', False)
     if strict:
@@ -313,6 +552,8 @@ class ContractClauseBuilder(object):
       logger.warning('Strict flag is DEPRECATED in %s', title)
 
     self.__retryable_for_secs = kwargs.pop('retryable_for_secs', 0)
+    self.__retry_policy = kwargs.pop('retry_policy', None)
+    self.__trace_observations = kwargs.pop('trace_observations', True)
     self.__title = title
     self.__observer = observer
     self.__verifier_builder = (verifier_builder
@@ -324,7 +565,9 @@ class ContractClauseBuilder(object):
         title=self.__title,
         observer=self.__observer,
         verifier=self.__verifier_builder.build(),
-        retryable_for_secs=self.__retryable_for_secs)
+        retryable_for_secs=self.__retryable_for_secs,
+        retry_policy=self.__retry_policy,
+        trace_observations=self.__trace_observations)
 
 
 class ContractVerifyResult(predicate.PredicateResult):
@@ -388,12 +631,38 @@ class Contract(JsonSnapshotableEntity):
     """The list of ContractClause."""
     return self.__clauses
 
-  def __init__(self):
+  @property
+  def max_concurrent_clauses(self):
+    """The number of clauses that can be verified at the same time."""
+    return self.__max_concurrent_clauses
+
+  @max_concurrent_clauses.setter
+  def max_concurrent_clauses(self, num):
+    """Sets the number of clauses that can be verified at the same time."""
+    if num < 1:
+      raise ValueError('max_concurrent_clauses={0} must be positive'
+                       .format(num))
+    self.__max_concurrent_clauses = num
+
+  def __init__(self, max_concurrent_clauses=1):
+    """Constructor.
+
+    Args:
+      max_concurrent_clauses: [int] The number of clauses that can be
+         verified at the same time. Clauses are independent of one another,
+         however their observers and verifiers must be thread-safe in order
+         to verify more than one at a time.
+    """
     self.__clauses = []
+    self.__max_concurrent_clauses = None
+    self.max_concurrent_clauses = max_concurrent_clauses
 
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     snapshot.edge_builder.make_control(entity, 'Clauses', self.__clauses)
+    if self.__max_concurrent_clauses > 1:
+      snapshot.edge_builder.make_control(
+          entity, 'Max Concurrent Clauses', self.__max_concurrent_clauses)
 
   def add_clause(self, clause):
     """Adds a clause to the contract.
@@ -403,27 +672,64 @@ class Contract(JsonSnapshotableEntity):
     """
     self.__clauses.append(clause)
 
-  def verify(self, context):
+  def verify(self, context, operation_completed=None):
     """Verify the clauses in the contract are currently satisified.
 
+    Args:
+      context: [ExecutionContext] The citest execution context.
+      operation_completed: [threading.Event] If provided then the clauses
+         are observed speculatively until the event is set.
+         See ContractClause.verify.
+
     Returns:
      True if success, False if not.
     """
-    valid = True
-    all_results = []
-    for clause in self.__clauses:
-      clause_results = clause.verify(context)
-      all_results.append(clause_results)
-      if not clause_results:
-        valid = False
+    # Share observations among the clauses for the duration of this pass.
+    # The cache is only ever seen by this pass, never by other verifications
+    # sharing the context (e.g. other test cases running concurrently).
+    clause_caches = zip(self.__clauses, self.__observation_caches(context))
+    num_threads = min(self.__max_concurrent_clauses, len(self.__clauses))
+    if num_threads > 1:
+      all_results = map_with_captured_journals(
+          lambda entry: entry[0].verify(
+              context, operation_completed=operation_completed,
+              observation_cache=entry[1]),
+          clause_caches, num_threads)
+    else:
+      all_results = [clause.verify(context,
+                                   operation_completed=operation_completed,
+                                   observation_cache=cache)
+                     for clause, cache in clause_caches]
 
+    valid = all(all_results)
     return ContractVerifyResult(valid, all_results)
 
+  def __observation_caches(self, context):
+    """Determine the ObservationCache each clause should observe through.
+
+    Only clauses whose observations are shared with another clause use the
+    cache. The others are given None so that they can stream their
+    observations, stopping once they are satisfied.
+
+    Returns:
+      A list with the ObservationCache or None for each clause, in order.
+    """
+    keys = [None if clause.observer is None
+            else clause.observer.get_cache_key(context)
+            for clause in self.__clauses]
+    counts = {}
+    for key in keys:
+      if key is not None:
+        counts[key] = counts.get(key, 0) + 1
+
+    cache = ob.ObservationCache()
+    return [cache if counts.get(key, 0) > 1 else None for key in keys]
+
 
 class ContractBuilder(object):
   """Acts as a clause factory to assemble clauses into contracts."""
 
-  def __init__(self, clause_factory=None):
+  def __init__(self, clause_factory=None, max_concurrent_clauses=1):
     """Constructs a new contract.
 
     Args:
@@ -432,7 +738,10 @@ class ContractBuilder(object):
          It also takes a DEPRECATED strict flag. This is deprecated
          because in the future the strict flag will be on individual
          constraints added to the clause.
+      max_concurrent_clauses: [int] The number of clauses that the
+         contract can verify at the same time.
     """
+    self.__max_concurrent_clauses = max_concurrent_clauses
     self.__clause_factory = (
         clause_factory
         or (lambda title, retryable_for_secs=0, strict=False:
@@ -460,7 +769,7 @@ class ContractBuilder(object):
 
   def build(self):
     """Creates a new contract with the added clauses."""
-    contract = Contract()
+    contract = Contract(max_concurrent_clauses=self.__max_concurrent_clauses)
     for builder in self.__builders:
       contract.add_clause(builder.build())
     return contract
@@ -19,8 +19,10 @@
 import logging
 
 from ..base import JsonSnapshotableEntity
+from ..json_predicate import json_value_key
 from ..json_predicate import map_predicate
 from ..json_predicate import predicate
+from ..json_predicate import source_pool
 
 class ObservationVerifyResultBuilder(object):
   @property
@@ -46,22 +48,60 @@ class ObservationVerifyResultBuilder(object):
     # constraints form a disjunction.
     self.__valid_obj_map = []
 
+    # The entries in _valid_obj_map are indexed so that we do not have to
+    # compare against every one of them. The same object is usually
+    # validated by multiple constraints so we first look it up by identity.
+    # Otherwise we look for equal objects among those with the same
+    # json_value_key. Objects that cannot be keyed are compared linearly.
+    self.__valid_obj_by_id = {}
+    self.__valid_obj_by_key = {}
+    self.__unkeyable_valid_obj_entries = []
+
     # The _valid_obj_set is a set of objects meeting constriants that verify
     # them. All we need is one reason to think something is good.
     self.__valid_obj_set = []  # Cannot be a set because it is unhashable.
     self.__good_results = []
     self.__bad_results = []
 
+  def __find_valid_obj_entry(self, obj):
+    """Find the entry in _valid_obj_map for obj.
+
+    Returns:
+      The entry and the key bucket to add obj to if there isn't one.
+      The entry is None if obj was not yet validated. The bucket
+      is None if obj cannot be keyed.
+    """
+    entry = self.__valid_obj_by_id.get(id(obj))
+    if entry is not None:
+      return entry, None
+
+    try:
+      bucket = self.__valid_obj_by_key.setdefault(json_value_key(obj), [])
+    except TypeError:
+      bucket = None
+
+    for e in (self.__unkeyable_valid_obj_entries if bucket is None
+              else bucket):
+      if e[0] == obj:
+        return e, bucket
+    return None, bucket
+
   def __add_valid_object_constraint(self, entry):
     obj = entry.obj
     result = entry.result
-    for e in self.__valid_obj_map:
-      if e[0] == obj:
-        e[1].append(result)
-        return
+    e, bucket = self.__find_valid_obj_entry(obj)
+    if e is not None:
+      e[1].append(result)
+      return
 
+    e = (obj, [result])
     self.__valid_obj_set.append(obj)
-    self.__valid_obj_map.append((obj, [result]))
+    self.__valid_obj_map.append(e)
+    self.__valid_obj_by_id[id(obj)] = e
+    if bucket is None:
+      self.__unkeyable_valid_obj_entries.append(e)
+    else:
+      bucket.append(e)
 
   def add_path_predicate_result(self, has_path_pred_result):
     """Add the contents of a PathPredicateResult.
@@ -130,7 +170,8 @@ class ObservationVerifyResultBuilder(object):
     Args:
       result: [ObservationVerifyResult] The result to fuse into this one.
     """
-    if self.__observation != result.observation:
+    if (self.__observation != result.observation
+        and result.observation is not source_pool.RELEASED_SOURCE):
       raise ValueError("Observations differ.")
 
     self.__good_results.extend(result.good_results)
@@ -152,8 +193,12 @@ class ObservationVerifyResult(predicate.PredicateResult):
 
   @property
   def observation(self):
-    """observer.Observation for the observer providing the objects."""
-    return self.__observation
+    """observer.Observation for the observer providing the objects.
+
+    This is source_pool.RELEASED_SOURCE if the global SourcePool no longer
+    retains it.
+    """
+    return source_pool.resolve_source(self.__observation)
 
   @property
   def good_results(self):
@@ -188,7 +233,7 @@ class ObservationVerifyResult(predicate.PredicateResult):
   def __init__(self, valid, observation,
                good_results, bad_results, failed_constraints,
                **kwargs):
-    self.__observation = observation
+    self.__observation = source_pool.refer_to_source(observation)
     self.__good_results = good_results
     self.__bad_results = bad_results
     self.__failed_constraints = failed_constraints
@@ -199,7 +244,7 @@ class ObservationVerifyResult(predicate.PredicateResult):
     super(ObservationVerifyResult, self).export_to_json_snapshot(
         snapshot, entity)
     builder = snapshot.edge_builder
-    builder.make_input(entity, 'Observation', self.__observation)
+    builder.make_input(entity, 'Observation', self.observation)
     builder.make(entity, 'Failed Constraints', self.__failed_constraints)
     edge = builder.make(entity, 'Good Results', self.__good_results)
     if self.__good_results:
@@ -218,18 +263,69 @@ class ObservationVerifyResult(predicate.PredicateResult):
             '  good_results={2!r}'
             '  bad_results={3!r}'.format(
                 super(ObservationVerifyResult, self).__str__(),
-                self.__observation,
+                self.observation,
                 self.__good_results,
                 self.__bad_results))
 
   def __eq__(self, state):
     return (super(ObservationVerifyResult, self).__eq__(state)
-            and self.__observation == state.observation
+            and self.observation == state.observation
             and self.__good_results == state.good_results
             and self.__bad_results == state.bad_results
             and self.__failed_constraints == state.failed_constraints)
 
 
+class StreamingCheck(object):
+  """Determines when a streamed observation is certain to be verified.
+
+  This is returned by ObservationVerifier.begin_streaming for verifiers
+  whose constraints can only become satisfied, and then remain satisfied,
+  as more objects are observed (e.g. "contains at least one").
+  """
+
+  def add_objects(self, context, objects):
+    """Account for more objects observed by the stream.
+
+    Args:
+      context: [ExecutionContext] The context the verifier runs in.
+      objects: [list] The objects that were just added to the observation.
+
+    Returns:
+      True if the verifier is now certain to accept the observation no
+      matter what other objects are added to it, False if not yet.
+    """
+    raise NotImplementedError(
+        '{0}.add_objects() not implemented'.format(self.__class__.__name__))
+
+
+class _DisjunctiveStreamingCheck(StreamingCheck):
+  """A StreamingCheck for the disjunctive normal form of other checks."""
+
+  def __init__(self, dnf_checks):
+    """Constructor.
+
+    Args:
+      dnf_checks: [list of list of StreamingCheck] The inner lists are the
+         checks for the terms that are AND'd together.
+    """
+    self.__dnf_checks = dnf_checks
+    self.__satisfied = set()
+
+  def add_objects(self, context, objects):
+    """Implements StreamingCheck interface."""
+    decided = False
+    for term in self.__dnf_checks:
+      term_satisfied = True
+      for check in term:
+        if id(check) not in self.__satisfied:
+          if check.add_objects(context, objects):
+            self.__satisfied.add(id(check))
+          else:
+            term_satisfied = False
+      decided = decided or term_satisfied
+    return decided
+
+
 class ObservationVerifier(predicate.ValuePredicate):
   @property
   def dnf_verifiers(self):
@@ -296,6 +392,27 @@ class ObservationVerifier(predicate.ValuePredicate):
   def __str__(self):
     return 'ObservationVerifier {0!r}'.format(self.__dnf_verifiers)
 
+  def begin_streaming(self, context):
+    """Begin checking an observation as it is streamed.
+
+    Args:
+      context: [ExecutionContext] The context the verifier will run in.
+
+    Returns:
+      A StreamingCheck determining when the observation is certain to be
+      verified, or None if the verifier needs the entire observation.
+      Verifiers that specialize __call__ need to specialize this as well.
+    """
+    if type(self).__call__.__func__ is not ObservationVerifier.__call__.__func__:
+      return None
+
+    dnf_checks = []
+    for term in self.__dnf_verifiers:
+      checks = [v.begin_streaming(context) for v in term]
+      if checks and all(check is not None for check in checks):
+        dnf_checks.append(checks)
+    return _DisjunctiveStreamingCheck(dnf_checks) if dnf_checks else None
+
   def __call__(self, context, observation):
     """Verify the observation.
 
@@ -307,6 +424,15 @@ class ObservationVerifier(predicate.ValuePredicate):
     Returns:
       ObservationVerifyResult containing the verification results.
     """
+    return predicate.perform_verification_pass(
+        context, lambda: self.__verify_dnf(context, observation))
+
+  def __verify_dnf(self, context, observation):
+    """Verify the observation against the disjunctive normal form terms.
+
+    Structurally equal predicates in different terms share their results
+    through the context's PredicateMemo.
+    """
     builder = ObservationVerifyResultBuilder(observation)
     valid = False
 
@@ -16,6 +16,10 @@
 """Observers make observations that are a collection of data to be verified."""
 
 
+import collections
+import json
+import threading
+
 from ..base import JsonSnapshotableEntity
 
 class Observation(JsonSnapshotableEntity):
@@ -132,6 +136,15 @@ class ObjectObserver(JsonSnapshotableEntity):
     """
     return self.__filter
 
+  @property
+  def supports_streaming(self):
+    """Whether stream_observation collects the observation incrementally.
+
+    If not then stream_observation collects the entire observation before
+    yielding anything, so there is no benefit to streaming it.
+    """
+    return False
+
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     snapshot.edge_builder.make_mechanism(entity, 'Filter', self.__filter)
@@ -146,25 +159,65 @@ class ObjectObserver(JsonSnapshotableEntity):
     """
     self.__filter = filter
 
+  def get_cache_key(self, context):
+    """Determine the key for sharing this observer's observations.
+
+    Observers that make the same query, such as listing the same resources
+    through the same agent, can share an observation within an
+    ObservationCache rather than each repeating the query.
+
+    Args:
+      context: [ExecutionContext] The context the observation is made in.
+
+    Returns:
+      A string identifying the observation this observer would collect,
+      or None if its observations should not be shared (the default).
+    """
+    return None
+
+  def _make_cache_key(self, *parts):
+    """Helper function for specialized get_cache_key implementations.
+
+    Args:
+      parts: [list of JSON encodable values] The observer's evaluated
+         arguments and the identity of the agent it uses.
+
+    Returns:
+      A cache key that also incorporates the observer class and filter.
+    """
+    return json.dumps([self.__class__.__name__, id(self.__filter)]
+                      + list(parts),
+                      sort_keys=True, default=repr)
+
   def filter_all_objects_to_observation(self, context, objects, observation):
     """Add objects to Observation that comply with the observer's filter.
 
     Args:
       context: The execution context to filter within.
       objects: The list of objects to add.
-        Each element will be filtered independently
+        Each element will be filtered independently. This can also be an
+        iterator (e.g. a generator) producing the objects, in which case
+        each is filtered as it is produced.
       observation: The Observation object to add filtered objects to.
+
+    Returns:
+      The list of objects that were added.
     """
+    if not isinstance(objects, (list, collections.Iterator)):
+      objects = [objects]
+
     if not self.__filter:
-      observation.add_all_objects(objects)
-      return
+      added = objects if isinstance(objects, list) else list(objects)
+      observation.add_all_objects(added)
+      return added
 
-    if not isinstance(objects, list):
-      objects = [objects]
+    added = []
     for obj in objects:
       obj_result = self.__filter(context, obj)
       if obj_result:
         observation.add_object(obj)
+        added.append(obj)
+    return added
 
   def collect_observation(self, context, observation, trace=True):
     """Collect an Observation.
@@ -175,3 +228,119 @@ class ObjectObserver(JsonSnapshotableEntity):
       trace: If true then debug the details producing the observation.
     """
     raise NotImplementedError('Needs Specialized in ' + self.__class__)
+
+  def stream_observation(self, context, observation, trace=True):
+    """Collect an Observation incrementally.
+
+    This is a generator that adds objects to the observation as they are
+    collected (e.g. a page at a time) rather than all at once. The caller
+    may stop iterating (and should then close the generator) once it has
+    seen enough, leaving the remaining objects uncollected.
+
+    The default implementation collects the entire observation at once.
+    Observers that can do better should override this and
+    supports_streaming.
+
+    Args:
+      observation: The Observation to collect into.
+      context: Runtime execution context.
+      trace: If true then debug the details producing the observation.
+
+    Yields:
+      The list of objects added to the observation by each increment.
+    """
+    self.collect_observation(context, observation, trace=trace)
+    yield observation.objects
+
+
+class ObservationCache(object):
+  """Shares observations among ContractClauses within a verification pass.
+
+  Clauses whose observers have the same cache key share the observation
+  rather than each collecting it. If an observation is requested while
+  another thread is collecting it, then the request waits for that
+  collection rather than making another.
+
+  Contract.verify creates a cache for each verification and passes it to
+  the clauses whose observers share a cache key. Clauses invalidate the entry for their observer before
+  retrying so that retries see fresh data.
+  """
+
+  @property
+  def num_collected(self):
+    """The number of observations that were actually collected."""
+    return self.__num_collected
+
+  @property
+  def num_hits(self):
+    """The number of observations satisfied from the cache."""
+    return self.__num_hits
+
+  def __init__(self):
+    self.__lock = threading.Lock()
+    self.__entries = {}
+    self.__num_collected = 0
+    self.__num_hits = 0
+
+  def get_or_collect(self, key, collect_func):
+    """Return the observation for the key, collecting it if needed.
+
+    Args:
+      key: [string] The observer's cache key.
+      collect_func: [callable(Observation)] Collects the observation into
+         the Observation it is given if it is not already cached.
+
+    Raises:
+      Whatever collect_func raised, if it was called for this key and failed.
+      Failed collections are not cached.
+
+    Returns:
+      The shared Observation. Callers should not modify it.
+    """
+    with self.__lock:
+      entry = self.__entries.get(key)
+      owner = entry is None
+      if owner:
+        entry = _ObservationCacheEntry()
+        self.__entries[key] = entry
+        self.__num_collected += 1
+      else:
+        self.__num_hits += 1
+
+    if not owner:
+      entry.ready.wait()
+      if entry.exception is not None:
+        raise entry.exception
+      return entry.observation
+
+    try:
+      observation = Observation()
+      collect_func(observation)
+      entry.observation = observation
+    except Exception as ex:
+      entry.exception = ex
+      self.invalidate(key)
+      raise
+    finally:
+      entry.ready.set()
+    return observation
+
+  def invalidate(self, key):
+    """Remove the cached observation, if any, for the key."""
+    with self.__lock:
+      self.__entries.pop(key, None)
+
+  def clear(self):
+    """Remove all the cached observations."""
+    with self.__lock:
+      self.__entries = {}
+
+
+class _ObservationCacheEntry(object):
+  """An observation within an ObservationCache, possibly still in progress."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self):
+    self.ready = threading.Event()
+    self.observation = None
+    self.exception = None
@@ -15,6 +15,7 @@
 # pylint: disable=missing-docstring
 # pylint: disable=redefined-builtin
 
+import functools
 import logging
 
 from ..json_predicate import binary_predicate
@@ -40,7 +41,8 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
   predicate being specified.
   """
 
-  def __init__(self, title, strict=False):
+  def __init__(self, title, strict=False, fast_pass=False, early_exit=False,
+               parallel_evaluator=None):
     """Constructor.
 
     Args:
@@ -50,9 +52,20 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
          constraints.  Non-strict verifiers require all the constraints
          to be satisfied by at least one object (but not necessarily the same),
          and some objects may not satisfy any constraints at all.
+      fast_pass: [bool] Whether the verifier should only explain failures.
+         See ValueObservationVerifier.
+      early_exit: [bool] Whether the CardinalityPredicates added by this
+         builder stop counting once their outcome is decided.
+         See CardinalityPredicate.
+      parallel_evaluator: [ParallelEvaluator] If not None then the fast
+         pass counts values across large observations in parallel.
+         See ValueObservationVerifier.
     """
     super(ValueObservationVerifierBuilder, self).__init__(title)
     self.__strict = strict
+    self.__fast_pass = fast_pass
+    self.__early_exit = early_exit
+    self.__parallel_evaluator = parallel_evaluator
     self.__constraints = []
 
   def __eq__(self, builder):
@@ -60,6 +73,8 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
     # pylint: disable=protected-access
     return (super(ValueObservationVerifierBuilder, self).__eq__(builder)
             and self.__strict == builder.__strict
+            and self.__fast_pass == builder.__fast_pass
+            and self.__early_exit == builder.__early_exit
             and self.__constraints == builder.__constraints)
 
   def _do_build_generate(self, dnf_verifiers):
@@ -68,7 +83,9 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
         title=self.title,
         dnf_verifiers=dnf_verifiers,
         constraints=self.__constraints,
-        strict=self.__strict)
+        strict=self.__strict,
+        fast_pass=self.__fast_pass,
+        parallel_evaluator=self.__parallel_evaluator)
 
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
@@ -84,6 +101,11 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
     super(ValueObservationVerifierBuilder, self).export_to_json_snapshot(
         snapshot, entity)
 
+  def __make_cardinality_predicate(self, pred, **kwargs):
+    """Returns a CardinalityPredicate with this builder's early_exit default."""
+    kwargs.setdefault('early_exit', self.__early_exit)
+    return cardinality_predicate.CardinalityPredicate(pred, **kwargs)
+
   def add_constraint(self, constraint):
     if not isinstance(constraint, predicate.ValuePredicate):
       raise TypeError('{0} is not predicate.ValuePredicate'.format(
@@ -119,7 +141,7 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
   def contains_path_pred(self, path, pred, min=1, max=None, **kwargs):
     enumerate_terminals = kwargs.pop('enumerate_terminals', True)
     self.add_constraint(
-        cardinality_predicate.CardinalityPredicate(
+        self.__make_cardinality_predicate(
             path_predicate.PathPredicate(
                 path, pred, enumerate_terminals=enumerate_terminals),
             min=min, max=max))
@@ -128,7 +150,7 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
   def contains_pred_list(self, pred_list, min=1, max=None):
     conjunction = logic_predicate.AND(pred_list)
     self.add_constraint(
-        cardinality_predicate.CardinalityPredicate(
+        self.__make_cardinality_predicate(
             conjunction, min=min, max=max))
     return self
 
@@ -138,14 +160,14 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
       enumerate_terminals = kwargs.pop('enumerate_terminals', False)
       constraint = binary_predicate.LIST_MATCHES(match_spec, **match_kwargs)
       self.add_constraint(
-          cardinality_predicate.CardinalityPredicate(
+          self.__make_cardinality_predicate(
               path_predicate.PathPredicate(
                   '', constraint, enumerate_terminals=enumerate_terminals),
               min=min, max=max,
               **kwargs))
     elif isinstance(match_spec, dict):
       self.add_constraint(
-          cardinality_predicate.CardinalityPredicate(
+          self.__make_cardinality_predicate(
               binary_predicate.DICT_MATCHES(match_spec, **match_kwargs),
               min=min, max=max,
               **kwargs))
@@ -158,7 +180,7 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
   def excludes_path_pred(self, path, pred, max=0, **kwargs):
     enumerate_terminals = kwargs.pop('enumerate_terminals', True)
     self.add_constraint(
-        cardinality_predicate.CardinalityPredicate(
+        self.__make_cardinality_predicate(
             path_predicate.PathPredicate(
                 path, pred, enumerate_terminals=enumerate_terminals),
             min=0, max=max))
@@ -193,13 +215,13 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
       enumerate_terminals = kwargs.pop('enumerate_terminals', False)
       constraint = binary_predicate.LIST_MATCHES(match_spec, **match_kwargs)
       self.add_constraint(
-          cardinality_predicate.CardinalityPredicate(
+          self.__make_cardinality_predicate(
               path_predicate.PathPredicate(
                   '', constraint, enumerate_terminals=enumerate_terminals),
               min=0, max=max))
     elif isinstance(match_spec, dict):
       self.add_constraint(
-          cardinality_predicate.CardinalityPredicate(
+          self.__make_cardinality_predicate(
               binary_predicate.DICT_MATCHES(match_spec, **match_kwargs),
               min=0, max=max))
     else:
@@ -211,7 +233,7 @@ class ValueObservationVerifierBuilder(ov.ObservationVerifierBuilder):
   def excludes_pred_list(self, pred_list, max=0):
     conjunction = logic_predicate.AND(pred_list)
     self.add_constraint(
-        cardinality_predicate.CardinalityPredicate(
+        self.__make_cardinality_predicate(
             conjunction, min=0, max=max))
     return self
 
@@ -225,9 +247,15 @@ class ValueObservationVerifier(ov.ObservationVerifier):
   def strict(self):
     return self.__strict
 
+  @property
+  def fast_pass(self):
+    return self.__fast_pass
+
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     snapshot.edge_builder.make_control(entity, 'Strict', self.__strict)
+    if self.__fast_pass:
+      snapshot.edge_builder.make_control(entity, 'Fast Pass', True)
     snapshot.edge_builder.make_control(
         entity, 'Constraints', self.__constraints)
     super(ValueObservationVerifier, self).export_to_json_snapshot(
@@ -254,10 +282,23 @@ class ValueObservationVerifier(ov.ObservationVerifier):
           Otherwise if False then the verifier requires each of the constraints
           to be satisfied by at least one object. Not necessarily the same
           object, nor does any object have to satisfy even one constraint.
+      fast_pass: If True then first only determine whether the constraints
+          are satisfied, without collecting the results explaining why.
+          If they are then the result will not contain any details.
+          Otherwise (or in diagnostic mode, see is_diagnostic_mode)
+          the verification is performed again in full to explain it.
+          Strict verifiers are always verified in full.
+      parallel_evaluator: If not None then a ParallelEvaluator that the
+          fast pass uses to count the values satisfying constraints across
+          observations with many objects. Constraints it cannot count are
+          counted serially. Full verifications are always serial since
+          their results refer to the observed objects themselves.
 
        See base class (ov.ObservationVerifier) for additional kwargs.
     """
     self.__strict = kwargs.pop('strict', False)
+    self.__fast_pass = kwargs.pop('fast_pass', False)
+    self.__parallel_evaluator = kwargs.pop('parallel_evaluator', None)
     constraints = kwargs.pop('constraints', None)
     self.__constraints = constraints
     self.__value_constraints = []
@@ -269,7 +310,38 @@ class ValueObservationVerifier(ov.ObservationVerifier):
         self.__value_constraints.append(constraint)
     super(ValueObservationVerifier, self).__init__(title, **kwargs)
 
+  def begin_streaming(self, context):
+    """Implements ObservationVerifier interface.
+
+    Streamed observations can be checked if every value constraint requires
+    a minimum number of values, but no maximum, that are found within
+    individual objects. These can only become satisfied as more objects are
+    observed. Strict verifiers must see every object.
+    """
+    if (self.__strict or self.__observation_constraints
+        or not self.__value_constraints):
+      return None
+
+    requirements = []
+    for constraint in self.__value_constraints:
+      cardinality_pred, path_pred = _split_constraint(constraint)
+      if path_pred is None or not path_pred.traverses_list_elements():
+        return None
+      if cardinality_pred is None:
+        requirements.append((path_pred, 1))
+        continue
+      if context.eval(cardinality_pred.max) is not None:
+        return None
+      requirements.append(
+          (path_pred, max(context.eval(cardinality_pred.min) or 0, 1)))
+    return _ValueStreamingCheck(requirements)
+
   def __call__(self, context, observation):
+    return predicate.perform_verification_pass(
+        context, functools.partial(self.__verify, context, observation))
+
+  def __verify(self, context, observation):
+    """Implements __call__ within a verification pass."""
     valid = True
     final_builder = ov.ObservationVerifyResultBuilder(observation)
 
@@ -303,20 +375,22 @@ class ValueObservationVerifier(ov.ObservationVerifier):
     else:
       object_list = all_objects
 
+    if (valid and self.__fast_pass and not self.__strict
+        and not predicate.is_diagnostic_mode(context)
+        and self.__check_value_constraints(context, object_list)):
+      return ov.ObservationVerifyResult(
+          valid=True, observation=observation,
+          good_results=[], bad_results=[], failed_constraints=[],
+          comment='Satisfied all {0} constraints.'.format(
+              len(self.__value_constraints)))
+
     # Every constraint must be satisfied by at least one object.
     # If strict then every object must be verified by at least one
     # constraint.
     final_builder = ov.ObservationVerifyResultBuilder(observation)
 
-    for constraint in self.__value_constraints:
-      logging.getLogger(__name__).debug('Verifying constraint=%s',
-                                        constraint)
-
-      if isinstance(constraint, path_predicate.ProducesPathPredicateResult):
-        constraint_result = constraint(context, object_list)
-      else:
-        constraint_result = (
-            path_predicate.PathPredicate('', constraint)(context, object_list))
+    for constraint_result in self.__evaluate_value_constraints(
+        context, object_list):
       if not constraint_result:
         logging.getLogger(__name__).debug('FAILED constraint')
         valid = False
@@ -334,3 +408,194 @@ class ValueObservationVerifier(ov.ObservationVerifier):
         logging.getLogger(__name__).info(comment)
 
     return final_builder.build(valid)
+
+  def __evaluate_value_constraints(self, context, object_list):
+    """Apply each of the value constraints to the object list.
+
+    Constraints on the same path share a single traversal of the objects
+    rather than each walking all the objects themselves. The results are
+    the same as if each constraint were applied independently.
+
+    Constraints using early exit that fail are applied again in
+    diagnostic mode so that the failure is fully explained.
+
+    Returns:
+      A list of HasPathPredicateResult in the order of the constraints.
+    """
+    memo = predicate.get_predicate_memo(context)
+    results = []
+    for constraint, cardinality_pred, path_pred, traversal in (
+        self.__iter_shared_traversals(context, object_list)):
+      if traversal is None:
+        result = predicate.apply_predicate(constraint, context, object_list)
+      else:
+        evaluate = functools.partial(
+            _apply_to_shared_traversal, context, object_list,
+            cardinality_pred, path_pred, traversal)
+        if memo is None:
+          result = evaluate()
+        else:
+          result = memo.apply(constraint, context, object_list,
+                              evaluate=evaluate)
+      if not result and getattr(result, 'truncated', False):
+        result = _apply_in_diagnostic_mode(context, constraint, object_list)
+      results.append(result)
+
+    return results
+
+  def __check_value_constraints(self, context, object_list):
+    """Determine if all the value constraints hold on the object list.
+
+    This is the same as evaluating them, but without the results.
+    It stops at the first constraint that does not hold.
+    """
+    traversals = {}
+    for constraint in self.__value_constraints:
+      cardinality_pred, path_pred = _split_constraint(constraint)
+      if path_pred is None:
+        valid = constraint.check(context, object_list)
+      else:
+        counter = functools.partial(
+            self.__count_values, context, object_list, path_pred, traversals)
+        if cardinality_pred is not None:
+          valid = cardinality_pred.check_count(context, counter)
+        else:
+          valid = counter(1) > 0
+      if not valid:
+        logging.getLogger(__name__).debug(
+            'Fast pass FAILED constraint=%s', constraint)
+        return False
+    return True
+
+  def __iter_shared_traversals(self, context, object_list):
+    """Generates the value constraints with their traversal of the objects.
+
+    Yields:
+      A tuple (constraint, cardinality_pred, path_pred, traversal) for each
+      value constraint in order. The cardinality_pred is the constraint if
+      it is a CardinalityPredicate. The path_pred is the PathPredicate that
+      the constraint applies (perhaps implicitly). The traversal is None if
+      the constraint must be called directly on the object list.
+    """
+    traversals = {}
+    for constraint in self.__value_constraints:
+      logging.getLogger(__name__).debug('Verifying constraint=%s',
+                                        constraint)
+      cardinality_pred, path_pred = _split_constraint(constraint)
+      if path_pred is None:
+        yield constraint, None, None, None
+        continue
+
+      yield (constraint, cardinality_pred, path_pred,
+             _get_shared_traversal(context, object_list, path_pred,
+                                   traversals))
+
+  def __count_values(self, context, object_list, path_pred, traversals,
+                     stop_at):
+    """Count the values satisfying path_pred for the fast pass.
+
+    Large observations are counted in parallel if there is a
+    parallel_evaluator that can count them, otherwise the count is made
+    from the traversal shared with other constraints on the same path.
+    """
+    if self.__parallel_evaluator is not None:
+      count = self.__parallel_evaluator.count(
+          path_pred, object_list, stop_at=stop_at)
+      if count is not None:
+        return count
+
+    traversal = _get_shared_traversal(context, object_list, path_pred,
+                                      traversals)
+    return path_pred.count_traversal(context, traversal, stop_at=stop_at)
+
+
+class _ValueStreamingCheck(ov.StreamingCheck):
+  """Counts the values found by each constraint until enough are found."""
+
+  def __init__(self, requirements):
+    """Constructor.
+
+    Args:
+      requirements: [list of (PathPredicate, int)] The number of values
+         that each PathPredicate must find.
+    """
+    self.__outstanding = [[path_pred, required]
+                          for path_pred, required in requirements]
+
+  def add_objects(self, context, objects):
+    """Implements StreamingCheck interface."""
+    if objects:
+      for entry in self.__outstanding:
+        path_pred, required = entry
+        entry[1] -= path_pred.count_traversal(
+            context, path_pred.traverse(context, objects), stop_at=required)
+      self.__outstanding = [entry for entry in self.__outstanding
+                            if entry[1] > 0]
+    return not self.__outstanding
+
+
+def _split_constraint(constraint):
+  """Determine the PathPredicate that a value constraint applies.
+
+  Returns:
+    A tuple (cardinality_pred, path_pred). The cardinality_pred is the
+    constraint if it is a CardinalityPredicate, otherwise None. The path_pred
+    is the PathPredicate that the constraint applies (perhaps implicitly),
+    or None if the constraint must be called directly on the object list.
+  """
+  cardinality_pred = None
+  if not isinstance(constraint, path_predicate.ProducesPathPredicateResult):
+    path_pred = path_predicate.PathPredicate('', constraint)
+  elif (isinstance(constraint, cardinality_predicate.CardinalityPredicate)
+        and not _overrides_call(
+            constraint, cardinality_predicate.CardinalityPredicate)):
+    cardinality_pred = constraint
+    path_pred = constraint.path_pred
+  else:
+    path_pred = constraint
+
+  if (not isinstance(path_pred, path_predicate.PathPredicate)
+      or _overrides_call(path_pred, path_predicate.PathPredicate)):
+    return None, None
+  return cardinality_pred, path_pred
+
+
+def _get_shared_traversal(context, object_list, path_pred, traversals):
+  """Returns the traversal of the objects by path_pred.
+
+  Args:
+    traversals: [dict] The traversals already made, keyed by traversal_key.
+       The traversal is added if it was not already there.
+  """
+  key = path_pred.traversal_key()
+  traversal = traversals.get(key)
+  if traversal is None:
+    traversal = path_pred.traverse(context, object_list)
+    traversals[key] = traversal
+  return traversal
+
+
+def _apply_to_shared_traversal(context, object_list,
+                               cardinality_pred, path_pred, traversal):
+  """Returns the result of a constraint from its shared traversal."""
+  stop_at = (None if cardinality_pred is None
+             else cardinality_pred.determine_stop_at(context))
+  result = path_pred.apply_to_traversal(context, traversal, stop_at=stop_at)
+  if cardinality_pred is not None:
+    result = cardinality_pred.evaluate_path_predicate_result(
+        context, object_list, result)
+  return result
+
+
+def _apply_in_diagnostic_mode(context, constraint, object_list):
+  """Re-apply a constraint that failed early to fully explain the failure."""
+  logging.getLogger(__name__).debug(
+      'Re-applying truncated failure in diagnostic mode: %s', constraint)
+  return predicate.perform_verification_pass(
+      context, functools.partial(constraint, context, object_list),
+      diagnostic_mode=True)
+
+
+def _overrides_call(obj, klass):
+  """Determine if obj specializes klass.__call__."""
+  return type(obj).__call__.__func__ is not klass.__call__.__func__
@@ -23,6 +23,7 @@ operations to see if their values are consistent with expectations.
 
 
 from .json_error import JsonError
+from .json_value_key import json_value_key
 
 # This module is intended to support the higher level json_predicate.* modules.
 # To that end, the lookups populate PredicateResult objects rather than just
@@ -36,9 +37,13 @@ from .path_value import (
 # to validate a a value. It is used to support the finder
 # module to specify how to determine the values we are trying to find.
 from .predicate import (
+    DIAGNOSTIC_MODE_CONTEXT_KEY,
+    PREDICATE_MEMO_CONTEXT_KEY,
     CloneableWithNewSource,
+    PredicateMemo,
     PredicateResult,
-    ValuePredicate)
+    ValuePredicate,
+    is_diagnostic_mode)
 
 from .sequenced_predicate_result import (
     SequencedPredicateResult,
@@ -48,6 +53,13 @@ from .keyed_predicate_result import (
     KeyedPredicateResult,
     KeyedPredicateResultBuilder)
 
+from .source_pool import (
+    RELEASED_SOURCE,
+    SourcePool,
+    SourceReference,
+    get_global_source_pool,
+    set_global_source_pool)
+
 from .path_result import (
     IndexBoundsError,
     MissingPathError,
@@ -63,7 +75,8 @@ from .path_predicate_result import (
 
 from .path_predicate import (
     DONT_ENUMERATE_TERMINAL,
-    PathPredicate)
+    PathPredicate,
+    PathTraversal)
 
 from .path_transforms import (
     FieldDifference)
@@ -137,3 +150,14 @@ from .cardinality_predicate import (
     FailedCardinalityRangeResult,
     MissingValueCardinalityResult,
     UnexpectedValueCardinalityResult)
+
+# The parallel_evaluator module counts predicate values across very large
+# observations using a pool of worker processes.
+from .parallel_evaluator import ParallelEvaluator
+
+# The filter_terms module finds the conditions of a predicate that can be
+# pushed down to services able to filter what they return.
+from .filter_terms import (
+    EqualityTerm,
+    find_equality_terms,
+    make_filter_expression)
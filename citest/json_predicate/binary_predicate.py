@@ -21,9 +21,12 @@ predicate to.
 """
 
 
+import collections
 import inspect
+import operator
 
 from . import predicate
+from .json_value_key import json_value_key
 from .keyed_predicate_result import KeyedPredicateResultBuilder
 from .map_predicate import MapPredicate
 from .path_value import PathValue
@@ -82,6 +85,9 @@ class BinaryPredicate(predicate.ValuePredicate):
 
   def eval_context_operand(self, context):
     """Determine the operand type for the given evaluation context."""
+    if self.__constant_operand:
+      # Already type-checked by the constructor.
+      return self.__operand
     operand = context.eval(self.__operand)
     if self.__operand_type and not isinstance(operand, self.__operand_type):
       raise TypeError(
@@ -102,6 +108,7 @@ class BinaryPredicate(predicate.ValuePredicate):
     self.__operand_type = kwargs.pop('operand_type', None)
     self.__name = name
     self.__operand = operand
+    self.__constant_operand = predicate.is_constant(operand)
     if self.__operand_type is not None and not callable(self.__operand):
       if not isinstance(self.__operand, self.__operand_type):
         raise TypeError(
@@ -120,6 +127,11 @@ class BinaryPredicate(predicate.ValuePredicate):
     snapshot.edge_builder.make(entity, 'Name', self.__name)
     snapshot.edge_builder.make_control(entity, 'Operand', self.__operand)
 
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (self.__class__, self.__name,
+            predicate.structural_key(self.__operand), self.__operand_type)
+
 
 class StandardBinaryPredicateFactory(object):
   """Create a StandardBinaryPredicate once we have an operand to bind to it."""
@@ -137,6 +149,8 @@ class StandardBinaryPredicateFactory(object):
       name: Name of the comparison_op
       comparison_op: Callable that takes (value, operand) and returns bool.
       operand_type: Class expected for operands, or None to not enforce.
+      column_op: The name of the json_predicate.columnar operation that is
+         equivalent to comparison_op, if any.
     """
     self.__name = name
     self.__comparison_op = comparison_op
@@ -150,6 +164,11 @@ class StandardBinaryPredicateFactory(object):
 class StandardBinaryPredicate(BinaryPredicate):
   """A BinaryPredicate using a bool predicate bound at construction."""
 
+  @property
+  def column_op(self):
+    """The name of the equivalent json_predicate.columnar operation, if any."""
+    return self.__column_op
+
   def __init__(self, name, comparison_op, operand, **kwargs):
     """Constructor.
 
@@ -157,9 +176,12 @@ class StandardBinaryPredicate(BinaryPredicate):
       name: Name of predicate
       comparison_op: Implements bool predicate
       operand: Value to bind to predicate.
+      column_op: The name of the json_predicate.columnar operation that is
+         equivalent to comparison_op, if any.
 
       See base class (BinaryPredicate) for additional kwargs.
     """
+    self.__column_op = kwargs.pop('column_op', None)
     super(StandardBinaryPredicate, self).__init__(name, operand, **kwargs)
     self.__comparison_op = comparison_op
 
@@ -168,10 +190,43 @@ class StandardBinaryPredicate(BinaryPredicate):
     if self.operand_type and not isinstance(value, self.operand_type):
       return TypeMismatchError(self.operand_type, value.__class__, value)
 
-    valid = self.__comparison_op(value, operand)
+    return self.make_result(value, self.__comparison_op(value, operand))
+
+  def make_result(self, value, valid):
+    """Returns the result of calling this predicate on a value.
+
+    Args:
+      value: [any] The value of the operand_type the predicate was applied to.
+      valid: [bool] Whether the comparison_op held on the value.
+    """
     return PathValueResult(pred=self, source=value, target_path='',
                            path_value=PathValue('', value), valid=valid)
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    comparison_op = self.__comparison_op
+    operand_type = self.operand_type
+    if not predicate.is_constant(self.operand):
+      def plan(context, value):
+        """Checks value against the operand evaluated in the context."""
+        operand = self.eval_context_operand(context)
+        if operand_type and not isinstance(value, operand_type):
+          return False
+        return bool(comparison_op(value, operand))
+      return plan
+
+    # The constructor already checked the operand type.
+    operand = self.operand
+    if not operand_type:
+      return lambda context, value: bool(comparison_op(value, operand))
+    return lambda context, value: (isinstance(value, operand_type)
+                                   and bool(comparison_op(value, operand)))
+
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (super(StandardBinaryPredicate, self)._make_structural_key()
+            + (self.__comparison_op,))
+
 
 class DictMatchesPredicate(BinaryPredicate):
   """Implements binary predicate comparison predicates against dict values.
@@ -209,6 +264,11 @@ class DictMatchesPredicate(BinaryPredicate):
     return (super(DictMatchesPredicate, self).__eq__(obj)
             and self.__strict == obj.strict)
 
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (super(DictMatchesPredicate, self)._make_structural_key()
+            + (self.__strict,))
+
   def __call__(self, context, value):
     """Implements Predicate interface.
 
@@ -240,6 +300,25 @@ class DictMatchesPredicate(BinaryPredicate):
 
     return match_result_builder.build(valid)
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    path_plans = [PathPredicate(key, pred, source_pred=pred,
+                                enumerate_terminals=False).compile()
+                  for key, pred in self.operand.items()]
+    strict = self.__strict
+
+    def plan(context, value):
+      """Checks each of the fields in value."""
+      if not isinstance(value, dict):
+        return False
+      for path_plan in path_plans:
+        if not path_plan(context, value):
+          return False
+      return not (strict
+                  and self._find_unexpected_path_errors(context, value))
+
+    return plan
+
   def _find_unexpected_path_errors(self, context, source):
     """Check value keys for unexpected ones.
 
@@ -264,8 +343,10 @@ class ListMatchesPredicate(BinaryPredicate):
 
   Each element of the operand is a predicate that validates each element in the
   called value list. If the predicate is strict, then each value must match a
-  predicate in the operand. If the predicate is unique then each value must only
-  match one predicate.
+  predicate in the operand. If the predicate is unique then each predicate
+  must be assigned a different value that it accepts, so each element may
+  satisfy at most one predicate in the assignment. Elements may still
+  satisfy several predicates, so long as such an assignment exists.
   """
 
   @property
@@ -275,7 +356,12 @@ class ListMatchesPredicate(BinaryPredicate):
 
   @property
   def unique(self):
-    """Whether a given element complies with at most one (True) predicates."""
+    """Whether each element may satisfy at most one predicate (True) or not.
+
+    This only limits the assignment of elements to predicates. An element
+    can satisfy other predicates so long as each predicate can be assigned
+    a different element.
+    """
     return self.__unique
 
   def __init__(self, operand, **kwargs):
@@ -292,6 +378,11 @@ class ListMatchesPredicate(BinaryPredicate):
             and self.__unique == obj.unique
             and self.__strict == obj.strict)
 
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (super(ListMatchesPredicate, self)._make_structural_key()
+            + (self.__strict, self.__unique))
+
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     entity.add_metadata('strict', self.__strict)
@@ -311,22 +402,32 @@ class ListMatchesPredicate(BinaryPredicate):
     if not isinstance(value, list):
       return TypeMismatchError(list, value.__class__, value)
 
-    if self.__unique:
-      max_count = 1
-    else:
-      max_count = None
-
     match_result_builder = SequencedPredicateResultBuilder(self)
     valid = True
     matched_element_count = [0] * len(value)
+    accepted_indexes = []
     # pylint: disable=redefined-variable-type
     for match_pred in self.operand:
-      pred_result = MapPredicate(match_pred, max=max_count)(context, value)
+      pred_result = MapPredicate(match_pred)(context, value)
       match_result_builder.append_result(pred_result)
       if not pred_result:
         valid = False
-      for index in range(len(value)):
-        matched_element_count[index] += 1 if pred_result.results[index] else 0
+      accepted = [index for index in range(len(value))
+                  if pred_result.results[index]]
+      for index in accepted:
+        matched_element_count[index] += 1
+      accepted_indexes.append(accepted)
+
+    if self.__unique and valid:
+      unassigned = _find_unassigned(accepted_indexes)
+      if unassigned:
+        valid = False
+        match_result_builder.extend_results(
+            [predicate.PredicateResult(
+                valid=False,
+                comment='No value is left to uniquely match {0}'.format(
+                    self.operand[pred_index]))
+             for pred_index in unassigned])
 
     if self.strict:
       # Only consider and add strictness result if it fails
@@ -358,6 +459,61 @@ class ListMatchesPredicate(BinaryPredicate):
                                 path_value=PathValue(path, source[index])))
     return errors
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    plans = [pred.compile() for pred in self.operand]
+    strict = self.__strict
+    unique = self.__unique
+
+    def plan(context, value):
+      """Checks the elements of value against each of the predicates."""
+      if not isinstance(value, list):
+        return False
+      accepted_indexes = [
+          [index for index, elem in enumerate(value) if pred_plan(context, elem)]
+          for pred_plan in plans]
+      if not all(accepted_indexes):
+        return False
+      if unique and _find_unassigned(accepted_indexes):
+        return False
+      if strict:
+        matched = set()
+        for accepted in accepted_indexes:
+          matched.update(accepted)
+        return len(matched) == len(value)
+      return True
+
+    return plan
+
+
+def _find_unassigned(accepted_indexes):
+  """Assign each predicate a different value that it accepts.
+
+  This finds a maximum bipartite matching using augmenting paths.
+
+  Args:
+    accepted_indexes: [list of list of int] The indexes of the values that
+       each predicate accepts.
+
+  Returns:
+    The indexes of the predicates that could not be assigned a value.
+  """
+  owner = {}  # The predicate index assigned to each value index.
+
+  def assign(pred_index, visited):
+    """Assign a value to the predicate, reassigning others if needed."""
+    for value_index in accepted_indexes[pred_index]:
+      if value_index in visited:
+        continue
+      visited.add(value_index)
+      if value_index not in owner or assign(owner[value_index], visited):
+        owner[value_index] = pred_index
+        return True
+    return False
+
+  return [pred_index for pred_index in range(len(accepted_indexes))
+          if not assign(pred_index, set())]
+
 class DictSubsetPredicate(BinaryPredicate):
   """Implements binary predicate comparison predicates against dict values."""
 
@@ -462,12 +618,17 @@ class _BaseListMembershipPredicate(BinaryPredicate):
     self.__strict = kwargs.pop('strict', False)
     super(_BaseListMembershipPredicate, self).__init__(name, operand, **kwargs)
 
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (super(_BaseListMembershipPredicate, self)._make_structural_key()
+            + (self.__strict,))
+
   def _verify_elem(self, context, elem, the_list):
     """Verify if |elem| is in |the_list|
 
     Args:
       elem [object]: The value to test.
-      the_list [list]: The list of objects to test against.
+      the_list [_ListMembershipIndex]: The list of objects to test against.
 
     Returns:
       True if the value is a member of the list or strict checking is disabled
@@ -475,27 +636,88 @@ class _BaseListMembershipPredicate(BinaryPredicate):
       False otherwise.
     """
     if self.__strict or isinstance(elem, (int, long, float, basestring)):
-      return elem in context.eval(the_list)
-
-    if self.__strict:
-      return False
+      return the_list.contains(elem)
 
     pred = None
     if isinstance(elem, list):
       pred = LIST_SUBSET(elem)
+      candidates = the_list.list_members()
     elif isinstance(elem, dict):
       # pylint: disable=redefined-variable-type
       pred = DICT_SUBSET(elem)
+      candidates = the_list.dict_members_with_keys(elem.keys())
     else:
       raise TypeError('Unhandled type {0}'.format(elem.__class__))
 
-    for value in the_list:
+    for value in candidates:
       if pred(context, value):
         return True
 
     return False
 
 
+class _ListMembershipIndex(object):
+  """Indexes the values in a list so members can be found without a scan.
+
+  Each kind of index is built the first time it is needed.
+  """
+
+  def __init__(self, the_list):
+    """Constructor.
+
+    Args:
+      the_list: [list] The list of values to index.
+    """
+    self.__list = the_list
+    self.__keys = None
+    self.__unkeyable = None
+    self.__dicts_by_keyset = None
+    self.__lists = None
+
+  def contains(self, elem):
+    """Determine if |elem| is equal to a value in the list."""
+    if not isinstance(self.__list, list):
+      return elem in self.__list
+
+    if self.__keys is None:
+      self.__keys = set()
+      self.__unkeyable = []
+      for value in self.__list:
+        try:
+          self.__keys.add(json_value_key(value))
+        except TypeError:
+          self.__unkeyable.append(value)
+
+    try:
+      if json_value_key(elem) in self.__keys:
+        return True
+    except TypeError:
+      return elem in self.__list
+    return elem in self.__unkeyable
+
+  def dict_members_with_keys(self, keys):
+    """Returns the dict values in the list that have at least |keys|."""
+    if self.__dicts_by_keyset is None:
+      self.__dicts_by_keyset = {}
+      for value in self.__list:
+        if isinstance(value, dict):
+          self.__dicts_by_keyset.setdefault(
+              frozenset(value.keys()), []).append(value)
+
+    keys = frozenset(keys)
+    return [value
+            for keyset, values in self.__dicts_by_keyset.items()
+            if keys <= keyset
+            for value in values]
+
+  def list_members(self):
+    """Returns the list values in the list."""
+    if self.__lists is None:
+      self.__lists = [value for value in self.__list
+                      if isinstance(value, list)]
+    return self.__lists
+
+
 class ListSubsetPredicate(_BaseListMembershipPredicate):
   """Implements binary predicate comparison predicate for list subsets."""
 
@@ -510,8 +732,9 @@ class ListSubsetPredicate(_BaseListMembershipPredicate):
     if not isinstance(value, list):
       return TypeMismatchError(list, value.__class__, value)
 
+    the_list = _ListMembershipIndex(context.eval(value))
     for elem in self.eval_context_operand(context):
-      if not self._verify_elem(context, elem, the_list=value):
+      if not self._verify_elem(context, elem, the_list=the_list):
         return PathValueResult(pred=self, valid=False,
                                path_value=PathValue('', value),
                                source=value, target_path='')
@@ -530,7 +753,9 @@ class ListMembershipPredicate(_BaseListMembershipPredicate):
 
   def __call__(self, context, value):
     """Determine if |operand| is a member of |value|."""
-    valid = self._verify_elem(context, self.operand, the_list=value)
+    valid = self._verify_elem(context, self.operand,
+                              the_list=_ListMembershipIndex(
+                                  context.eval(value)))
     return PathValueResult(
         pred=self, valid=valid, source=value, target_path='',
         path_value=PathValue('', value))
@@ -557,7 +782,7 @@ class ContainsPredicate(BinaryPredicate):
       return STR_SUBSTR(self.operand)(context, value)
     if isinstance(value, dict):
       return DICT_SUBSET(self.operand)(context, value)
-    if isinstance(value, int or long or float):
+    if isinstance(value, (int, long, float)):
       return NUM_EQ(self.operand)(context, value)
     if not isinstance(value, list):
       raise NotImplementedError(
@@ -580,6 +805,36 @@ class ContainsPredicate(BinaryPredicate):
                            source=value, target_path='',
                            path_value=PathValue('', bad_values))
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    operand = self.operand
+    typed_plans = {}
+
+    def typed_plan(value_type, factory):
+      """Returns the plan for values of value_type, compiling it if needed."""
+      result = typed_plans.get(value_type)
+      if result is None:
+        result = factory(operand).compile()
+        typed_plans[value_type] = result
+      return result
+
+    def plan(context, value):
+      """Checks value using the interpretation for its type."""
+      if isinstance(value, basestring):
+        return typed_plan(basestring, STR_SUBSTR)(context, value)
+      if isinstance(value, dict):
+        return typed_plan(dict, DICT_SUBSET)(context, value)
+      if isinstance(value, (int, long, float)):
+        return typed_plan(int, NUM_EQ)(context, value)
+      if not isinstance(value, list):
+        raise NotImplementedError(
+            'Unhandled value class {0}'.format(value.__class__))
+      if isinstance(operand, list):
+        return typed_plan(list, LIST_SUBSET)(context, value)
+      return any(plan(context, elem) for elem in value)
+
+    return plan
+
 
 class EquivalentPredicate(BinaryPredicate):
   """Specifies a predicate that expects the value and operand are "equal".
@@ -622,12 +877,21 @@ class EquivalentPredicate(BinaryPredicate):
       return self.__check_operand_and_call(context, dict, value, DICT_EQ)
     if isinstance(value, list):
       return self.__check_operand_and_call(context, list, value, LIST_SIMILAR)
-    if isinstance(value, int or long or float):
+    if isinstance(value, (int, long, float)):
       return self.__check_operand_and_call(context, (int, long, float),
                                            value, NUM_EQ)
     raise NotImplementedError(
         'Unhandled value class {0}'.format(value.__class__))
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    return _compile_type_dispatch(
+        self.operand,
+        [(basestring, basestring, STR_EQ),
+         (dict, dict, DICT_EQ),
+         (list, list, LIST_SIMILAR),
+         ((int, long, float), (int, long, float), NUM_EQ)])
+
 
 class DifferentPredicate(BinaryPredicate):
   """Specifies a predicate that expects the value and operand are not "equal".
@@ -671,40 +935,106 @@ class DifferentPredicate(BinaryPredicate):
       return self.__check_operand_and_call(context, dict, value, DICT_NE)
     if isinstance(value, list):
       return self.__check_operand_and_call(context, list, value, LIST_NE)
-    if isinstance(value, int or long or float):
+    if isinstance(value, (int, long, float)):
       return self.__check_operand_and_call(
           context, (int, long, float), value, NUM_NE)
     raise NotImplementedError(
         'Unhandled value class {0}'.format(value.__class__))
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    return _compile_type_dispatch(
+        self.operand,
+        [(basestring, basestring, STR_NE),
+         (dict, dict, DICT_NE),
+         (list, list, LIST_NE),
+         ((int, long, float), (int, long, float), NUM_NE)])
+
+
+def _compile_type_dispatch(operand, dispatch):
+  """Compiles a plan checking values with a predicate chosen by their type.
+
+  Args:
+    operand: [any] The operand to bind into the chosen predicate.
+    dispatch: [list of (value_type, operand_type, factory)] The predicate
+       factory is bound to the operand for values of value_type. If the
+       operand is not an operand_type then the value is not valid.
+       The first matching value_type is used.
+
+  Returns:
+    A callable(context, value) returning True if the value is valid.
+  """
+  constant = predicate.is_constant(operand)
+  typed_plans = {}
+
+  def plan(context, value):
+    """Checks value using the predicate for its type."""
+    for value_type, operand_type, factory in dispatch:
+      if isinstance(value, value_type):
+        break
+    else:
+      raise NotImplementedError(
+          'Unhandled value class {0}'.format(value.__class__))
+
+    if not constant:
+      bound_operand = context.eval(operand)
+      return (isinstance(bound_operand, operand_type)
+              and factory(bound_operand).check(context, value))
+
+    typed_plan = typed_plans.get(value_type)
+    if typed_plan is None:
+      if isinstance(operand, operand_type):
+        typed_plan = factory(operand).compile()
+      else:
+        typed_plan = lambda context, value: False
+      typed_plans[value_type] = typed_plan
+    return typed_plan(context, value)
+
+  return plan
+
+
+# The comparison operations are module-level functions rather than lambdas
+# so that the predicates can be pickled (e.g. by ParallelEvaluator).
+def _has_substring(a, b):
+  """Determine if string a contains string b."""
+  # pylint: disable=invalid-name
+  return a.find(b) >= 0
+
 
 NUM_LE = StandardBinaryPredicateFactory(
-    '<=', lambda a, b: a <= b, operand_type=(int, long, float))
+    '<=', operator.le, operand_type=(int, long, float),
+    column_op='le')
 NUM_GE = StandardBinaryPredicateFactory(
-    '>=', lambda a, b: a >= b, operand_type=(int, long, float))
+    '>=', operator.ge, operand_type=(int, long, float),
+    column_op='ge')
 NUM_EQ = StandardBinaryPredicateFactory(
-    '==', lambda a, b: a == b, operand_type=(int, long, float))
+    '==', operator.eq, operand_type=(int, long, float),
+    column_op='eq')
 NUM_NE = StandardBinaryPredicateFactory(
-    '!=', lambda a, b: a != b, operand_type=(int, long, float))
+    '!=', operator.ne, operand_type=(int, long, float),
+    column_op='ne')
 
 STR_SUBSTR = StandardBinaryPredicateFactory(
-    'has-substring', lambda a, b: a.find(b) >= 0, operand_type=basestring)
+    'has-substring', _has_substring, operand_type=basestring,
+    column_op='substr')
 STR_EQ = StandardBinaryPredicateFactory(
-    '==', lambda a, b: a == b, operand_type=basestring)
+    '==', operator.eq, operand_type=basestring,
+    column_op='eq')
 STR_NE = StandardBinaryPredicateFactory(
-    '!=', lambda a, b: a != b, operand_type=basestring)
+    '!=', operator.ne, operand_type=basestring,
+    column_op='ne')
 
 DICT_EQ = StandardBinaryPredicateFactory(
-    '==', lambda a, b: a == b, operand_type=dict)
+    '==', operator.eq, operand_type=dict)
 DICT_NE = StandardBinaryPredicateFactory(
-    '!=', lambda a, b: a != b, operand_type=dict)
+    '!=', operator.ne, operand_type=dict)
 DICT_SUBSET = DictSubsetPredicate
 DICT_MATCHES = DictMatchesPredicate
 
 LIST_EQ = StandardBinaryPredicateFactory(
-    '==', lambda a, b: a == b, operand_type=list)
+    '==', operator.eq, operand_type=list)
 LIST_NE = StandardBinaryPredicateFactory(
-    '!=', lambda a, b: a != b, operand_type=list)
+    '!=', operator.ne, operand_type=list)
 LIST_MATCHES = ListMatchesPredicate
 
 def lists_equivalent(a, b):
@@ -712,6 +1042,12 @@ def lists_equivalent(a, b):
   # pylint: disable=invalid-name
   if len(a) != len(b):
     return False
+  try:
+    return (collections.Counter(json_value_key(value) for value in a)
+            == collections.Counter(json_value_key(value) for value in b))
+  except TypeError:
+    pass
+
   sorted_a = sorted(a)
   sorted_b = sorted(b)
   for index, value in enumerate(sorted_a):
@@ -720,7 +1056,7 @@ def lists_equivalent(a, b):
   return True
 
 LIST_SIMILAR = StandardBinaryPredicateFactory(
-    '~=', lambda a, b: lists_equivalent(a, b), operand_type=list)
+    '~=', lists_equivalent, operand_type=list)
 LIST_MEMBER = (lambda operand, strict=False:
                ListMembershipPredicate(operand, strict=strict))
 LIST_SUBSET = (lambda operand, strict=False:
@@ -68,6 +68,14 @@ class CardinalityResult(predicate.PredicateResult, HasPathPredicateResult):
     """The source value (collection) that we are mapping the predicateover."""
     return self.__collect_values_result.source
 
+  @property
+  def truncated(self):
+    """Whether counting stopped once the outcome was decided.
+
+    If so then the count is only a lower bound.
+    """
+    return self.__collect_values_result.truncated
+
   def __init__(self, cardinality_pred, path_pred_result, **kwargs):
     """Constructor.
 
@@ -106,6 +114,8 @@ class CardinalityResult(predicate.PredicateResult, HasPathPredicateResult):
     result_relation = builder.determine_valid_relation(
         self.__collect_values_result)
     builder.make(entity, 'Count', self.count, relation=count_relation)
+    if self.truncated:
+      builder.make(entity, 'Truncated', True)
     builder.make_mechanism(entity, 'Predicate', self.__cardinality_pred)
     builder.make_input(entity, 'Source',
                        self.__collect_values_result.source, format='json')
@@ -197,6 +207,7 @@ class CardinalityPredicate(predicate.ValuePredicate,
     pred: jc.ValuePredicate to apply is implictly wrapped in a MapPredicate.
     min: Minimum number of expected object matches we expect.
     max: Maximum number of expected object matches we allow. < 0 indicates any.
+    early_exit: Whether to stop counting once the outcome is decided.
   """
   @property
   def path_pred(self):
@@ -218,12 +229,19 @@ class CardinalityPredicate(predicate.ValuePredicate,
     """The maximum desired cardinality, or None for no upper bound."""
     return self.__max
 
+  @property
+  def early_exit(self):
+    """Whether to stop counting values once the outcome is decided."""
+    return self.__early_exit
+
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     snapshot.edge_builder.make_mechanism(entity, 'Predicate', self.path_pred)
     snapshot.edge_builder.make_control(entity, 'Min', self.__min)
     snapshot.edge_builder.make_control(entity, 'Max',
                                        'Any' if self.__max < 0 else self.__max)
+    if self.__early_exit:
+      snapshot.edge_builder.make_control(entity, 'Early Exit', True)
 
   def __init__(self, pred, min=0, max=None, **kwargs):
     """Constructor.
@@ -232,7 +250,13 @@ class CardinalityPredicate(predicate.ValuePredicate,
       pred: The jc.ValuePredicate to apply.
       min: The minimum number of path values we expect to find when applied.
       max: The maximum number of path values we expect to find when applied.
+      early_exit: If True then stop applying the predicate to path values
+         once enough are found to decide the outcome (e.g. the first value
+         found when max is 0). The result is then marked truncated and only
+         explains the values considered. This is ignored in diagnostic mode
+         (see is_diagnostic_mode).
     """
+    self.__early_exit = kwargs.pop('early_exit', False)
     super(CardinalityPredicate, self).__init__(**kwargs)
     if not isinstance(pred, predicate.ValuePredicate):
       raise TypeError(
@@ -240,6 +264,10 @@ class CardinalityPredicate(predicate.ValuePredicate,
 
     self.__min = min
     self.__max = max
+    self.__constant_bounds = (
+        (min, max)
+        if predicate.is_constant(min) and predicate.is_constant(max)
+        else None)
     if isinstance(pred, pp.PathPredicate):
       self.__path_pred = pred
     else:
@@ -249,6 +277,7 @@ class CardinalityPredicate(predicate.ValuePredicate,
     return (self.__class__ == pred.__class__
             and self.__min == pred.min
             and self.__max == pred.max
+            and self.__early_exit == pred.early_exit
             and self.__path_pred == pred.path_pred)
 
   def __str__(self):
@@ -264,7 +293,106 @@ class CardinalityPredicate(predicate.ValuePredicate,
     Returns:
       PredicateResponse
     """
-    collected_result = self.__path_pred(context, obj)
+    stop_at = self.determine_stop_at(context)
+    if stop_at is None:
+      collected_result = predicate.apply_predicate(
+          self.__path_pred, context, obj)
+    else:
+      collected_result = self.__path_pred.apply_to_traversal(
+          context, self.__path_pred.traverse(context, obj), stop_at=stop_at)
+    return self.evaluate_path_predicate_result(context, obj, collected_result)
+
+  def determine_stop_at(self, context):
+    """Determine how many path values decide the outcome, if early exit.
+
+    Args:
+      context: [ExecutionContext] The context to evaluate the bounds in.
+
+    Returns:
+      The number of values after which the outcome cannot change, or None
+      if every value should be considered.
+    """
+    if not self.__early_exit or predicate.is_diagnostic_mode(context):
+      return None
+    the_min, the_max = self.__eval_bounds(context)
+    return predicate.early_exit_stop_at(the_min, the_max)
+
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    path_pred = self.__path_pred
+    return lambda context, obj: self.check_traversal(
+        context, path_pred.traverse(context, obj))
+
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (self.__class__, predicate.structural_key(self.__path_pred),
+            predicate.structural_key(self.__min),
+            predicate.structural_key(self.__max), self.__early_exit)
+
+  def check_traversal(self, context, traversal):
+    """Determine if the cardinality of values in a traversal is acceptable.
+
+    Args:
+      context: [ExecutionContext] The context to evaluate the bounds in.
+      traversal: [PathTraversal] The result of traversing the object with
+         this predicate's path_pred (or one with the same traversal_key).
+
+    Returns:
+      True if this predicate holds on the traversed object, False if not.
+    """
+    path_pred = self.__path_pred
+    return self.check_count(
+        context,
+        lambda stop_at: path_pred.count_traversal(
+            context, traversal, stop_at=stop_at))
+
+  def check_count(self, context, counter):
+    """Determine if the number of values counted is acceptable.
+
+    Args:
+      context: [ExecutionContext] The context to evaluate the bounds in.
+      counter: [callable] Given a stop_at int (or None), returns the number
+         of values satisfying this predicate's path_pred, stopping once
+         stop_at have been found.
+
+    Returns:
+      True if this predicate holds on the counted values, False if not.
+    """
+    the_min, the_max = self.__eval_bounds(context)
+    stop_at = None if the_max is None else the_max + 1
+    return self.__count_is_valid(the_min, the_max, counter(stop_at))
+
+  def __eval_bounds(self, context):
+    """Returns the (min, max) bounds within the context."""
+    bounds = self.__constant_bounds
+    if bounds is None:
+      bounds = (context.eval(self.__min), context.eval(self.__max))
+    return bounds
+
+  @staticmethod
+  def __count_is_valid(the_min, the_max, count):
+    """Determine whether count is acceptable."""
+    if not count:
+      return the_max == 0
+    if the_max == 0:
+      return False
+    return count >= the_min and (the_max is None or count <= the_max)
+
+  def evaluate_path_predicate_result(self, context, obj, collected_result):
+    """Determine the result given the values collected from the object.
+
+    This permits the values to be collected independently, such as when
+    sharing a traversal of the object among multiple predicates.
+
+    Args:
+      context: [ExecutionContext] The context to evaluate the bounds in.
+      obj: [obj] The JSON object the values were collected from.
+      collected_result: [PathPredicateResult] The result of applying
+         this predicate's path_pred to the object.
+
+    Returns:
+      PredicateResponse
+    """
     count = len(collected_result.path_values)
 
     the_max = context.eval(self.__max)
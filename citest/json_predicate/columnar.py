@@ -0,0 +1,130 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Evaluates simple predicates over a whole column of values at once.
+
+When a PathPredicate reaches many values (e.g. a field of every instance
+in a large listing) and its filter is a simple comparison against a
+constant, the comparison is applied to the column of values as a batch
+rather than by calling the predicate on each value individually. NumPy is
+used for numeric columns if it is installed.
+
+Predicates opt in by having a column_op attribute naming one of the
+operations here and a make_result(value, valid) method producing the same
+result that calling the predicate on the value would.
+"""
+
+
+import operator
+
+from .predicate import is_constant
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+
+# Columns with fewer values than this are evaluated value by value.
+MIN_COLUMN_SIZE = 256
+
+# The largest integer that is exactly representable as a float.
+_MAX_EXACT_FLOAT_INT = 2 ** 53
+
+_COLUMN_OPS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'le': operator.le,
+    'ge': operator.ge,
+    'substr': lambda value, operand: operand in value
+}
+
+# The operations that can be applied to numpy arrays.
+_NUMPY_COLUMN_OPS = frozenset(['eq', 'ne', 'le', 'ge'])
+
+
+def evaluate_column(pred, column):
+  """Determine whether a predicate holds on each value in a column.
+
+  Args:
+    pred: [ValuePredicate] The predicate to evaluate.
+    column: [list] The values to evaluate the predicate on.
+
+  Returns:
+    A sequence of bool parallel to the column, or None if the predicate
+    cannot be evaluated on this column as a whole. That is the case for
+    short columns, predicates without a column_op, operands that depend on
+    the context, and values that are not all of the predicate's operand_type.
+  """
+  column_op = getattr(pred, 'column_op', None)
+  if (len(column) < MIN_COLUMN_SIZE
+      or column_op not in _COLUMN_OPS
+      or not is_constant(pred.operand)):
+    return None
+
+  operand = pred.operand
+  operand_type = pred.operand_type
+  if operand_type and not all(isinstance(value, operand_type)
+                              for value in column):
+    return None
+
+  if column_op in _NUMPY_COLUMN_OPS:
+    array = _to_numeric_array(column, operand)
+    if array is not None:
+      return _COLUMN_OPS[column_op](array, operand)
+
+  op = _COLUMN_OPS[column_op]
+  return [op(value, operand) for value in column]
+
+
+def count_true(mask):
+  """Returns the number of values in a mask from evaluate_column that hold."""
+  if numpy is not None and isinstance(mask, numpy.ndarray):
+    return int(numpy.count_nonzero(mask))
+  return sum(1 for valid in mask if valid)
+
+
+def _to_numeric_array(column, operand):
+  """Returns the column as a numpy array if it compares exactly.
+
+  Comparisons on the array must give the same answer as comparing the
+  original values, so this is only the case when all the values have the
+  same numeric type and the operand can be compared without losing precision.
+
+  Returns:
+    A numpy array or None.
+  """
+  if numpy is None:
+    return None
+
+  value_type = type(column[0])
+  if value_type not in (int, float):
+    return None
+  if any(type(value) is not value_type for value in column):
+    return None
+
+  if value_type is int and type(operand) is not int:
+    return None
+  if value_type is float and not (
+      type(operand) is float
+      or (isinstance(operand, (int, long))
+          and abs(operand) <= _MAX_EXACT_FLOAT_INT)):
+    return None
+
+  try:
+    return numpy.array(column, dtype=numpy.int64 if value_type is int
+                       else numpy.float64)
+  except OverflowError:
+    return None
@@ -0,0 +1,127 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Finds the simple conditions a predicate requires so others can apply them.
+
+Observers filter the objects they collect with a predicate. Many backends
+can filter what they return themselves (e.g. the filter parameter of GCP
+list methods) so there is no need to transfer objects that the predicate
+is going to reject anyway.
+
+The EqualityTerms of a predicate are conditions that every value the
+predicate accepts must satisfy. Filtering by them is therefore safe: it
+can only remove values the predicate would reject. The predicate itself
+should still be applied to what remains, since a predicate typically
+requires more than its terms.
+"""
+
+
+import collections
+import json
+import re
+
+from .binary_predicate import (
+    DictMatchesPredicate,
+    EquivalentPredicate,
+    StandardBinaryPredicate)
+from .logic_predicate import ConjunctivePredicate
+from .path_predicate import PathPredicate
+from .predicate import is_constant
+
+
+# A condition that the value at a path equals a scalar.
+#   fields: [list of string] The names of the fields along the path.
+#   value: [string, int, float or bool] The value that the field must equal.
+EqualityTerm = collections.namedtuple('EqualityTerm', ['fields', 'value'])
+
+# The field names that make_filter_expression can refer to.
+_FILTER_FIELD_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def find_equality_terms(pred):
+  """Determine the field equalities that a predicate requires.
+
+  Only the conjuncts of the predicate that are field equalities against a
+  constant are recognized. Anything else (disjunctions, negations, other
+  comparisons, transformed values) contributes no terms.
+
+  Args:
+    pred: [ValuePredicate] The predicate to analyze, or None.
+
+  Returns:
+    A list of EqualityTerm that every value accepted by pred satisfies.
+    This may be empty.
+  """
+  terms = []
+  if pred is not None:
+    _add_terms(pred, [], terms)
+  return terms
+
+
+def make_filter_expression(pred, format_term):
+  """Translate the equality terms of a predicate into a filter expression.
+
+  Terms whose field names are not simple identifiers are skipped.
+
+  Args:
+    pred: [ValuePredicate] The predicate that observed objects must satisfy.
+    format_term: [callable(string, string)] Formats the condition that the
+       field (the dot-separated field names) equals the JSON encoded value.
+
+  Returns:
+    The formatted terms joined with ' AND ', which accepts every object
+    that pred accepts, or None if pred has no terms that can be expressed.
+  """
+  clauses = []
+  for term in find_equality_terms(pred):
+    if not all(_FILTER_FIELD_RE.match(name) for name in term.fields):
+      continue
+    clauses.append(format_term('.'.join(term.fields),
+                               json.JSONEncoder().encode(term.value)))
+  return ' AND '.join(clauses) or None
+
+
+def _add_terms(pred, fields, terms):
+  """Adds the terms of a predicate on the value at fields to terms."""
+  if isinstance(pred, ConjunctivePredicate):
+    for conjunct in pred.predicates:
+      _add_terms(conjunct, fields, terms)
+    return
+
+  if type(pred).__call__.__func__ is PathPredicate.__call__.__func__:
+    path_fields = pred.field_names()
+    if path_fields is not None and pred.transform is None and pred.pred:
+      _add_terms(pred.pred, fields + path_fields, terms)
+    return
+
+  if isinstance(pred, DictMatchesPredicate):
+    for key, value_pred in pred.operand.items():
+      _add_terms(value_pred, fields + [key], terms)
+    return
+
+  if fields and _is_equality(pred):
+    terms.append(EqualityTerm(fields, pred.operand))
+
+
+def _is_equality(pred):
+  """Determine if pred compares values for equality with a scalar constant."""
+  if isinstance(pred, StandardBinaryPredicate):
+    if pred.name != '==':
+      return False
+  elif type(pred) is not EquivalentPredicate:
+    return False
+  operand = pred.operand
+  return (is_constant(operand)
+          and isinstance(operand, (basestring, bool, int, long, float)))
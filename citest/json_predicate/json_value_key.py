@@ -0,0 +1,57 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Provides hashable keys for JSON values so they can be indexed.
+
+JSON values are typically dicts and lists, which are not hashable. A key
+is an immutable equivalent of the value where values that compare equal
+have equal keys. This permits hash-based lookups rather than comparing
+against every value.
+"""
+
+
+class _DictKeyMarker(object):
+  """Distinguishes keys for dictionaries from keys for lists."""
+  # pylint: disable=too-few-public-methods
+  pass
+
+
+class _ListKeyMarker(object):
+  """Distinguishes keys for lists from keys for dictionaries."""
+  # pylint: disable=too-few-public-methods
+  pass
+
+
+def json_value_key(value):
+  """Returns a hashable key for a JSON value.
+
+  Args:
+    value: [any] The JSON value. Dictionaries and lists may be nested.
+
+  Raises:
+    TypeError if the value contains something that is not hashable.
+
+  Returns:
+    A hashable value that is equal to the key of any value equal to this one.
+  """
+  if isinstance(value, dict):
+    return (_DictKeyMarker,
+            tuple(sorted([(key, json_value_key(elem))
+                          for key, elem in value.items()],
+                         key=lambda entry: entry[0])))
+  if isinstance(value, list):
+    return (_ListKeyMarker, tuple([json_value_key(elem) for elem in value]))
+  hash(value)
+  return value
@@ -15,7 +15,7 @@
 """Declares some predicates useful for expressing IF/AND/OR conditions."""
 
 
-from .predicate import ValuePredicate
+from .predicate import ValuePredicate, apply_predicate, structural_key
 from .sequenced_predicate_result import SequencedPredicateResult
 
 
@@ -54,7 +54,7 @@ class ConjunctivePredicate(ValuePredicate):
     everything = []
     valid = True
     for pred in self.__conjunction:
-      result = pred(context, value)
+      result = apply_predicate(pred, context, value)
       everything.append(result)
       if not result:
         valid = False
@@ -62,6 +62,15 @@ class ConjunctivePredicate(ValuePredicate):
     return SequencedPredicateResult(
         valid=valid, pred=self, results=everything)
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    plans = [pred.compile() for pred in self.__conjunction]
+    return lambda context, value: all(plan(context, value) for plan in plans)
+
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (self.__class__, structural_key(self.__conjunction))
+
 
 class DisjunctivePredicate(ValuePredicate):
   """A ValuePredicate that calls a sequence of predicates until one succeeds."""
@@ -98,7 +107,7 @@ class DisjunctivePredicate(ValuePredicate):
     everything = []
     valid = False
     for pred in self.__disjunction:
-      result = pred(context, value)
+      result = apply_predicate(pred, context, value)
       everything.append(result)
       if result:
         valid = True
@@ -106,6 +115,15 @@ class DisjunctivePredicate(ValuePredicate):
     return SequencedPredicateResult(
         valid=valid, pred=self, results=everything)
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    plans = [pred.compile() for pred in self.__disjunction]
+    return lambda context, value: any(plan(context, value) for plan in plans)
+
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (self.__class__, structural_key(self.__disjunction))
+
 
 class NegationPredicate(ValuePredicate):
   """A ValuePredicate that negates another predicate."""
@@ -134,10 +152,19 @@ class NegationPredicate(ValuePredicate):
     snapshot.edge_builder.make_mechanism(entity, 'Predicate', self.__pred)
 
   def __call__(self, context, value):
-    base_result = self.__pred(context, value)
+    base_result = apply_predicate(self.__pred, context, value)
     return SequencedPredicateResult(
         valid=not base_result.valid, pred=self, results=[base_result])
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    pred_plan = self.__pred.compile()
+    return lambda context, value: not pred_plan(context, value)
+
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (self.__class__, structural_key(self.__pred))
+
 
 class ConditionalPredicate(ValuePredicate):
   """A ValuePredicate that implements IF/THEN.
@@ -165,7 +192,7 @@ class ConditionalPredicate(ValuePredicate):
   @property
   def else_predicate(self):
     """The predicate forming the ELSE clause."""
-    return self.__then_pred
+    return self.__else_pred
 
   def __init__(self, if_predicate, then_predicate, else_predicate=None,
                **kwargs):
@@ -212,21 +239,39 @@ class ConditionalPredicate(ValuePredicate):
 
   def __call__(self, context, value):
     if self.__demorgan_pred:
-      return self.__demorgan_pred(context, value)
+      return apply_predicate(self.__demorgan_pred, context, value)
 
     # Run the "if" predicate
     # then, depending on the result, run either "then" or "else" predicate.
-    result = self.__if_pred(context, value)
+    result = apply_predicate(self.__if_pred, context, value)
     tried = [result]
     if result:
-      result = self.__then_pred(context, value)
+      result = apply_predicate(self.__then_pred, context, value)
     else:
-      result = self.__else_pred(context, value)
+      result = apply_predicate(self.__else_pred, context, value)
     tried.append(result)
 
     return SequencedPredicateResult(
         valid=result.valid, pred=self, results=tried)
 
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    if self.__demorgan_pred:
+      return self.__demorgan_pred.compile()
+
+    if_plan = self.__if_pred.compile()
+    then_plan = self.__then_pred.compile()
+    else_plan = self.__else_pred.compile()
+    return lambda context, value: (then_plan(context, value)
+                                   if if_plan(context, value)
+                                   else else_plan(context, value))
+
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (self.__class__, structural_key(self.__if_pred),
+            structural_key(self.__then_pred),
+            structural_key(self.__else_pred))
+
 
 AND = ConjunctivePredicate
 OR = DisjunctivePredicate
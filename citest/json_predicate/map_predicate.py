@@ -76,12 +76,13 @@ class MapPredicateResultBuilder(object):
     else:
       self.__bad_map.append(ObjectResultMapAttempt(obj, result))
 
-  def build(self, valid):
+  def build(self, valid, truncated=False):
     """Creates the MapPredicateResult instance specified by this builder."""
     return MapPredicateResult(
         valid=valid, pred=self.__pred,
         obj_list=self.__obj_list, all_results=self.__all_results,
-        good_map=self.__good_map, bad_map=self.__bad_map)
+        good_map=self.__good_map, bad_map=self.__bad_map,
+        truncated=truncated)
 
 
 class MapPredicateResult(SequencedPredicateResult):
@@ -102,6 +103,14 @@ class MapPredicateResult(SequencedPredicateResult):
     """The list of objects we mapped the predicate over."""
     return self.__obj_list
 
+  @property
+  def truncated(self):
+    """Whether mapping stopped before all the objects were considered.
+
+    If so then obj_list only contains the objects that were considered.
+    """
+    return self.__truncated
+
   @staticmethod
   def __map_attempt_to_entity(attempt, snapshot):
     """Helper method exporting a snapshot entity for an individual attempt."""
@@ -137,6 +146,8 @@ class MapPredicateResult(SequencedPredicateResult):
                             self.__bad_map, subject='invalid mapping'))
     if self.__bad_map:
       edge.add_metadata('relation', 'INVALID')
+    if self.__truncated:
+      builder.make(entity, 'Truncated', True)
     super(MapPredicateResult, self).export_to_json_snapshot(snapshot, entity)
 
   def __init__(self, valid, pred, obj_list, all_results,
@@ -145,6 +156,7 @@ class MapPredicateResult(SequencedPredicateResult):
     self.__obj_list = obj_list
     self.__good_map = good_map
     self.__bad_map = bad_map
+    self.__truncated = kwargs.pop('truncated', False)
 
     # When we snapshot, dont show all the results
     # These are redundant with the good/bad breakout that we'll add.
@@ -171,7 +183,7 @@ class MapPredicateResult(SequencedPredicateResult):
       else:
         result = orig
       builder.add_result(self.__obj_list[index], result)
-    return builder.build(self.valid)
+    return builder.build(self.valid, truncated=self.__truncated)
 
 
 class MapPredicate(predicate.ValuePredicate):
@@ -185,6 +197,11 @@ class MapPredicate(predicate.ValuePredicate):
     """The predicate to map over the individual values."""
     return self.__pred
 
+  @property
+  def early_exit(self):
+    """Whether to stop mapping once the outcome is decided."""
+    return self.__early_exit
+
   def __init__(self, pred, min=1, max=None, **kwargs):
     """Constructor.
 
@@ -194,10 +211,15 @@ class MapPredicate(predicate.ValuePredicate):
          to return true for.
       max: [int] The maximum number of values the predicate is expected
          to return true for (or None for no upper bound).
+      early_exit: [bool] If True then stop applying the predicate once
+         enough values are found to decide the outcome. The result is then
+         marked truncated and only maps the values considered. This is
+         ignored in diagnostic mode (see is_diagnostic_mode).
 
       See base class (ValuePredicate) for additional kwargs.
     """
     # pylint: disable=redefined-builtin
+    self.__early_exit = kwargs.pop('early_exit', False)
     self.__pred = pred
     self.__min = min
     self.__max = max
@@ -208,7 +230,8 @@ class MapPredicate(predicate.ValuePredicate):
 
   def __eq__(self, pred):
     return (self.__class__ == pred.__class__
-            and self.__pred == pred.pred)
+            and self.__pred == pred.pred
+            and self.__early_exit == pred.early_exit)
 
   def __call__(self, context, obj):
     """Determine if object or its members match the expected fields.
@@ -228,17 +251,27 @@ class MapPredicate(predicate.ValuePredicate):
     else:
       obj_list = obj
 
+    the_min = context.eval(self.__min)
+    the_max = context.eval(self.__max)
+    stop_at = None
+    if (self.__early_exit
+        and not predicate.is_diagnostic_mode(context)):
+      stop_at = predicate.early_exit_stop_at(the_min, the_max)
+
+    truncated = False
     if obj_list != None:
-      for elem in obj_list:
-        result = self.__pred(context, elem)
+      for index, elem in enumerate(obj_list):
+        if len(good_map) == stop_at:
+          truncated = True
+          obj_list = obj_list[:index]
+          break
+        result = predicate.apply_predicate(self.__pred, context, elem)
         all_results.append(result)
         if result:
           good_map.append(ObjectResultMapAttempt(elem, result))
         else:
           bad_map.append(ObjectResultMapAttempt(elem, result))
 
-    the_min = context.eval(self.__min)
-    the_max = context.eval(self.__max)
     valid = not (the_min != None and len(good_map) < the_min
                  or the_max != None and len(good_map) > the_max)
     return MapPredicateResult(
@@ -246,7 +279,48 @@ class MapPredicate(predicate.ValuePredicate):
         obj_list=obj_list,
         all_results=all_results,
         good_map=good_map,
-        bad_map=bad_map)
+        bad_map=bad_map,
+        truncated=truncated)
+
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    pred_plan = self.__pred.compile()
+    min_arg = self.__min
+    max_arg = self.__max
+    early_exit = self.__early_exit
+    constant_bounds = predicate.is_constant(min_arg) and predicate.is_constant(
+        max_arg)
+
+    def plan(context, obj):
+      """Checks the elements of obj."""
+      if not isinstance(obj, list) and obj != None:
+        obj_list = [obj]
+      else:
+        obj_list = obj or []
+
+      if constant_bounds:
+        the_min, the_max = min_arg, max_arg
+      else:
+        the_min, the_max = context.eval(min_arg), context.eval(max_arg)
+      stop_at = None
+      if early_exit and not predicate.is_diagnostic_mode(context):
+        stop_at = predicate.early_exit_stop_at(the_min, the_max)
+      count = 0
+      for elem in obj_list:
+        if count == stop_at:
+          break
+        if pred_plan(context, elem):
+          count += 1
+      return not (the_min != None and count < the_min
+                  or the_max != None and count > the_max)
+
+    return plan
+
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    return (self.__class__, predicate.structural_key(self.__pred),
+            predicate.structural_key(self.__min),
+            predicate.structural_key(self.__max), self.__early_exit)
 
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
@@ -255,3 +329,5 @@ class MapPredicate(predicate.ValuePredicate):
                            summary=self.__pred.__class__)
     builder.make_control(entity, 'Min', self.__min)
     builder.make_control(entity, 'Max', self.__max)
+    if self.__early_exit:
+      builder.make_control(entity, 'Early Exit', True)
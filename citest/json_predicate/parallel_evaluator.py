@@ -0,0 +1,188 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Counts the values satisfying a PathPredicate using a pool of processes.
+
+Counting the values satisfying a predicate across a very large observation
+(e.g. a listing of tens of thousands of resources) is CPU bound, so cannot
+be sped up with threads. A ParallelEvaluator splits the observed objects
+into chunks, counts each chunk in a separate worker process, and adds up
+the counts in chunk order.
+
+This is only done where it gives the same answer as counting serially:
+  * There must be at least min_objects objects, so that small observations
+    never pay the cost of sending the objects to the workers.
+  * The PathPredicate must traverse each of the objects independently.
+  * The PathPredicate must be picklable without any functions other than
+    those of json_predicate itself. Other functions (e.g. operands that are
+    looked up in the context) are assumed to depend on the context.
+
+Otherwise count() returns None and the caller should count serially.
+Workers evaluate the predicate in an empty ExecutionContext.
+"""
+
+
+import cPickle
+import cStringIO
+import logging
+import multiprocessing
+import pickle
+import threading
+import types
+
+from ..base.execution_context import ExecutionContext
+
+
+# Observations with fewer objects than this are counted serially by default.
+DEFAULT_MIN_OBJECTS = 10000
+
+
+class _PredicatePickler(pickle.Pickler):
+  """Pickles predicates, refusing functions that might use the context."""
+
+  def persistent_id(self, obj):
+    # pylint: disable=no-self-use
+    if (isinstance(obj, (types.FunctionType, types.MethodType))
+        and not getattr(obj, '__module__', '').startswith(__package__)):
+      raise pickle.PicklingError('{0!r} may depend on the context'.format(obj))
+    return None
+
+
+def _pickle_predicate(pred):
+  """Returns the pickled predicate, or None if it cannot be pickled."""
+  stream = cStringIO.StringIO()
+  try:
+    _PredicatePickler(stream, pickle.HIGHEST_PROTOCOL).dump(pred)
+  except (pickle.PicklingError, TypeError, AttributeError) as ex:
+    logging.getLogger(__name__).debug(
+        'Counting serially because predicate cannot be pickled: %s', ex)
+    return None
+  return stream.getvalue()
+
+
+def _count_chunk(task):
+  """Counts the values satisfying a pickled PathPredicate within a chunk.
+
+  This runs in the worker processes.
+
+  Args:
+    task: [tuple] The (pickled PathPredicate, stop_at, object list) to count.
+
+  Returns:
+    The count, stopping at stop_at if it is not None.
+  """
+  pickled_pred, stop_at, chunk = task
+  path_pred = cPickle.loads(pickled_pred)
+  context = ExecutionContext()
+  return path_pred.count_traversal(
+      context, path_pred.traverse(context, chunk), stop_at=stop_at)
+
+
+class ParallelEvaluator(object):
+  """Counts the values satisfying PathPredicates in worker processes.
+
+  The worker processes are started by the constructor and run until the
+  evaluator is closed, either by calling close() or by using the evaluator
+  as a context manager:
+     with ParallelEvaluator() as evaluator:
+       ...
+  """
+
+  @property
+  def min_objects(self):
+    """The minimum number of objects worth counting in parallel."""
+    return self.__min_objects
+
+  @property
+  def processes(self):
+    """The number of worker processes."""
+    return self.__processes
+
+  def __init__(self, min_objects=DEFAULT_MIN_OBJECTS, processes=None,
+               chunks_per_process=4):
+    """Constructor.
+
+    Args:
+      min_objects: [int] The minimum number of objects to count in parallel.
+      processes: [int] The number of worker processes, or None for one
+         per CPU.
+      chunks_per_process: [int] The number of chunks to divide the objects
+         into for each process, which balances uneven chunks.
+    """
+    if processes is None:
+      processes = multiprocessing.cpu_count()
+    if processes < 1 or chunks_per_process < 1:
+      raise ValueError('processes={0} and chunks_per_process={1}'
+                       ' must be positive'.format(processes,
+                                                  chunks_per_process))
+    self.__min_objects = min_objects
+    self.__processes = processes
+    self.__num_chunks = processes * chunks_per_process
+    self.__lock = threading.Lock()
+    self.__pool = multiprocessing.Pool(processes)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def close(self):
+    """Stops the worker processes.
+
+    The evaluator cannot count once it is closed. Closing it again has no
+    effect.
+    """
+    with self.__lock:
+      pool = self.__pool
+      self.__pool = None
+    if pool is not None:
+      pool.terminate()
+      pool.join()
+
+  def count(self, path_pred, object_list, stop_at=None):
+    """Count the values satisfying a PathPredicate on the objects.
+
+    Args:
+      path_pred: [PathPredicate] The predicate to count values of.
+      object_list: [list] The observed objects.
+      stop_at: [int] If not None then stop counting once this many are found.
+
+    Raises:
+      ValueError if the evaluator was closed.
+
+    Returns:
+      The same count as path_pred.count_traversal would give on a traversal
+      of object_list in an empty context, or None if the count cannot or
+      should not be made in parallel.
+    """
+    pool = self.__pool
+    if pool is None:
+      raise ValueError('ParallelEvaluator is closed')
+    if (len(object_list) < self.__min_objects
+        or not path_pred.traverses_list_elements()):
+      return None
+
+    pickled_pred = _pickle_predicate(path_pred)
+    if pickled_pred is None:
+      return None
+
+    chunk_size = -(-len(object_list) // self.__num_chunks)
+    tasks = [(pickled_pred, stop_at, object_list[offset:offset + chunk_size])
+             for offset in range(0, len(object_list), chunk_size)]
+    counts = pool.map(_count_chunk, tasks)
+
+    total = sum(counts)
+    return total if stop_at is None else min(total, stop_at)
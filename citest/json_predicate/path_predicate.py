@@ -52,6 +52,24 @@ The path indicies are not required unless you want to specify a particular
 index. Omitting the index will consider all the elements when traversing the
 path.
 
+Paths may also contain the following segments:
+   '*'               Any field of a dict, or any element of a list.
+   '**'              The value itself and, recursively, all the values
+                     within it. Values within the descent that do not
+                     have the remainder of the path are quietly ignored.
+   '[?name==value]'  The value (or list elements) that are dicts whose
+   '[?name!=value]'  field "name" is (or is not) equal to "value". The value
+                     is JSON (e.g. true, 10, "text") or else a plain string.
+
+For example, using the source above
+   Path               Values
+   ----               ------
+   'a[0]/*'           'X'
+                      [1,2,3, {'z':'Z'}, {'z':4}]
+   'a/**/z'           ['Z', 4]
+   'a/y[?z==4]'       {'z':4}
+   'a[?x!="Y"]/x'     'X'
+
 Results returned include the path taken to the object, and the value of the
 object. The paths taken in the results are always explicit including the
 exact index in the source.
@@ -59,15 +77,20 @@ exact index in the source.
 
 
 import collections
+import json
 import re
+import threading
 
 from .path_value import (
     PATH_SEP,
     PathValue)
 
+from . import columnar
 from .predicate import (
     CloneableWithNewSource,
-    ValuePredicate)
+    ValuePredicate,
+    apply_predicate,
+    structural_key)
 
 from .path_predicate_result import PathPredicateResultBuilder
 
@@ -78,9 +101,80 @@ from .path_result import (
     IndexBoundsError)
 
 
-# An internal data structure used to queue path values as we navigate.
-_QueueElement = collections.namedtuple('QueueElem',
-                                       ['path_offset', 'path_value'])
+class _QueueElement(object):
+  """An internal data structure used to queue values as we navigate.
+
+  The path to the value is only formatted if it is actually needed
+  (e.g. to report a result) since most values visited are simply filtered.
+
+  Attributes:
+    path_offset: [int] The index of the next step in the _ParsedPath.
+    value: [any] The value reached.
+    descended: [bool] Whether the value was reached by a recursive descent,
+       in which case it is not a failure if the path cannot be followed.
+  """
+  # pylint: disable=too-few-public-methods
+
+  @property
+  def path(self):
+    """The explicit path from the traversal source to the value."""
+    if self.__path is None:
+      parent_path = self.__parent.path
+      if self.__key is None:
+        self.__path = parent_path
+      elif isinstance(self.__key, int):
+        self.__path = '{0}[{1}]'.format(parent_path, self.__key)
+      elif not parent_path:
+        self.__path = self.__key
+      else:
+        self.__path = PATH_SEP.join([parent_path, self.__key])
+    return self.__path
+
+  @property
+  def path_value(self):
+    """The PathValue to the value."""
+    if self.__path_value is None:
+      self.__path_value = PathValue(self.path, self.value)
+    return self.__path_value
+
+  def __init__(self, path_offset, value, parent=None, key=None,
+               descended=False):
+    """Constructor.
+
+    Args:
+      path_offset: [int] The index of the next step in the _ParsedPath.
+      value: [any] The value reached.
+      parent: [_QueueElement] The element the value was reached from,
+         or None if this is the source of the traversal.
+      key: [string or int] The field name or list index of the value
+         within the parent's value, or None if it is the parent's value.
+      descended: [bool] Whether the value was reached by a recursive descent.
+         Values reached from such values are also considered descended.
+    """
+    self.path_offset = path_offset
+    self.value = value
+    self.descended = descended or (parent is not None and parent.descended)
+    self.__parent = parent
+    self.__key = key
+    self.__path = '' if parent is None else None
+    self.__path_value = None
+
+
+class PathTraversal(
+    collections.namedtuple('PathTraversal',
+                           ['source', 'path_failures', 'candidates'])):
+  """The values reached by following a PathPredicate's path through a source.
+
+  This is independent of the predicate's filter so can be shared among
+  PathPredicates that have the same traversal_key.
+
+  Attributes:
+    source: [obj] The JSON object that was traversed.
+    path_failures: [list of PredicateResult] The paths that were pruned.
+    candidates: [list of _QueueElement] The values to be filtered.
+  """
+  # pylint: disable=too-few-public-methods
+  pass
 
 
 # Terminal used to mean dont enumerate the value if it is a list
@@ -96,57 +190,186 @@ _INDEX_RE = re.compile(r'\{0}?\[(\d+)\]'.format(PATH_SEP))
 _SEGMENT_RE = re.compile(r'\{0}?([^\{0}\{1}\[]+)'.format(
     PATH_SEP, DONT_ENUMERATE_TERMINAL))
 
+# Compiled regex to parse out a filter specifier if present.
+# This strips out the brackets and next slash, if any.
+_FILTER_RE = re.compile(r'\{0}?\[\?([^\]=!]+)(==|!=)([^\]]*)\]'.format(
+    PATH_SEP))
+
+# Compiled regexes to parse out recursive descent and wildcard segments.
+# These strip out the next slash, if any.
+_DESCENT_RE = re.compile(r'\{0}?\*\*(?=$|\{0}|\[)'.format(PATH_SEP))
+_WILDCARD_RE = re.compile(r'\{0}?\*(?=$|\{0}|\[)'.format(PATH_SEP))
+
+
+# The kinds of _PathStep.
+_INDEX_STEP = 'index'          # Selects an element from a list.
+_FIELD_STEP = 'field'          # Selects a field from a dict.
+_FILTER_STEP = 'filter'        # Selects values matching a _PathFilter.
+_WILDCARD_STEP = 'wildcard'    # Selects every field or element.
+_DESCENT_STEP = 'descent'      # Selects the value and all its descendants.
+_REMAINDER_STEP = 'remainder'  # The unparsable remainder of the path.
+
+# A single step within a _ParsedPath.
+#   kind: One of the _*_STEP kinds.
+#   key: The [int] index or [string] field name or remainder.
+#   start: The offset into the path text where the step starts.
+_PathStep = collections.namedtuple('PathStep', ['kind', 'key', 'start'])
+
+
+class _PathFilter(
+    collections.namedtuple('PathFilter', ['field', 'equal', 'operand'])):
+  """The key of a _FILTER_STEP.
+
+  Attributes:
+    field: [string] The name of the field to compare.
+    equal: [bool] Whether the field should be equal to the operand or not.
+    operand: [any] The value to compare the field against.
+  """
+  # pylint: disable=too-few-public-methods
+
+  @staticmethod
+  def parse(field, operator, operand_text):
+    """Create a filter from its path specification."""
+    try:
+      operand = json.loads(operand_text)
+    except ValueError:
+      operand = operand_text
+    return _PathFilter(field, operator == '==', operand)
+
+  def matches(self, value):
+    """Determine if a value should be selected by the filter.
+
+    Only dict values that have the field can be selected.
+    """
+    if not isinstance(value, dict) or self.field not in value:
+      return False
+    return (value[self.field] == self.operand) == self.equal
+
+
+class _ParsedPath(object):
+  """A path that has been parsed into the steps taken to traverse it.
+
+  Field steps are taken by dict values. List values take index steps,
+  or are enumerated into their elements for any other step.
+  """
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self, text):
+    """Constructor.
+
+    Args:
+      text: [string] The path to parse.
+    """
+    self.text = text
+    self.steps = []
+    offset = 0
+    while offset < len(text):
+      match = _INDEX_RE.match(text, offset)
+      if match is not None:
+        self.steps.append(
+            _PathStep(_INDEX_STEP, int(match.group(1)), offset))
+        offset = match.end(0)
+        continue
+
+      match = _FILTER_RE.match(text, offset)
+      if match is not None:
+        self.steps.append(
+            _PathStep(_FILTER_STEP, _PathFilter.parse(*match.groups()),
+                      offset))
+        offset = match.end(0)
+        continue
+
+      match = _DESCENT_RE.match(text, offset) or _WILDCARD_RE.match(
+          text, offset)
+      if match is not None:
+        kind = (_DESCENT_STEP if match.re is _DESCENT_RE else _WILDCARD_STEP)
+        self.steps.append(_PathStep(kind, None, offset))
+        offset = match.end(0)
+        continue
+
+      match = _SEGMENT_RE.search(text, offset)
+      if match is None:
+        self.steps.append(_PathStep(_REMAINDER_STEP, text[offset:], offset))
+        break
+
+      self.steps.append(_PathStep(_FIELD_STEP, match.group(1), offset))
+      offset = match.end(0)
+
+
+# The most recently used paths are kept parsed.
+_MAX_PARSED_PATHS = 512
+_parsed_path_cache = collections.OrderedDict()
+_parsed_path_cache_lock = threading.Lock()
+
+
+def _parse_path(text):
+  """Returns the _ParsedPath for the path text, reusing a cached one if any.
+
+  Args:
+    text: [string] The path to parse.
+  """
+  with _parsed_path_cache_lock:
+    parsed = _parsed_path_cache.pop(text, None)
+    if parsed is not None:
+      _parsed_path_cache[text] = parsed
+      return parsed
+
+  parsed = _ParsedPath(text)
+  with _parsed_path_cache_lock:
+    _parsed_path_cache[text] = parsed
+    while len(_parsed_path_cache) > _MAX_PARSED_PATHS:
+      _parsed_path_cache.popitem(last=False)
+  return parsed
+
 
 def _process_dict_element(elem, target_path):
   """Helper function for processing dictionary objects in the queue.
 
   Args:
-    elem: [_QueueElement] Element to process has a list value.
-    target_path: [string] The desired path we were looking for.
+    elem: [_QueueElement] Element to process has a dict value.
+    target_path: [_ParsedPath] The desired path we were looking for.
 
   Returns:
-    array of _QueueElement
+    array of _QueueElement, array of path failures
   """
-  path_offset = elem.path_offset
-  from_path_value = elem.path_value
-
-  # The value of the path to this point is the end of the trace.
-  base_path = from_path_value.path
-  source = from_path_value.value
-
-  # Continue tracing from this object to the path remainder.
-  # Determine the next path segment we are looking for.
-  match = _INDEX_RE.search(target_path, path_offset)
-  if match is not None and match.start(0) == path_offset:
-    return TypeMismatchError(list, dict, source, target_path, from_path_value)
-  match = _SEGMENT_RE.search(target_path, path_offset)
-  if match is None:
-    next_offset = len(target_path)
-    next_segment = target_path[path_offset:]
-
-    if path_offset == next_offset - 1 and next_segment == PATH_SEP:
-      # Terminal enumerated dict is just itself.
-      return [_QueueElement(next_offset, from_path_value)], []
-  else:
-    next_offset = match.end(0)
-    next_segment = match.groups(0)[0]
-
-  # Add the segment to the path to this value.
-  # This is not strictly the path up to the next offset
-  # because we might be decorating the path (e.g. array indexes taken).
-  if not base_path:
-    value_path = next_segment
-  else:
-    value_path = PATH_SEP.join([base_path, next_segment])
+  step = target_path.steps[elem.path_offset]
+  source = elem.value
+  if step.kind == _INDEX_STEP:
+    return [], [TypeMismatchError(list, dict, source, target_path.text,
+                                  elem.path_value)]
+
+  next_offset = elem.path_offset + 1
+  if step.kind == _FILTER_STEP:
+    if not step.key.matches(source):
+      return [], []
+    return [_QueueElement(next_offset, source, parent=elem)], []
+
+  if step.kind == _WILDCARD_STEP:
+    return ([_QueueElement(next_offset, source[key], parent=elem, key=key)
+             for key in sorted(source.keys())],
+            [])
+
+  if step.kind == _DESCENT_STEP:
+    # The dict itself continues along the path while its values
+    # continue the descent.
+    return ([_QueueElement(next_offset, source, parent=elem, descended=True)]
+            + [_QueueElement(elem.path_offset, source[key],
+                             parent=elem, key=key, descended=True)
+               for key in sorted(source.keys())],
+            [])
+
+  if step.kind == _REMAINDER_STEP and step.key == PATH_SEP:
+    # Terminal enumerated dict is just itself.
+    return [_QueueElement(next_offset, source, parent=elem)], []
 
   # Get the segment value, if any.
-  value = source.get(next_segment, None)
+  value = source.get(step.key, None)
   if value is None:
     return (
         [],
-        [MissingPathError(source, next_segment, path_value=from_path_value)])
+        [MissingPathError(source, step.key, path_value=elem.path_value)])
 
-  return ([_QueueElement(next_offset, PathValue(value_path, value))], [])
+  return [_QueueElement(next_offset, value, parent=elem, key=step.key)], []
 
 
 def _process_list_element(elem, target_path):
@@ -154,41 +377,40 @@ def _process_list_element(elem, target_path):
 
   Args:
     elem: [_QueueElement] Element to process has a list value.
-    target_path: [string] The desired path we were looking for.
+    target_path: [_ParsedPath] The desired path we were looking for.
 
   Returns:
-    array of _QueueElement
+    array of _QueueElement, array of path failures
   """
   path_offset = elem.path_offset
-  from_path_value = elem.path_value
-
-  # The value of the path to this point is the end of the trace.
-  base_path = from_path_value.path
-  source = from_path_value.value
-
-  filter_index = None
-  match = _INDEX_RE.search(target_path, path_offset)
-  if match is not None and match.start(0) == path_offset:
-    filter_index = int(match.groups(0)[0])
-    if filter_index >= len(source):
-      return [], [IndexBoundsError(filter_index, list,
-                                   target_path=target_path[path_offset:],
-                                   path_value=from_path_value)]
-
-    path_offset = match.end(0)
+  source = elem.value
+
+  step = (target_path.steps[path_offset]
+          if path_offset < len(target_path.steps)
+          else None)
+  if step is not None and step.kind == _FILTER_STEP:
+    return ([_QueueElement(path_offset + 1, value, parent=elem, key=index)
+             for index, value in enumerate(source)
+             if step.key.matches(value)],
+            [])
+
+  if step is not None and step.kind == _WILDCARD_STEP:
+    return ([_QueueElement(path_offset + 1, value, parent=elem, key=index)
+             for index, value in enumerate(source)],
+            [])
+
+  if step is not None and step.kind == _INDEX_STEP:
+    if step.key >= len(source):
+      return [], [IndexBoundsError(step.key, list,
+                                   target_path=target_path.text[step.start:],
+                                   path_value=elem.path_value)]
+    return [_QueueElement(path_offset + 1, source[step.key],
+                          parent=elem, key=step.key)], []
 
   # Try to follow the path from each of the objects in the list.
-  candidates = []
-  fails = []
-  for index, value in enumerate(source):
-    if filter_index is not None and index != filter_index:
-      continue
-
-    elem_path = '{0}[{1}]'.format(base_path, index)
-    candidates.append(
-        _QueueElement(path_offset, PathValue(elem_path, value)))
-
-  return candidates, fails
+  return ([_QueueElement(path_offset, value, parent=elem, key=index)
+           for index, value in enumerate(source)],
+          [])
 
 
 def _process_queue_element(top, target_path):
@@ -196,25 +418,32 @@ def _process_queue_element(top, target_path):
 
   Args:
     top: [_QueueElement] The queue element to process.
-    target_path: [string] The original desired path.
+    target_path: [_ParsedPath] The original desired path.
 
   Returns:
-    array of _QueueElement
+    array of _QueueElement, array of path failures
   """
 
-  if isinstance(top.path_value.value, dict):
+  if isinstance(top.value, dict):
     return _process_dict_element(top, target_path)
 
-  if isinstance(top.path_value.value, list):
+  if isinstance(top.value, list):
     return _process_list_element(top, target_path)
 
-  source = top.path_value.value
-  path_offset = top.path_offset
-  if target_path[path_offset] == PATH_SEP:
+  step = target_path.steps[top.path_offset]
+  if step.kind == _DESCENT_STEP:
+    return [_QueueElement(top.path_offset + 1, top.value, parent=top,
+                          descended=True)], []
+  if step.kind == _FILTER_STEP:
+    return [], []
+
+  text = target_path.text
+  path_offset = target_path.steps[top.path_offset].start
+  if text[path_offset] == PATH_SEP:
     path_offset += 1
 
   return ([],
-          [MissingPathError(source, target_path[path_offset:],
+          [MissingPathError(top.value, text[path_offset:],
                             path_value=top.path_value)])
 
 
@@ -313,94 +542,257 @@ class PathPredicate(ValuePredicate, ProducesPathPredicateResult):
       PredicateResult on the bound predicate applied to the lookup path.
         (i.e. pred(lookup(source, path)))
     """
+    return self.apply_to_traversal(context, self.traverse(context, source))
+
+  def _do_compile(self):
+    """Implements ValuePredicate interface."""
+    return lambda context, source: self.count_traversal(
+        context, self.traverse(context, source), stop_at=1) > 0
 
+  def _make_structural_key(self):
+    """Implements ValuePredicate interface."""
+    source_key = (None if self.__source_pred is self
+                  else structural_key(self.__source_pred))
+    return (self.__class__, self.__path, structural_key(self.__pred),
+            self.__transform, self.__enumerate_terminals, source_key)
+
+  def count_traversal(self, context, traversal, stop_at=None):
+    """Count the values in a traversal that satisfy the bound predicate.
+
+    This is the number of path_values that apply_to_traversal would
+    produce, but without producing them.
+
+    Args:
+      context: [ExecutionContext] The context to evaluate the predicate in.
+      traversal: [PathTraversal] The result of calling traverse() on this
+         or another PathPredicate with the same traversal_key.
+      stop_at: [int] If not None then stop counting once this many are found.
+
+    Returns:
+      The number of values that satisfy the predicate.
+    """
+    if self.__pred is None:
+      count = len(traversal.candidates)
+      return count if stop_at is None else min(count, stop_at)
+
+    mask = self.__evaluate_column(traversal.candidates)
+    if mask is not None:
+      count = columnar.count_true(mask)
+      return count if stop_at is None else min(count, stop_at)
+
+    pred_plan = self.__pred.compile()
+    transform = self.__transform
+    count = 0
+    for trial in traversal.candidates:
+      value = trial.value
+      if transform:
+        value = transform(context, value)
+      if pred_plan(context, value):
+        count += 1
+        if count == stop_at:
+          break
+    return count
+
+  def traversal_key(self):
+    """Identifies the PathTraversal this predicate would make.
+
+    PathPredicates with the same key make the same traversal of a given
+    source within a given context so can share the traversal.
+    """
+    path = self.__path
+    return (path if isinstance(path, basestring) else id(path),
+            self.__enumerate_terminals)
+
+  def traverses_list_elements(self):
+    """Determine if traversing a list traverses each of its elements in turn.
+
+    If so, the candidates from traversing a list are the candidates from
+    traversing each of its elements, so the list can be split into parts
+    that are traversed separately. This is not the case for paths that
+    depend on the context, or that index into the list itself.
+    """
+    path = self.__path
+    if not isinstance(path, basestring):
+      return False
+
+    enumerate_terminal = self.__enumerate_terminals
+    if path and path[-1] in (PATH_SEP, DONT_ENUMERATE_TERMINAL):
+      enumerate_terminal = path[-1] != DONT_ENUMERATE_TERMINAL
+      path = path[:-1]
+    if not path:
+      return enumerate_terminal
+    return _parse_path(path).steps[0].kind != _INDEX_STEP
+
+  def field_names(self):
+    """Returns the path as a list of field names, if it is that simple.
+
+    Returns:
+      The list of field names to follow, or None if the path depends on the
+      context, is empty, or has steps other than field names (such as
+      indexes, filters or wildcards).
+    """
+    path = self.__path
+    if not isinstance(path, basestring):
+      return None
+    if path and path[-1] in (PATH_SEP, DONT_ENUMERATE_TERMINAL):
+      path = path[:-1]
+    if not path:
+      return None
+    steps = _parse_path(path).steps
+    if any(step.kind != _FIELD_STEP for step in steps):
+      return None
+    return [step.key for step in steps]
+
+  def traverse(self, context, source):
+    """Collect the values at the end of the path through the source.
+
+    Args:
+      context: [ExecutionContext] The context to evaluate the path in.
+      source: [obj] The JSON object to traverse.
+
+    Returns:
+      A PathTraversal for use with apply_to_traversal.
+    """
     path = context.eval(self.__path)
 
-    builder = PathPredicateResultBuilder(pred=self.source_pred, source=source)
+    path_failures = []
     enumerate_terminal = self.__enumerate_terminals
     if path and path[-1] in (PATH_SEP, DONT_ENUMERATE_TERMINAL):
       enumerate_terminal = path[-1] != DONT_ENUMERATE_TERMINAL
       path = path[:-1]
 
-    queue = [_QueueElement(0, PathValue('', source))]
+    root = _QueueElement(0, source)
     if not path and not (enumerate_terminal and isinstance(source, list)):
-      return self.__add_queue_to_builder(
-          context, builder, queue, enumerate_terminal)
+      return PathTraversal(source, path_failures, [root])
 
+    parsed_path = _parse_path(path)
+    num_steps = len(parsed_path.steps)
+    queue = collections.deque([root])
     final_queue = []
     while queue:
-      top = queue.pop(0)
-      if top.path_offset >= len(path):
+      top = queue.popleft()
+      if top.path_offset >= num_steps:
         final_queue.append(top)
         continue
 
-      candidates, fails = _process_queue_element(top, path)
+      candidates, fails = _process_queue_element(top, parsed_path)
       queue.extend(candidates)
-      builder.add_all_path_failures(fails)
-
-    return self.__add_queue_to_builder(
-        context, builder, final_queue, enumerate_terminal)
+      if not top.descended:
+        path_failures.extend(fails)
 
-  def __add_queue_to_builder(
-      self, context, builder, final_queue, enumerate_terminal):
-    """Helper method for processing the final candidates from the queue.
+    return PathTraversal(
+        source, path_failures,
+        self.__expand_final_queue(final_queue, enumerate_terminal,
+                                  parsed_path))
 
-    Apply the filter bound to this predicate, if any, to determine whether
-    each of the final candidates should be kept or rejected.
+  @staticmethod
+  def __expand_final_queue(final_queue, enumerate_terminal, parsed_path):
+    """Helper method for determining the final candidates from the queue.
 
     Args:
-      builder: [PathPredicateResultBuilder] To add the results into.
-      final_queue: [list of _QueueElement] The final candidate values.
+      final_queue: [list of _QueueElement] The values at the end of the path.
       enumerate_terminal: [bool] If true, then list values in the queue
          should be enumerated (one level) into individual elements.
+      parsed_path: [_ParsedPath] The path that was traversed.
 
     Returns:
-      PathPredicateResult
+      list of _QueueElement
     """
+    result = []
     for elem in final_queue:
-      value = elem.path_value.value
+      value = elem.value
       if enumerate_terminal and isinstance(value, list):
-        candidates, fails = _process_queue_element(elem, self.__path)
+        candidates, fails = _process_queue_element(elem, parsed_path)
         # We're already at the end point, so there is no more path based
         # filtering to do. The above step would have just expanded out
         # the list elements into individual elements, which should never
         # fail.
         assert len(fails) == 0
+        result.extend(candidates)
       else:
-        candidates = [elem]
-
-      if self.__pred is None:
-        for trial in candidates:
-          if self.__transform:
-            xformed = self.__transform(context, trial.path_value.value)
-            transformed_path_value = PathValue(trial.path_value.path, xformed)
-          else:
-            transformed_path_value = trial.path_value
-
-          builder.add_result_candidate(
-              trial.path_value,
-              PathValueResult(source=builder.source,
-                              target_path=transformed_path_value.path,
-                              path_value=transformed_path_value,
-                              valid=True,
-                              pred=None))
+        result.append(elem)
+    return result
 
-      else:
-        for trial in candidates:
-          path_value = trial.path_value
-          if self.__transform:
-            xformed = self.__transform(context, path_value.value)
-          else:
-            xformed = path_value.value
-
-          pred_result = self.__pred(context, xformed)
-          if isinstance(pred_result, CloneableWithNewSource):
-            base_path = path_value.path
-            pred_result = pred_result.clone_with_source(
-                source=builder.source,
-                base_target_path=self.__path,
-                base_value_path=base_path)
-
-          builder.add_result_candidate(path_value, pred_result)
+  def apply_to_traversal(self, context, traversal, stop_at=None):
+    """Apply the bound predicate, if any, to the values in a traversal.
+
+    Apply the filter bound to this predicate, if any, to determine whether
+    each of the final candidates should be kept or rejected.
+
+    Args:
+      context: [ExecutionContext] The context to evaluate the predicate in.
+      traversal: [PathTraversal] The result of calling traverse() on this
+         or another PathPredicate with the same traversal_key.
+      stop_at: [int] If not None then stop once this many values are kept.
+         The result is marked truncated if there were more candidates.
+
+    Returns:
+      PathPredicateResult
+    """
+    builder = PathPredicateResultBuilder(pred=self.source_pred,
+                                         source=traversal.source)
+    builder.add_all_path_failures(traversal.path_failures)
+    candidates = traversal.candidates
+    if stop_at is not None and self.__pred is None:
+      if len(candidates) > stop_at:
+        builder.mark_truncated()
+        candidates = candidates[:stop_at]
+
+    if self.__pred is None:
+      for trial in candidates:
+        if self.__transform:
+          xformed = self.__transform(context, trial.path_value.value)
+          transformed_path_value = PathValue(trial.path_value.path, xformed)
+        else:
+          transformed_path_value = trial.path_value
+
+        builder.add_result_candidate(
+            trial.path_value,
+            PathValueResult(source=builder.source,
+                            target_path=transformed_path_value.path,
+                            path_value=transformed_path_value,
+                            valid=True,
+                            pred=None))
+
+    else:
+      mask = self.__evaluate_column(candidates)
+      num_kept = 0
+      for index, trial in enumerate(candidates):
+        if num_kept == stop_at:
+          builder.mark_truncated()
+          break
+        path_value = trial.path_value
+        if self.__transform:
+          xformed = self.__transform(context, path_value.value)
+        else:
+          xformed = path_value.value
+
+        if mask is not None:
+          pred_result = self.__pred.make_result(xformed, bool(mask[index]))
+        else:
+          pred_result = apply_predicate(self.__pred, context, xformed)
+        if isinstance(pred_result, CloneableWithNewSource):
+          base_path = path_value.path
+          pred_result = pred_result.clone_with_source(
+              source=builder.source,
+              base_target_path=self.__path,
+              base_value_path=base_path)
+
+        builder.add_result_candidate(path_value, pred_result)
+        if pred_result:
+          num_kept += 1
 
     return builder.build()
+
+  def __evaluate_column(self, candidates):
+    """Evaluate the bound predicate on all the candidate values at once.
+
+    Returns:
+      The mask from columnar.evaluate_column, or None if the candidates
+      should be evaluated individually.
+    """
+    if (self.__transform is not None
+        or len(candidates) < columnar.MIN_COLUMN_SIZE):
+      return None
+    return columnar.evaluate_column(
+        self.__pred, [trial.value for trial in candidates])
@@ -18,6 +18,10 @@
 import collections
 from ..base import JsonSnapshotableEntity
 from . import predicate
+from .source_pool import (
+    refer_to_source,
+    resolve_source,
+    same_source)
 
 
 class PathPredicateResultCandidate(
@@ -61,6 +65,12 @@ class PathPredicateResultBuilder(object):
     self.__path_failures = []
     self.__invalid_candidates = []
     self.__valid_candidates = []
+    self.__truncated = False
+
+  def mark_truncated(self):
+    """Records that not all the candidate values were considered."""
+    self.__truncated = True
+    return self
 
   def add_all_path_failures(self, failures):
     """Adds to the list of failed results.
@@ -110,7 +120,8 @@ class PathPredicateResultBuilder(object):
         valid=valid, pred=self.__pred, source=self.__source,
         path_failures=self.__path_failures,
         valid_candidates=self.__valid_candidates,
-        invalid_candidates=self.__invalid_candidates)
+        invalid_candidates=self.__invalid_candidates,
+        truncated=self.__truncated)
 
 
 class HasPathPredicateResult(object):
@@ -162,8 +173,12 @@ class PathPredicateResult(predicate.PredicateResult, HasPathPredicateResult):
 
   @property
   def source(self):
-    """Returns the source collected from."""
-    return self.__source
+    """Returns the source collected from.
+
+    This is source_pool.RELEASED_SOURCE if the global SourcePool no longer
+    retains it.
+    """
+    return resolve_source(self.__source)
 
   @property
   def values(self):
@@ -193,6 +208,15 @@ class PathPredicateResult(predicate.PredicateResult, HasPathPredicateResult):
     """
     return self.__invalid_candidates
 
+  @property
+  def truncated(self):
+    """Whether the predicate stopped before considering every candidate.
+
+    This is the case when it was applied with early exit and the outcome
+    was decided before all the candidates were considered.
+    """
+    return self.__truncated
+
   def __init__(self, valid, pred, source, **kwargs):
     """Constructor.
 
@@ -203,15 +227,17 @@ class PathPredicateResult(predicate.PredicateResult, HasPathPredicateResult):
       path_failures: [list of PredicateResult] The pruned paths.
       valid_candidates: [list of PathPredicateResultCandidate]
       invalid_candidates: [list of PathPredicateResultCandidate]
+      truncated: [bool] Whether some candidates were not considered.
 
       See base class (PredicateResult) for additional kwargs.
     """
     path_failures = kwargs.pop('path_failures', None)
     valid_candidates = kwargs.pop('valid_candidates', None)
     invalid_candidates = kwargs.pop('invalid_candidates', None)
+    self.__truncated = kwargs.pop('truncated', False)
     super(PathPredicateResult, self).__init__(valid, **kwargs)
     self.__pred = pred
-    self.__source = source
+    self.__source = refer_to_source(source)
     self.__path_values = [candidate.path_value
                           for candidate in valid_candidates]
     self.__path_failures = path_failures or []
@@ -222,7 +248,7 @@ class PathPredicateResult(predicate.PredicateResult, HasPathPredicateResult):
     """Specializes interface."""
     return (super(PathPredicateResult, self).__eq__(result)
             and self.__pred == result.pred
-            and self.__source == result.source
+            and same_source(self.__source, result.__source)
             and self.__valid_candidates == result.valid_candidates
             and self.__invalid_candidates == result.invalid_candidates
             and self.__path_values == result.path_values
@@ -231,6 +257,8 @@ class PathPredicateResult(predicate.PredicateResult, HasPathPredicateResult):
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     snapshot.edge_builder.make_mechanism(entity, 'Predicate', self.__pred)
+    if self.__truncated:
+      entity.add_metadata('truncated', True)
     # Separate out just the path values from the full justification (below)
     # to make it easy to get at the list of values found, which is often
     # of particular interest.
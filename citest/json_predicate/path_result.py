@@ -25,6 +25,11 @@ from .predicate import (
     CloneableWithNewSource,
     PredicateResult)
 
+from .source_pool import (
+    refer_to_source,
+    resolve_source,
+    same_source)
+
 
 class PathResult(PredicateResult, CloneableWithNewSource):
   """Common base class for results whose subject is a field within a composite.
@@ -46,29 +51,36 @@ class PathResult(PredicateResult, CloneableWithNewSource):
 
     This might not have the full target_path, but will be a subset.
     """
+    if self.__path_value is None:
+      return PathValue(self.__target_path, self.source)
     return self.__path_value
 
   @property
   def source(self):
-    """The source JSON object that we are extracting the path from."""
-    return self.__source
+    """The source JSON object that we are extracting the path from.
+
+    This is source_pool.RELEASED_SOURCE if the global SourcePool no longer
+    retains it.
+    """
+    return resolve_source(self.__source)
 
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     builder = snapshot.edge_builder
     builder.make_control(entity, 'Target Path', self.__target_path)
-    builder.make_input(entity, 'Source', self.__source, format='json')
-    builder.make_output(entity, 'PathValue', self.__path_value)
+    builder.make_input(entity, 'Source', self.source, format='json')
+    builder.make_output(entity, 'PathValue', self.path_value)
     super(PathResult, self).export_to_json_snapshot(snapshot, entity)
 
   def clone_with_source(self, source, base_target_path, base_value_path):
     """Implements CloneableWithNewSource interface."""
+    orig_path_value = self.path_value
     target_path = (base_target_path if not self.__target_path
                    else PATH_SEP.join([base_target_path, self.__target_path]))
-    value_path = (base_value_path if not self.__path_value.path
+    value_path = (base_value_path if not orig_path_value.path
                   else PATH_SEP.join([base_target_path,
-                                      self.__path_value.path]))
-    path_value = PathValue(value_path, self.__path_value.value)
+                                      orig_path_value.path]))
+    path_value = PathValue(value_path, orig_path_value.value)
 
     return self._do_clone_with_source(source, target_path, path_value)
 
@@ -79,16 +91,17 @@ class PathResult(PredicateResult, CloneableWithNewSource):
 
   def __init__(self, valid, source, target_path, path_value, **kwargs):
     super(PathResult, self).__init__(valid, **kwargs)
-    self.__source = source
+    self.__source = refer_to_source(source)
     self.__target_path = target_path
-    self.__path_value = (PathValue(target_path, source)
-                         if path_value is None else path_value)
+
+    # None indicates the path value is the source itself.
+    self.__path_value = path_value
 
   def __eq__(self, result):
     return (super(PathResult, self).__eq__(result)
             and self.__target_path == result.target_path
-            and self.__source == result.source
-            and self.__path_value == result.path_value)
+            and same_source(self.__source, result.__source)
+            and self.path_value == result.path_value)
 
   def __add_outer_path(self, base_path):
     """Helper function to add outer context to our path when cloning it."""
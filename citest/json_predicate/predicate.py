@@ -15,9 +15,182 @@
 """Implements ValuePredicate that determines when a given value is 'valid'."""
 
 
+import threading
+
 from ..base import JsonSnapshotableEntity
 
 
+# If this key is set to True in the ExecutionContext then verification
+# produces the full results explaining every value that was considered
+# rather than taking shortcuts that only determine the outcome.
+DIAGNOSTIC_MODE_CONTEXT_KEY = 'DiagnosticMode'
+
+# If this key is set in the ExecutionContext then it is the PredicateMemo
+# that verification passes over the context share.
+PREDICATE_MEMO_CONTEXT_KEY = 'PredicateMemo'
+
+# Each thread has a stack of the (context, PredicateMemo, diagnostic_mode)
+# for the verification passes it is in the middle of performing. These are
+# kept here rather than in the context since the context may be shared with
+# passes being performed by other threads.
+_VERIFICATION_PASSES = threading.local()
+
+
+def is_constant(value):
+  """Determine if ExecutionContext.eval(value) is always value itself.
+
+  Args:
+    value: [any] The value to test, such as a predicate operand.
+
+  Returns:
+    False if the value is callable or contains something callable.
+  """
+  if isinstance(value, list):
+    return all(is_constant(elem) for elem in value)
+  if isinstance(value, dict):
+    return all(is_constant(elem) for elem in value.values())
+  return not callable(value)
+
+
+def structural_key(value):
+  """Returns a hashable key describing the structure of a value.
+
+  Values with equal keys behave the same when used as, or within, a
+  predicate. Predicates are described by their structural_key() and other
+  values by their content, so structurally equal predicates have equal keys
+  even though they are different instances.
+
+  Args:
+    value: [any] A predicate, operand, or JSON value containing these.
+
+  Raises:
+    TypeError if the value contains something that is not hashable.
+  """
+  if isinstance(value, ValuePredicate):
+    key = value.structural_key()
+    # Predicates without a structural key are only the same as themselves.
+    return key if key is not None else (id, id(value))
+  if isinstance(value, dict):
+    return (dict, tuple(sorted([(name, structural_key(elem))
+                                for name, elem in value.items()],
+                               key=lambda entry: entry[0])))
+  if isinstance(value, list):
+    return (list, tuple([structural_key(elem) for elem in value]))
+  hash(value)
+  return value
+
+
+def _current_verification_pass(context):
+  """Returns the pass this thread is performing over the context, if any."""
+  stack = getattr(_VERIFICATION_PASSES, 'stack', None)
+  if stack and stack[-1][0] is context:
+    return stack[-1]
+  return None
+
+
+def perform_verification_pass(context, func, diagnostic_mode=False):
+  """Call func() within a verification pass over the context.
+
+  Structurally equal predicates applied during the pass share their results
+  through a PredicateMemo. If this thread is already performing a pass over
+  the context then func joins that pass.
+
+  Args:
+    context: [ExecutionContext] The context the pass is performed in.
+    func: [callable] The function performing the verification.
+    diagnostic_mode: [bool] If True then func is called within a new pass
+       in diagnostic mode, which does not reuse results from the
+       enclosing pass since they might have taken shortcuts.
+
+  Returns:
+    The result of calling func.
+  """
+  current = _current_verification_pass(context)
+  if current is not None and not diagnostic_mode:
+    return func()
+
+  memo = None if diagnostic_mode else context.get(PREDICATE_MEMO_CONTEXT_KEY,
+                                                  None)
+  stack = getattr(_VERIFICATION_PASSES, 'stack', None)
+  if stack is None:
+    stack = []
+    _VERIFICATION_PASSES.stack = stack
+  stack.append((context, memo if memo is not None else PredicateMemo(),
+                diagnostic_mode))
+  try:
+    return func()
+  finally:
+    stack.pop()
+
+
+def is_diagnostic_mode(context):
+  """Determine if predicates applied in the context should explain everything.
+
+  Args:
+    context: [ExecutionContext] The context predicates are applied in.
+
+  Returns:
+    True if the context has DIAGNOSTIC_MODE_CONTEXT_KEY set or this thread
+    is performing a verification pass over it in diagnostic mode.
+  """
+  current = _current_verification_pass(context)
+  if current is not None and current[2]:
+    return True
+  return bool(context.get(DIAGNOSTIC_MODE_CONTEXT_KEY, False))
+
+
+def early_exit_stop_at(the_min, the_max):
+  """Determine how many values satisfying a predicate decide a count bound.
+
+  Args:
+    the_min: [int] The minimum number of values expected, or None.
+    the_max: [int] The maximum number of values expected, or None.
+
+  Returns:
+    The number of satisfying values after which finding more cannot change
+    whether the count is within [the_min, the_max].
+  """
+  if the_max is not None:
+    return the_max + 1
+  return max(the_min or 0, 1)
+
+
+def get_predicate_memo(context):
+  """Returns the PredicateMemo for predicates applied in the context, if any.
+
+  Args:
+    context: [ExecutionContext] The context predicates are applied in.
+
+  Returns:
+    The memo for the verification pass this thread is performing over the
+    context, otherwise any PREDICATE_MEMO_CONTEXT_KEY in the context.
+  """
+  current = _current_verification_pass(context)
+  if current is not None:
+    return current[1]
+  return context.get(PREDICATE_MEMO_CONTEXT_KEY, None)
+
+
+def apply_predicate(pred, context, value):
+  """Apply a predicate to a value within a verification pass.
+
+  If there is a PredicateMemo for the context then the result is shared
+  with any structurally equal predicate already applied to the same value.
+
+  Args:
+    pred: [ValuePredicate] The predicate to apply.
+    context: [ExecutionContext] The context to apply the predicate in.
+    value: [any] The value to apply the predicate to.
+
+  Returns:
+    The PredicateResult from applying the predicate.
+  """
+  memo = get_predicate_memo(context)
+  if memo is None:
+    return pred(context, value)
+  return memo.apply(pred, context, value)
+
+
 class ValuePredicate(JsonSnapshotableEntity):
   """Base class denoting a predicate that determines if a JSON value is ok.
 
@@ -44,6 +217,114 @@ class ValuePredicate(JsonSnapshotableEntity):
         '__call__() needs to be specialized for {0}'.format(
             self.__class__.__name__))
 
+  # The plan returned by compile(), once it has been compiled.
+  __plan = None
+
+  # A tuple holding the structural_key(), once it has been determined.
+  __structural_key = None
+
+  def __getstate__(self):
+    """Pickles the predicate without its compiled plan or structural key.
+
+    The plan is typically a closure, which cannot be pickled. Both are
+    determined again when needed.
+    """
+    state = dict(self.__dict__)
+    state.pop('_ValuePredicate__plan', None)
+    state.pop('_ValuePredicate__structural_key', None)
+    return state
+
+  def check(self, context, value):
+    """Determine whether this predicate holds without explaining why.
+
+    This is equivalent to bool(self(context, value)) but runs the
+    compiled plan so it does not build the PredicateResult.
+
+    Args:
+      context: The evaluation context to consider within.
+      value: The value to consider.
+
+    Returns:
+      True if the value is valid, False if not.
+    """
+    return self.compile()(context, value)
+
+  def compile(self):
+    """Returns the execution plan that check() uses for this predicate.
+
+    The plan is compiled the first time it is needed then reused for every
+    value that is checked. Predicates are not modified once constructed,
+    so the plan remains valid for the lifetime of the predicate.
+
+    A specialized plan mirrors the __call__ of the class that specialized
+    _do_compile(). If a subclass overrides __call__ without also
+    specializing _do_compile() then the default plan is used instead so
+    that check() continues to agree with calling the predicate.
+
+    Returns:
+      A callable(context, value) returning True if the predicate holds.
+    """
+    plan = self.__plan
+    if plan is None:
+      if self.__compiles_own_call():
+        plan = self._do_compile()
+      else:
+        plan = ValuePredicate._do_compile(self)
+      self.__plan = plan
+    return plan
+
+  def __compiles_own_call(self):
+    """Determine if _do_compile() was written for this predicate's __call__."""
+    for klass in type(self).__mro__:
+      if '_do_compile' in klass.__dict__:
+        return type(self).__call__.__func__ is klass.__call__.__func__
+    return True
+
+  def _do_compile(self):
+    """Hook for specializing compile().
+
+    Specialized plans should resolve whatever they can ahead of time,
+    such as operands that do not depend on the context, and use the
+    compiled plans of any predicates they delegate to.
+
+    Returns:
+      The default plan, which calls the predicate and tests the result.
+    """
+    return lambda context, value: bool(self(context, value))
+
+  def structural_key(self):
+    """Returns a hashable key identifying what this predicate does.
+
+    Predicates with equal keys produce the same results for the same values
+    so can share them. Like compile(), this assumes the predicate is not
+    modified once constructed.
+
+    Returns:
+      The key, or None if this predicate is only the same as itself.
+    """
+    holder = self.__structural_key
+    if holder is None:
+      try:
+        holder = (self._make_structural_key(),)
+      except TypeError:
+        # Something the predicate depends on is not hashable.
+        holder = (None,)
+      self.__structural_key = holder
+    return holder[0]
+
+  def _make_structural_key(self):
+    """Hook for specializing structural_key().
+
+    Specialized keys should start with the predicate's class and include
+    everything that affects the results, using the module structural_key()
+    function for operands and component predicates. Specializations of
+    classes that have a key must extend it with any state they add.
+
+    Returns:
+      None, meaning that results are not shared with other instances.
+    """
+    return None
+
   def __repr__(self):
     """Specializes interface."""
     return str(self)
@@ -52,6 +333,63 @@ class ValuePredicate(JsonSnapshotableEntity):
     return not self.__eq__(pred)
 
 
+class PredicateMemo(object):
+  """Remembers the results of predicates over a single verification pass.
+
+  Predicates are interned by their structural key so that structurally
+  equal predicates, such as those repeated within different terms of an
+  OR, are only applied once to any given value. Values are identified by
+  their identity, so the values being verified must not change during the
+  pass. The memo keeps the predicates and values it has seen alive so
+  their identities cannot be reused for the duration of the pass.
+
+  A memo is not thread-safe and should only be used for a single pass.
+  """
+
+  def __init__(self):
+    # Map from structural key to the first predicate seen with that key.
+    self.__canonical = {}
+
+    # Map from id(pred) to (pred, canonical pred) for predicates seen.
+    self.__interned = {}
+
+    # Map from (id(canonical pred), id(value)) to (value, result).
+    self.__results = {}
+
+  def intern(self, pred):
+    """Returns the predicate seen first that is structurally equal to pred."""
+    entry = self.__interned.get(id(pred))
+    if entry is None:
+      key = pred.structural_key()
+      canonical = (pred if key is None
+                   else self.__canonical.setdefault(key, pred))
+      entry = (pred, canonical)
+      self.__interned[id(pred)] = entry
+    return entry[1]
+
+  def apply(self, pred, context, value, evaluate=None):
+    """Apply a predicate to a value unless it was already.
+
+    Args:
+      pred: [ValuePredicate] The predicate to apply.
+      context: [ExecutionContext] The context to apply the predicate in.
+      value: [any] The value to apply the predicate to.
+      evaluate: [callable()] If provided, this is called to produce the
+         result instead of calling the predicate, for callers that have
+         an equivalent but more efficient means of applying it.
+
+    Returns:
+      The result of applying pred, or an equivalent predicate, to the value.
+    """
+    result_key = (id(self.intern(pred)), id(value))
+    entry = self.__results.get(result_key)
+    if entry is None:
+      result = evaluate() if evaluate is not None else pred(context, value)
+      entry = (value, result)
+      self.__results[result_key] = entry
+    return entry[1]
+
+
 class PredicateResult(JsonSnapshotableEntity):
   """Base class for predicate results.
 
@@ -0,0 +1,197 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Bounds the memory retained by the sources of predicate results.
+
+Results such as PathResult and PathPredicateResult refer to the source
+object (typically an entire observation) they were derived from so that
+it can be reported. Results are kept for the lifetime of a test, so by
+default every observation verified stays in memory.
+
+If a global SourcePool is set then results refer to their source through
+a SourceReference from the pool instead. Results derived from the same
+source share the same reference, and the pool only retains a bounded
+number of the most recently referenced sources. Once a source is released
+from the pool its results report it as RELEASED_SOURCE.
+
+No SourcePool is set by default. If one is set, AgentTestCase releases
+all its sources when each test finishes.
+"""
+
+import collections
+import threading
+
+# pylint: disable=invalid-name
+# pylint: disable=global-statement
+_global_lock = threading.Lock()
+_global_source_pool = None
+
+
+# What results report in place of a source that is no longer retained.
+RELEASED_SOURCE = '<source no longer retained>'
+
+
+class SourceReference(object):
+  """Refers to a source object for as long as its SourcePool retains it."""
+
+  @property
+  def released(self):
+    """Whether the source is no longer retained."""
+    return self.__released
+
+  @property
+  def value(self):
+    """The source object, or RELEASED_SOURCE if no longer retained."""
+    return RELEASED_SOURCE if self.__released else self.__value
+
+  def __init__(self, value):
+    """Constructor.
+
+    Args:
+      value: [obj] The source object to refer to.
+    """
+    self.__value = value
+    self.__released = False
+
+  def _release(self):
+    """Stop retaining the source. This is called by the SourcePool."""
+    self.__value = None
+    self.__released = True
+
+
+class SourcePool(object):
+  """Shares references to sources, retaining only the most recently used."""
+
+  @property
+  def max_retained(self):
+    """The maximum number of sources that are retained."""
+    return self.__max_retained
+
+  @property
+  def num_retained(self):
+    """The number of sources currently retained."""
+    with self.__lock:
+      return len(self.__references)
+
+  def __init__(self, max_retained=256):
+    """Constructor.
+
+    Args:
+      max_retained: [int] The number of distinct sources to retain.
+    """
+    if max_retained < 1:
+      raise ValueError(
+          'max_retained={0} must be positive'.format(max_retained))
+    self.__max_retained = max_retained
+    self.__lock = threading.Lock()
+
+    # Map from id(source) to its SourceReference, least recently used first.
+    self.__references = collections.OrderedDict()
+
+  def reference(self, value):
+    """Returns the SourceReference for a source object.
+
+    Args:
+      value: [obj] The source object.
+
+    Returns:
+      The SourceReference shared by all the results referring to value.
+    """
+    key = id(value)
+    with self.__lock:
+      ref = self.__references.pop(key, None)
+      if ref is None:
+        ref = SourceReference(value)
+      self.__references[key] = ref
+      while len(self.__references) > self.__max_retained:
+        _, oldest = self.__references.popitem(last=False)
+        oldest._release()  # pylint: disable=protected-access
+    return ref
+
+  def release_all(self):
+    """Stop retaining all the sources, such as at the end of a test."""
+    with self.__lock:
+      references = self.__references
+      self.__references = collections.OrderedDict()
+    for ref in references.values():
+      ref._release()  # pylint: disable=protected-access
+
+
+def get_global_source_pool():
+  """Returns the global SourcePool, or None if sources are always retained."""
+  return _global_source_pool
+
+
+def set_global_source_pool(pool):
+  """Sets the global SourcePool used by results created from now on.
+
+  Args:
+    pool: [SourcePool] The pool to use, or None to always retain sources.
+  """
+  global _global_source_pool
+  with _global_lock:
+    _global_source_pool = pool
+
+
+def refer_to_source(value):
+  """Returns what a result should hold to refer to a source object.
+
+  Args:
+    value: [obj] The source object.
+
+  Returns:
+    A SourceReference from the global pool if there is one and value is
+    not a simple value, otherwise value itself.
+  """
+  pool = _global_source_pool
+  if (pool is None or value is None
+      or isinstance(value, (basestring, int, long, float, bool))):
+    return value
+  return pool.reference(value)
+
+
+def resolve_source(held):
+  """Returns the source object held by a result.
+
+  Args:
+    held: [obj] The value returned by refer_to_source.
+
+  Returns:
+    The source object, or RELEASED_SOURCE if it is no longer retained.
+  """
+  if isinstance(held, SourceReference):
+    return held.value
+  return held
+
+
+def same_source(held, other_held):
+  """Determines whether two results refer to equal source objects.
+
+  Sources that are no longer retained cannot be compared so are considered
+  unequal to everything but the reference they were released from.
+
+  Args:
+    held: [obj] The value returned by refer_to_source for one source.
+    other_held: [obj] The value returned by refer_to_source for the other.
+
+  Returns:
+    True if the sources are known to be equal.
+  """
+  if held is other_held:
+    return True
+  if ((isinstance(held, SourceReference) and held.released)
+      or (isinstance(other_held, SourceReference) and other_held.released)):
+    return False
+  return resolve_source(held) == resolve_source(other_held)
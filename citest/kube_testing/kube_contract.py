@@ -16,28 +16,114 @@
 """Provides a means for specifying and verifying expectations of Kubernetes."""
 
 # Standard python modules.
-import json
 import logging
-import traceback
+import re
 
 # Our modules.
 from .. import json_predicate as jp
 from .. import json_contract as jc
 from ..service_testing import cli_agent
 
+
+# The label keys and values, and the field values, that can be selected on.
+_SELECTOR_TOKEN_RE = re.compile(r'^[A-Za-z0-9._/-]*$')
+
+# The fields that kubectl can select on for every resource type.
+_SELECTABLE_FIELDS = ['name', 'namespace']
+
+# The flags that already select which resources kubectl returns.
+_LABEL_SELECTOR_FLAGS = ['-l', '--selector']
+_FIELD_SELECTOR_FLAGS = ['--field-selector']
+
+# The kubectl get flags whose value can be given as the following argument.
+_FLAGS_WITH_VALUES = ['-n', '--namespace', '-l', '--selector',
+                      '--field-selector', '-o', '--output', '-L',
+                      '--label-columns', '--sort-by', '--template',
+                      '--context', '--cluster', '--kubeconfig', '--user',
+                      '--server', '-f', '--filename', '--chunk-size']
+
+
+def _names_resources(args):
+  """Determine if kubectl arguments name the specific resources to get.
+
+  kubectl does not accept selectors together with resource names.
+  Arguments that are not strings (e.g. callables evaluated later) are
+  assumed to name resources.
+  """
+  expect_value = False
+  for arg in args:
+    if expect_value:
+      expect_value = False
+    elif not isinstance(arg, basestring):
+      return True
+    elif arg.startswith('-'):
+      expect_value = '=' not in arg and arg in _FLAGS_WITH_VALUES
+    else:
+      return True
+  return False
+
+
+def make_kube_selector_args(pred, extra_args=None):
+  """Translate the simple conditions of a predicate into kubectl selectors.
+
+  Conditions on metadata labels become a --selector and conditions on the
+  metadata name or namespace become a --field-selector.
+
+  Args:
+    pred: [ValuePredicate] The predicate that observed resources must satisfy.
+    extra_args: [list of string] The arguments already given to kubectl.
+       A selector is not added if these already have one of its kind.
+       No selectors are added if these name specific resources.
+
+  Returns:
+    A list of kubectl arguments selecting every resource that pred accepts.
+    This may be empty.
+  """
+  extra_args = extra_args or []
+  if _names_resources(extra_args):
+    return []
+  labels = []
+  fields = []
+  for term in jp.find_equality_terms(pred):
+    if (not isinstance(term.value, basestring)
+        or not _SELECTOR_TOKEN_RE.match(term.value)
+        or len(term.fields) < 2 or term.fields[0] != 'metadata'):
+      continue
+    if (len(term.fields) == 3 and term.fields[1] == 'labels'
+        and _SELECTOR_TOKEN_RE.match(term.fields[2])):
+      labels.append('{0}={1}'.format(term.fields[2], term.value))
+    elif len(term.fields) == 2 and term.fields[1] in _SELECTABLE_FIELDS:
+      fields.append('metadata.{0}={1}'.format(term.fields[1], term.value))
+
+  def has_flag(flags):
+    return any(isinstance(arg, basestring) and arg.startswith(tuple(flags))
+               for arg in extra_args)
+
+  args = []
+  if labels and not has_flag(_LABEL_SELECTOR_FLAGS):
+    args.append('--selector=' + ','.join(labels))
+  if fields and not has_flag(_FIELD_SELECTOR_FLAGS):
+    args.append('--field-selector=' + ','.join(fields))
+  return args
+
 class KubeObjectObserver(jc.ObjectObserver):
   """Observe Kubernetes resources."""
 
-  def __init__(self, kubectl, args, filter=None):
+  def __init__(self, kubectl, args, filter=None, item_filter=None):
     """Construct observer.
 
     Args:
       kubectl: KubeCtlAgent instance to use.
       args: Command-line argument list to execute.
+      filter: [ValuePredicate] Filters the documents that kubectl returns.
+      item_filter: [ValuePredicate] Filters the items of the List documents
+         that kubectl returns. Documents that are not lists are filtered
+         as if they were an item.
     """
     super(KubeObjectObserver, self).__init__(filter)
     self.__kubectl = kubectl
     self.__args = args
+    self.__item_filter = item_filter
 
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
@@ -47,29 +133,47 @@ class KubeObjectObserver(jc.ObjectObserver):
   def __str__(self):
     return 'KubeObjectObserver({0})'.format(self.__args)
 
+  def get_cache_key(self, context):
+    """Implements ObjectObserver interface."""
+    return self._make_cache_key(id(self.__kubectl), context.eval(self.__args))
+
   def collect_observation(self, context, observation, trace=True):
     args = context.eval(self.__args)
-    kube_response = self.__kubectl.run(args, trace=trace)
+    kube_response, doc, vex = self.__kubectl.run_and_decode_json(
+        args, trace=trace)
     if not kube_response.ok():
       observation.add_error(
           cli_agent.CliAgentRunError(self.__kubectl, kube_response))
       return []
 
-    decoder = json.JSONDecoder()
-    try:
-      doc = decoder.decode(kube_response.output)
-      if not isinstance(doc, list):
-        doc = [doc]
-      self.filter_all_objects_to_observation(context, doc, observation)
-    except ValueError as vex:
+    if vex is not None:
       error = 'Invalid JSON in response: %s' % str(kube_response)
       logging.getLogger(__name__).info('%s\n%s\n----------------\n',
-                                       error, traceback.format_exc())
+                                       error, vex)
       observation.add_error(jp.JsonError(error, vex))
       return []
 
+    if self.__item_filter is not None:
+      doc = [self.__filter_items(context, elem) for elem in doc]
+      doc = [elem for elem in doc if elem is not None]
+    self.filter_all_objects_to_observation(context, doc, observation)
     return observation.objects
 
+  def __filter_items(self, context, doc):
+    """Apply the item filter to a document kubectl returned.
+
+    Returns:
+      A copy of a List document with only the items the filter accepts,
+      or the document itself if it is not a list and the filter accepts it,
+      otherwise None.
+    """
+    if isinstance(doc, dict) and isinstance(doc.get('items'), list):
+      result = dict(doc)
+      result['items'] = [item for item in doc['items']
+                         if self.__item_filter(context, item)]
+      return result
+    return doc if self.__item_filter(context, doc) else None
+
 
 class KubeObjectFactory(object):
   # pylint: disable=too-few-public-methods
@@ -77,21 +181,29 @@ class KubeObjectFactory(object):
   def __init__(self, kubectl):
     self.__kubectl = kubectl
 
-  def new_get_resources(self, type, extra_args=None):
+  def new_get_resources(self, type, extra_args=None, object_filter=None):
     """Specify a resource list to be returned later.
 
     Args:
       type: kubectl's name for the Kubernetes resource type.
+      object_filter: [ValuePredicate] If not None then only observe the
+         resources satisfying this predicate. Where possible kubectl selects
+         the resources itself as well.
 
     Returns:
       A jc.ObjectObserver to return the specified resource list when called.
     """
     if extra_args is None:
       extra_args = []
+    # kubectl get TYPE/NAME names a specific resource.
+    if (object_filter is not None and isinstance(type, basestring)
+        and '/' not in type):
+      extra_args = extra_args + make_kube_selector_args(
+          object_filter, extra_args)
 
     cmd = self.__kubectl.build_kubectl_command_args(
         action='get', resource=type, args=['--output=json'] + extra_args)
-    return KubeObjectObserver(self.__kubectl, cmd)
+    return KubeObjectObserver(self.__kubectl, cmd, item_filter=object_filter)
 
 
 class KubeClauseBuilder(jc.ContractClauseBuilder):
@@ -117,7 +229,8 @@ class KubeClauseBuilder(jc.ContractClauseBuilder):
     self.__factory = KubeObjectFactory(kubectl)
     self.__strict = strict
 
-  def get_resources(self, type, extra_args=None, no_resource_ok=False):
+  def get_resources(self, type, extra_args=None, no_resource_ok=False,
+                    object_filter=None):
     """Observe resources of a particular type.
 
     This ultimately calls a "kubectl ... get |type| |extra_args|"
@@ -127,9 +240,11 @@ class KubeClauseBuilder(jc.ContractClauseBuilder):
           If the resource is not required, "not found" is treated as a valid
           check. Because resource deletion is asynchronous, there is no
           explicit API here to confirm that a resource does not exist.
+      object_filter: [ValuePredicate] If not None then only observe the
+          resources satisfying this predicate. See new_get_resources.
     """
     self.observer = self.__factory.new_get_resources(
-        type, extra_args=extra_args)
+        type, extra_args=extra_args, object_filter=object_filter)
 
     if no_resource_ok:
       # Unfortunately gcloud does not surface the actual 404 but prints an
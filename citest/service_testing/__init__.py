@@ -51,9 +51,12 @@ from http_agent import (
     HttpDeleteOperation,
     HttpOperationStatus,
     HttpPostOperation,
+    HttpRequestType,
     HttpResponseType,
     SynchronousHttpOperationStatus)
 
+from http_connection_pool import HttpConnectionPool
+
 from http_observer import (
     HttpObjectObserver,
     HttpContractBuilder,
@@ -67,6 +70,10 @@ from http_scrubber import (
 
 # The operation_contract module combines AgentOperation and JsonContract.
 from operation_contract import OperationContract
+from operation_contract_scheduler import OperationContractScheduler
+from deferred_cleanup import (
+    DeferredCleanupQueue,
+    DeferredCleanupResult)
 
 # A NoOpOperation can be used to create a contract for an invariant.
 from nop_operation import NoOpOperation
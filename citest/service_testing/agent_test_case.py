@@ -31,9 +31,9 @@ but can be changed with --log_filename and --log_dir.
 
 
 # Standard python modules.
-from multiprocessing.pool import ThreadPool
 import logging
 import os
+import threading
 import time
 import traceback as traceback_module
 
@@ -43,8 +43,12 @@ from ..base import (
     BaseTestCase,
     ConfigurationBindingsBuilder,
     ExecutionContext,
+    FixedIntervalRetryPolicy,
     JournalLogger,
-    JsonSnapshotableEntity)
+    JsonSnapshotableEntity,
+    map_with_captured_journals)
+from ..json_predicate import source_pool
+from .operation_contract_scheduler import OperationContractScheduler
 
 
 _DEFAULT_TEST_ID = os.environ.get('CITEST_TEST_ID', time.strftime('%H%M%S'))
@@ -54,6 +58,16 @@ _DEFAULT_TEST_ID = os.environ.get('CITEST_TEST_ID', time.strftime('%H%M%S'))
 _DURATION_PRECISION = 3  # millis
 
 
+def _copy_context_key(source, target, key):
+  """Make key in the target context the same as it is in the source."""
+  if key not in source:
+    target.clear_key(key)
+  elif key in dict(source.snapshotable_items()):
+    target.set_snapshotable(key, source[key])
+  else:
+    target.set_internal(key, source[key])
+
+
 class OperationContractExecutionAttempt(JsonSnapshotableEntity):
   """Represents an individual attempt at running an OperationContract test case.
 
@@ -369,6 +383,21 @@ class AgentTestCase(BaseTestCase):
     super(AgentTestCase, self).__init__(methodName=methodName)
     self.__testing_agent = None
 
+  def __call__(self, result=None):
+    """Runs the test, releasing the global SourcePool once it finishes.
+
+    No SourcePool is set by default. If one has been set then the results
+    of the test refer to the observations they verified through it, and its
+    sources are released once the test finishes so that the observations
+    of one test are not retained while running the next.
+    """
+    try:
+      return super(AgentTestCase, self).__call__(result)
+    finally:
+      pool = source_pool.get_global_source_pool()
+      if pool is not None:
+        pool.release_all()
+
   def assertContract(self, context, contract):
     """Verify the specified contract holds, raise and exception if not."""
     # pylint: disable=invalid-name
@@ -457,7 +486,8 @@ class AgentTestCase(BaseTestCase):
 
   def run_test_case_list(
       self, context, test_case_list, max_concurrent, timeout_ok=False,
-      max_retries=0, retry_interval_secs=5, full_trace=False):
+      max_retries=0, retry_interval_secs=5, full_trace=False,
+      retry_policy=None, cleanup_handler=None):
     """Run a list of test cases.
 
     Args:
@@ -471,10 +501,20 @@ class AgentTestCase(BaseTestCase):
          indicates that a test should only be given a single attempt.
       retry_interval_secs: [int] Time between retries of individual operations.
       full_trace: [bool] If True then provide detailed execution tracing.
+      retry_policy: [RetryPolicy] If provided, overrides retry_interval_secs
+         and also paces polling the operation status.
+      cleanup_handler: [callable(OperationContract, ExecutionContext)]
+         If provided, the test case cleanups are handed to this rather than
+         performed directly (e.g. DeferredCleanupQueue.add).
     """
     num_threads = min(max_concurrent, len(test_case_list))
-    pool = ThreadPool(processes=num_threads)
-    def run_one(test_case, **kwargs):
+    kwargs = {'timeout_ok': timeout_ok,
+              'max_retries': max_retries,
+              'retry_interval_secs': retry_interval_secs,
+              'full_trace': full_trace,
+              'retry_policy': retry_policy,
+              'cleanup_handler': cleanup_handler}
+    def run_one(test_case):
       """Helper function to run individual tests."""
       kwargs_copy = dict(kwargs)
       self.run_test_case(
@@ -483,9 +523,81 @@ class AgentTestCase(BaseTestCase):
     self.logger.info(
         'Running %d tests across %d threads.',
         len(test_case_list), num_threads)
-    pool.map(run_one, test_case_list)
+    map_with_captured_journals(run_one, test_case_list, num_threads)
     self.logger.info('Finished %d tests.', len(test_case_list))
 
+  def run_test_case_graph(self, context, test_case_list, max_concurrent,
+                          **kwargs):
+    """Run a list of test cases according to their declared dependencies.
+
+    Each test case is run as soon as the test cases it depends on have
+    passed (see OperationContract creates, consumes, deletes and
+    predecessors). Test cases depending on a test case that did not pass
+    are skipped. The cleanups are deferred until all the test cases have
+    finished and then run in reverse topological order so that resources
+    are not removed while dependent test cases still need them.
+
+    Args:
+      context: [ExecutionContext] The citest execution context to run in.
+         Each test case runs in its own copy of this context, made when
+         the test case starts. The values that a test case's
+         status_extractor sets are also set here so that they are available
+         to the test cases depending on it.
+      test_case_list: [list of OperationContract] Specifies the tests to run.
+      max_concurrent: [int] The number of cases that can be run concurrently.
+      kwargs: [kwargs] Additional arguments to run_test_case.
+
+    Raises:
+      AssertionError if any test case did not pass.
+    """
+    scheduler = OperationContractScheduler(test_case_list)
+    deferred_cleanups = []
+    def defer_cleanup(test_case, test_context):
+      """Holds on to the cleanup until all the tests have finished."""
+      deferred_cleanups.append((test_case, test_context))
+
+    def publish_status(test_context, keys):
+      """Shares the values a status_extractor set with later test cases."""
+      with scheduler.lock:
+        for key in keys:
+          _copy_context_key(test_context, context, key)
+
+    def run_one(test_case):
+      """Helper function to run individual tests."""
+      with scheduler.lock:
+        test_context = context.copy()
+      kwargs_copy = dict(kwargs)
+      kwargs_copy['cleanup_handler'] = defer_cleanup
+      kwargs_copy['status_handler'] = publish_status
+      self.run_test_case(
+          test_case=test_case, context=test_context, **kwargs_copy)
+
+    try:
+      outcomes = scheduler.run(run_one, max_concurrent)
+    finally:
+      order = {id(case): index
+               for index, case in enumerate(scheduler.topological_order)}
+      deferred_cleanups.sort(key=lambda entry: -order[id(entry[0])])
+      for test_case, test_context in deferred_cleanups:
+        self.logger.info('Invoking deferred cleanup for "%s".',
+                         test_case.title)
+        try:
+          test_case.cleanup(test_context)
+        except Exception as ex:
+          self.logger.error('Cleanup for "%s" failed: %s', test_case.title, ex)
+          self.logger.debug('Exception was at:\n%s',
+                            traceback_module.format_exc())
+
+    not_passed = ['{0} {1}'.format(outcome, case.title)
+                  for case, outcome in outcomes
+                  if outcome != OperationContractScheduler.PASSED]
+    self.logger.info('Finished %d tests.', len(test_case_list))
+    if not_passed:
+      raise AssertionError(
+          '{0} of {1} tests did not pass:\n  {2}'.format(
+              len(not_passed), len(test_case_list),
+              '\n  '.join(not_passed)))
+
   # context will be required later, but for transition period
   # keep it optional so that we dont need to update all the tests yet.
   def run_test_case(self, test_case, context=None, **kwargs):
@@ -506,6 +618,23 @@ class AgentTestCase(BaseTestCase):
           use the default tracing. The intent here is to be able to crank up
           the tracing when needed but not be overwhelmed by data when the
           default tracing is typically sufficient.
+      retry_policy: [RetryPolicy] Determines the time between retries,
+          overriding retry_interval_secs. This is also used to pace polling
+          the operation status while waiting for it to complete.
+      cleanup_handler: [callable(OperationContract, ExecutionContext)]
+          If provided, this is given the test case and a copy of the context
+          in place of calling the test case's cleanup directly. This allows
+          the caller to defer the cleanup until later, such as with a
+          DeferredCleanupQueue.
+      status_handler: [callable(ExecutionContext, list of string)]
+          If provided, this is given the context and the keys that the test
+          case's status_extractor changed in it each time the extractor is
+          called.
+      overlap_verification: [bool] If true then start observing the contract
+          while the operation is still running rather than waiting for it to
+          complete first. The contract is still only satisfied by
+          observations made after the operation completed. This reduces
+          latency when testing eventually consistent systems.
     """
     if context is None:
       context = ExecutionContext()
@@ -513,6 +642,10 @@ class AgentTestCase(BaseTestCase):
     max_retries = kwargs.pop('max_retries', 0)
     retry_interval_secs = kwargs.pop('retry_interval_secs', 5)
     full_trace = kwargs.pop('full_trace', False)
+    retry_policy = kwargs.pop('retry_policy', None)
+    cleanup_handler = kwargs.pop('cleanup_handler', None)
+    status_handler = kwargs.pop('status_handler', None)
+    overlap_verification = kwargs.pop('overlap_verification', False)
     if kwargs:
       raise TypeError('Unrecognized arguments {0}'.format(kwargs.keys()))
 
@@ -525,6 +658,8 @@ class AgentTestCase(BaseTestCase):
           'retry_interval_secs={secs} cannot be negative'.format(
               secs=retry_interval_secs))
 
+    operation_retry_policy = (retry_policy
+                              or FixedIntervalRetryPolicy(retry_interval_secs))
     execution_trace = OperationContractExecutionTrace(test_case)
     verify_results = None
     final_status_ok = None
@@ -538,48 +673,76 @@ class AgentTestCase(BaseTestCase):
           _title='Operation "{0}" Specification'.format(
               test_case.operation.title))
       max_tries = 1 + max_retries
-
-      # We attempt the operation on the agent multiple times until the agent
-      # thinks that it succeeded. But we will only verify once the agent thinks
-      # it succeeded. We do not give multiple chances to satisfy the
-      # verification.
-      for i in range(max_tries):
-        context.clear_key('OperationStatus')
-        context.clear_key('AttemptInfo')
-        attempt_info = execution_trace.new_attempt()
-        status = None
-        status = test_case.operation.execute(agent=self.testing_agent)
-        status.wait(trace_every=full_trace)
-
-        summary = status.error or ('Operation status OK' if status.finished_ok
-                                   else 'Operation status Unknown')
-        # Write the status (and attempt_info) into the execution_context
-        # to make it available to contract verifiers. For example, to
-        # make specific details in the status (e.g. new resource names)
-        # available to downstream validators for their consideration.
-        context.set_internal('AttemptInfo', attempt_info)
-        context.set_internal('OperationStatus', status)
-
-        attempt_info.set_status(status, summary)
-        if test_case.status_extractor:
-          test_case.status_extractor(status, context)
-
-        if not status.exception_details:
-          execution_trace.set_operation_summary('Completed test.')
-          break
-        if max_tries - i > 1:
-          self.logger.warning(
-              'Got an exception: %s.\nTrying again in %r secs...',
-              status.exception_details, retry_interval_secs)
-          time.sleep(retry_interval_secs)
-        elif max_tries > 1:
-          execution_trace.set_operation_summary('Gave up retrying operation.')
-          self.logger.error('Giving up retrying test.')
+      latest = {'status': None, 'attempt_info': None}
+
+      def run_attempts():
+        """Perform the operation until the agent thinks that it succeeded."""
+        retry_sleep_secs = None
+
+        # We attempt the operation on the agent multiple times until the
+        # agent thinks that it succeeded. But we will only verify once the
+        # agent thinks it succeeded. We do not give multiple chances to
+        # satisfy the verification.
+        for i in range(max_tries):
+          context.clear_key('OperationStatus')
+          context.clear_key('AttemptInfo')
+          attempt_info = execution_trace.new_attempt()
+          latest['attempt_info'] = attempt_info
+          latest['status'] = None
+          status = test_case.operation.execute(agent=self.testing_agent)
+          latest['status'] = status
+          status.wait(trace_every=full_trace, retry_policy=retry_policy)
+
+          summary = status.error or (
+              'Operation status OK' if status.finished_ok
+              else 'Operation status Unknown')
+          # Write the status (and attempt_info) into the execution_context
+          # to make it available to contract verifiers. For example, to
+          # make specific details in the status (e.g. new resource names)
+          # available to downstream validators for their consideration.
+          context.set_internal('AttemptInfo', attempt_info)
+          context.set_internal('OperationStatus', status)
+
+          attempt_info.set_status(status, summary)
+          if test_case.status_extractor:
+            versions = context.key_versions()
+            test_case.status_extractor(status, context)
+            if status_handler:
+              status_handler(
+                  context,
+                  [key for key, version in context.key_versions().items()
+                   if versions.get(key, 0) != version])
+
+          if not status.exception_details:
+            execution_trace.set_operation_summary('Completed test.')
+            break
+          if max_tries - i > 1:
+            retry_sleep_secs = operation_retry_policy.next_sleep_secs(
+                i, prev_sleep_secs=retry_sleep_secs,
+                hint_secs=status.retry_hint_secs)
+            self.logger.warning(
+                'Got an exception: %s.\nTrying again in %r secs...',
+                status.exception_details, retry_sleep_secs)
+            time.sleep(retry_sleep_secs)
+          elif max_tries > 1:
+            execution_trace.set_operation_summary(
+                'Gave up retrying operation.')
+            self.logger.error('Giving up retrying test.')
 
       # We're always going to verify the contract, even if the request itself
       # failed. We set the verification on the attempt here, but do not assert
       # anything. We'll assert below outside this try/catch handler.
-      verify_results = test_case.contract.verify(context)
+      try:
+        if overlap_verification:
+          verify_results = self.__run_attempts_overlapping_verification(
+              test_case, context, run_attempts, latest)
+        else:
+          run_attempts()
+          verify_results = test_case.contract.verify(context)
+      finally:
+        status = latest['status']
+        attempt_info = latest['attempt_info']
+
       execution_trace.set_verify_results(verify_results)
       final_status_ok = self.verify_final_status_ok(
           status, timeout_ok=timeout_ok,
@@ -618,6 +781,9 @@ class AgentTestCase(BaseTestCase):
           if status is None:
             self.logger.info('Skipping operation cleanup because'
                              ' operation could not be performed at all.')
+          elif cleanup_handler:
+            self.logger.info('Deferring injected operation cleanup.')
+            cleanup_handler(test_case, context.copy())
           else:
             self.logger.info('Invoking injected operation cleanup.')
             test_case.cleanup(context)
@@ -629,3 +795,43 @@ class AgentTestCase(BaseTestCase):
 
     if verify_results is not None:
       self.assertVerifyResults(verify_results)
+
+  def __run_attempts_overlapping_verification(
+      self, test_case, context, run_attempts, latest):
+    """Run the operation in the background while verifying the contract.
+
+    The operation and verification each capture their journal entries so
+    that they can be written into the journal afterwards without their
+    contexts interleaving.
+
+    Args:
+      test_case: [OperationContract] The test case being run.
+      context: [ExecutionContext] The citest execution context to run in.
+      run_attempts: [callable()] Performs the operation attempts.
+      latest: [dict] Holds the 'status' and 'attempt_info' of the latest
+         attempt.
+
+    Returns:
+      The ContractVerifyResult.
+    """
+    completed = threading.Event()
+
+    def run_operation():
+      """Performs the operation attempts, then notes they completed."""
+      try:
+        run_attempts()
+      except BaseException as ex:
+        attempt_info = latest['attempt_info']
+        if attempt_info is not None and not attempt_info.completed:
+          attempt_info.set_exception(ex, traceback_module.format_exc())
+        raise
+      finally:
+        completed.set()
+
+    def verify_contract():
+      """Verifies the contract as the operation is performed."""
+      return test_case.contract.verify(context, operation_completed=completed)
+
+    _, verify_results = map_with_captured_journals(
+        lambda func: func(), [run_operation, verify_contract], 2)
+    return verify_results
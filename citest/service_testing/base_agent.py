@@ -30,6 +30,7 @@ import logging
 import sys
 import time
 
+from ..base import FixedIntervalRetryPolicy
 from ..base import JsonScrubber
 from ..base import JsonSnapshotableEntity
 from ..base import JournalLogger
@@ -164,6 +165,14 @@ class AgentOperationStatus(JsonSnapshotableEntity):
     """Contains a guess of the cause of the error."""
     return None
 
+  @property
+  def retry_hint_secs(self):
+    """A hint from the service as to how long to wait before polling again.
+
+    None indicates no hint (e.g. the service did not send a Retry-After).
+    """
+    return None
+
   @property
   def operation(self):
     """A reference to the AgentOperation this status is for."""
@@ -217,7 +226,7 @@ class AgentOperationStatus(JsonSnapshotableEntity):
         self.__class__.__name__ + '.refresh() needs to be specialized.')
 
   def wait(self, poll_every_secs=1, max_secs=None,
-           trace_every=False, trace_first=True):
+           trace_every=False, trace_first=True, retry_policy=None):
     """Wait until the status reaches a final state.
 
     Args:
@@ -226,6 +235,8 @@ class AgentOperationStatus(JsonSnapshotableEntity):
           0 is a poll, None is unbounded. Otherwise, number of seconds.
       trace_every: [bool] Whether or not to log every poll request.
       trace_first: [bool] Whether to log the first poll request.
+      retry_policy: [RetryPolicy] Determines the interval between refresh()
+          calls. If None then poll at a fixed interval of poll_every_secs.
     """
     if self.finished:
       return
@@ -240,16 +251,18 @@ class AgentOperationStatus(JsonSnapshotableEntity):
     context_relation = 'ERROR'
     try:
       self.refresh(trace=trace_first)
-      self.__wait_helper(poll_every_secs, max_secs, trace_every)
+      self.__wait_helper(
+          retry_policy or FixedIntervalRetryPolicy(poll_every_secs),
+          max_secs, trace_every)
       context_relation = 'VALID' if self.finished_ok else 'INVALID'
     finally:
       JournalLogger.end_context(relation=context_relation)
 
-  def __wait_helper(self, poll_every_secs, max_secs, trace):
+  def __wait_helper(self, retry_policy, max_secs, trace):
     """Helper function for wait to keep its try/finally block simple.
 
     Args:
-      poll_every_secs: [float] Frequency to poll.
+      retry_policy: [RetryPolicy] Determines how long to wait between polls.
       max_secs: [float] How long to poll before giving up. None is indefinite.
       trace_every: [bool] Whether to log each attempt.
     """
@@ -257,6 +270,8 @@ class AgentOperationStatus(JsonSnapshotableEntity):
     now = self._now()
     end_time = sys.float_info.max if max_secs is None else now + max_secs
     next_log_secs = now + 60
+    attempt = 0
+    sleep_secs = None
     while not self.finished:
         # pylint: disable=bad-indentation
         now = self._now()
@@ -265,8 +280,11 @@ class AgentOperationStatus(JsonSnapshotableEntity):
           logger.debug('Timed out')
           return False
 
-        sleep_secs = (poll_every_secs if max_secs is None
-                      else min(secs_remaining, poll_every_secs))
+        sleep_secs = retry_policy.next_sleep_secs(
+            attempt, prev_sleep_secs=sleep_secs,
+            secs_remaining=None if max_secs is None else secs_remaining,
+            hint_secs=self.retry_hint_secs)
+        attempt += 1
 
         # Write something into the log file to indicate we are still here.
         if now >= next_log_secs:
@@ -14,11 +14,15 @@
 
 
 import collections
+import json
 import re
 import subprocess
+import threading
 
 from ..base import JournalLogger
+from ..base import JsonScrubber
 from ..base import JsonSnapshotableEntity
+from ..base import iter_json_values
 from .. import json_contract as jc
 from . import base_agent
 
@@ -168,15 +172,7 @@ class CliAgent(base_agent.BaseAgent):
     Returns:
       CliResponseType tuple containing program execution results.
     """
-    command = self._args_to_full_commandline(args)
-    log_msg = 'spawn {0} "{1}"'.format(command[0], '" "'.join(command[1:]))
-    JournalLogger.journal_or_log(log_msg,
-                                 _module=self.logger.name, _alwayslog=trace,
-                                 _context='request')
-
-    process = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE, stderr=subprocess.PIPE, close_fds=True)
+    process = self.__spawn(args, trace)
     stdout, stderr = process.communicate()
 
     scrubber = output_scrubber or self.__output_scrubber
@@ -209,6 +205,88 @@ class CliAgent(base_agent.BaseAgent):
 
     return CliResponseType(code, stdout, stderr)
 
+  def run_and_decode_json(self, args, trace=True):
+    """Run the specified command and decode the JSON it writes to stdout.
+
+    When not tracing, the output is decoded as the program writes it so
+    that its full text is never held. The response output is then empty.
+    This requires that any output scrubber be a JsonScrubber, which is
+    applied to each decoded value instead, and that run() is not
+    overridden. Otherwise the output is decoded after run() returns it.
+
+    Args:
+      args: The list of command-line arguments for self.__program.
+      trace: If True then we should trace the call/response.
+
+    Returns:
+      A tuple of the CliResponseType, the list of decoded values, and the
+      error if the output was not JSON. The values are the elements of the
+      output if it is a JSON list, otherwise the output value. The values
+      and error are None if the program failed.
+    """
+    scrubber = self.__output_scrubber
+    if (trace or not isinstance(scrubber, (JsonScrubber, type(None)))
+        or type(self).run.__func__ is not CliAgent.run.__func__):
+      response = self.run(args, trace=trace)
+      if not response.ok():
+        return response, None, None
+      try:
+        doc = json.JSONDecoder().decode(response.output)
+      except (ValueError, UnicodeError) as ex:
+        return response, None, ex
+      return response, doc if isinstance(doc, list) else [doc], None
+
+    process = self.__spawn(args, trace)
+    stderr_chunks = []
+    stderr_reader = threading.Thread(
+        target=lambda: stderr_chunks.append(process.stderr.read()))
+    stderr_reader.daemon = True
+    stderr_reader.start()
+
+    values = []
+    error = None
+    try:
+      for value in iter_json_values(process.stdout):
+        if scrubber is not None and isinstance(value, (dict, list)):
+          value = scrubber(value)
+        values.append(value)
+    except (ValueError, UnicodeError) as ex:
+      values = None
+      error = ex
+      # Let the program finish rather than blocking on its output.
+      while process.stdout.read(1024):
+        pass
+    process.wait()
+    stderr_reader.join()
+
+    stderr = ''.join(stderr_chunks).strip()
+    code = process.returncode
+    if stderr:
+      JournalLogger.journal_or_log_detail(
+          'Result Code {0} / stderr'.format(code), stderr,
+          _module=self.logger.name, _alwayslog=trace, _context='response')
+    else:
+      JournalLogger.journal_or_log(
+          'Result Code {0} / stdout decoded as read'.format(code),
+          _module=self.logger.name, _alwayslog=trace, _context='response')
+
+    response = CliResponseType(code, '', stderr)
+    if not response.ok():
+      return response, None, None
+    return response, values, error
+
+  def __spawn(self, args, trace):
+    """Start the program with the given arguments, piping its output."""
+    command = self._args_to_full_commandline(args)
+    log_msg = 'spawn {0} "{1}"'.format(command[0], '" "'.join(command[1:]))
+    JournalLogger.journal_or_log(log_msg,
+                                 _module=self.logger.name, _alwayslog=trace,
+                                 _context='request')
+
+    return subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, close_fds=True)
+
 
 class CliRunOperation(base_agent.AgentOperation):
   """Specialization of AgentOperation that invokes a program."""
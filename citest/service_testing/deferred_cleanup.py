@@ -0,0 +1,256 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Defers OperationContract cleanups so they are off the critical path.
+
+A DeferredCleanupQueue collects the cleanups of test cases, along with the
+ExecutionContext each was run in, and performs them in parallel. This can
+be either in the background as the tests continue, or all at once when the
+queue is flushed (e.g. at the end of the suite).
+
+Typical usage is to pass the queue's add method as the cleanup_handler
+to AgentTestCase.run_test_case and flush the queue when done:
+
+    queue = DeferredCleanupQueue(max_concurrent=8, background=True)
+    self.run_test_case(test_case, context=context, cleanup_handler=queue.add)
+    ...
+    queue.flush()
+"""
+
+
+from multiprocessing.pool import ThreadPool
+import logging
+import threading
+import time
+import traceback
+
+from ..base import (
+    FixedIntervalRetryPolicy,
+    JournalLogger,
+    JsonSnapshotableEntity,
+    call_with_captured_journal,
+    get_global_journal,
+    map_with_captured_journals,
+    write_captured_outcomes)
+
+
+class DeferredCleanupResult(JsonSnapshotableEntity):
+  """Records the outcome of performing a deferred cleanup."""
+
+  @property
+  def test_case(self):
+    """The OperationContract whose cleanup this was."""
+    return self.__test_case
+
+  @property
+  def attempts(self):
+    """The number of times the cleanup was attempted."""
+    return self.__attempts
+
+  @property
+  def exception(self):
+    """The exception from the final attempt, or None if it succeeded."""
+    return self.__exception
+
+  @property
+  def traceback(self):
+    """The formatted traceback of the exception, if any."""
+    return self.__traceback
+
+  @property
+  def duration_secs(self):
+    """How long it took to perform the cleanup, including retries."""
+    return self.__duration_secs
+
+  def __init__(self, test_case, attempts, duration_secs,
+               exception=None, traceback=None):
+    """Constructor.
+
+    Args:
+      test_case: [OperationContract] The test case cleaned up.
+      attempts: [int] The number of attempts.
+      duration_secs: [float] The time spent performing the cleanup.
+      exception: [Exception] The final exception if the cleanup failed.
+      traceback: [string] The traceback for the final exception.
+    """
+    self.__test_case = test_case
+    self.__attempts = attempts
+    self.__duration_secs = duration_secs
+    self.__exception = exception
+    self.__traceback = traceback
+
+  def __nonzero__(self):
+    return self.__exception is None
+
+  def __str__(self):
+    return 'Cleanup of "{0}" {1} after {2} attempt(s)'.format(
+        self.__test_case.title,
+        'OK' if self else 'FAILED with {0}'.format(self.__exception),
+        self.__attempts)
+
+  def export_to_json_snapshot(self, snapshot, entity):
+    """Implements JsonSnapshotableEntity interface."""
+    builder = snapshot.edge_builder
+    entity.add_metadata('_title', 'Cleanup of "{0}"'.format(
+        self.__test_case.title))
+    entity.add_metadata('_default_relation',
+                        builder.determine_valid_relation(bool(self)))
+    builder.make(entity, 'Test Case', self.__test_case.title)
+    builder.make(entity, 'Attempts', self.__attempts)
+    builder.make(entity, 'Duration', round(self.__duration_secs, 3))
+    if self.__exception is not None:
+      builder.make_error(entity, 'Exception', self.__exception)
+      if self.__traceback is not None:
+        builder.make_error(entity, 'ExceptionTrace', self.__traceback,
+                           format='pre')
+
+
+class DeferredCleanupQueue(object):
+  """Performs test case cleanups in parallel, off the test's critical path.
+
+  The queue is thread-safe so can be shared by concurrently running tests.
+  """
+
+  @property
+  def num_pending(self):
+    """The number of cleanups that have been added but not yet flushed."""
+    with self.__lock:
+      return len(self.__pending)
+
+  def __init__(self, max_concurrent=4, max_retries=0, retry_policy=None,
+               background=False):
+    """Constructor.
+
+    Args:
+      max_concurrent: [int] The most cleanups to perform at the same time.
+      max_retries: [int] The number of times to retry a cleanup that raised
+         an exception.
+      retry_policy: [RetryPolicy] Determines the time between retries.
+         The default is every 5 seconds.
+      background: [bool] If True then start cleanups as soon as they are
+         added. Otherwise they are not started until flush() is called.
+    """
+    if max_concurrent < 1:
+      raise ValueError(
+          'max_concurrent={0} must be positive'.format(max_concurrent))
+    if max_retries < 0:
+      raise ValueError(
+          'max_retries={0} cannot be negative'.format(max_retries))
+
+    self.logger = logging.getLogger(__name__)
+    self.__max_concurrent = max_concurrent
+    self.__max_retries = max_retries
+    self.__retry_policy = retry_policy or FixedIntervalRetryPolicy(5)
+    self.__background = background
+    self.__lock = threading.Lock()
+    self.__pool = None
+
+    # List of (test_case, context, AsyncResult or None)
+    self.__pending = []
+
+  def add(self, test_case, context):
+    """Queue the cleanup of a test case.
+
+    This has the signature expected by AgentTestCase.run_test_case's
+    cleanup_handler.
+
+    Args:
+      test_case: [OperationContract] The test case to clean up.
+      context: [ExecutionContext] The context to pass to the cleanup.
+    """
+    if not test_case.cleanup:
+      return
+
+    with self.__lock:
+      async_result = None
+      if self.__background:
+        if self.__pool is None:
+          self.__pool = ThreadPool(processes=self.__max_concurrent)
+        async_result = self.__pool.apply_async(
+            call_with_captured_journal,
+            (get_global_journal(), self.__perform_cleanup, test_case, context))
+      self.__pending.append((test_case, context, async_result))
+
+  def flush(self):
+    """Perform all the pending cleanups and wait for them to finish.
+
+    The results are written into the journal.
+
+    Returns:
+      A list of DeferredCleanupResult in the order the cleanups were added.
+    """
+    with self.__lock:
+      pending = self.__pending
+      pool = self.__pool
+      self.__pending = []
+      self.__pool = None
+
+    if not pending:
+      return []
+
+    JournalLogger.begin_context(
+        'Deferred cleanup of {0} test case(s)'.format(len(pending)))
+    context_relation = 'ERROR'
+    try:
+      if pool is None:
+        results = map_with_captured_journals(
+            lambda entry: self.__perform_cleanup(entry[0], entry[1]),
+            pending, self.__max_concurrent)
+      else:
+        outcomes = [entry[2].get() for entry in pending]
+        pool.close()
+        pool.join()
+        results = write_captured_outcomes(get_global_journal(), outcomes)
+
+      for result in results:
+        JournalLogger.delegate('store', result, _title=str(result))
+        if result:
+          self.logger.info('%s', result)
+        else:
+          self.logger.error('%s', result)
+      context_relation = 'VALID' if all(results) else 'INVALID'
+    finally:
+      JournalLogger.end_context(relation=context_relation)
+    return results
+
+  def __perform_cleanup(self, test_case, context):
+    """Perform the cleanup of an individual test case, with retries.
+
+    This runs in a worker thread with its journal entries captured so they
+    can be written into the journal later without interleaving with
+    concurrent activity.
+
+    Returns:
+      The DeferredCleanupResult.
+    """
+    start = time.time()
+    sleep_secs = None
+    attempt = 0
+    while True:
+      attempt += 1
+      try:
+        test_case.cleanup(context)
+        return DeferredCleanupResult(test_case, attempt, time.time() - start)
+      except Exception as ex:
+        if attempt > self.__max_retries:
+          return DeferredCleanupResult(
+              test_case, attempt, time.time() - start,
+              exception=ex, traceback=traceback.format_exc())
+        sleep_secs = self.__retry_policy.next_sleep_secs(
+            attempt - 1, prev_sleep_secs=sleep_secs)
+        self.logger.warning(
+            'Cleanup of "%s" failed with %s. Trying again in %r secs.',
+            test_case.title, ex, sleep_secs)
+        time.sleep(sleep_secs)
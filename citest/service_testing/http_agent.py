@@ -16,19 +16,40 @@
 """Provides base support for BaseAgents based on HTTP interactions."""
 
 import base64
+import calendar
 import collections
+import email.utils
 import httplib
 import json
+import time
 import traceback
 import urllib2
 
 from ..base import JournalLogger
 from ..base import JsonSnapshotableEntity
+from ..base import map_with_captured_journals
 from .http_scrubber import HttpScrubber
 
 from . import base_agent
 
 
+class HttpRequestType(
+    collections.namedtuple('HttpRequestType',
+                           ['http_type', 'path', 'data', 'headers'])):
+  """Specifies an HTTP message for HttpAgent.request_many.
+
+  Attributes:
+    http_type: [string] The HTTP message type (e.g. POST).
+    path: [string] The URL path to send to (without network location).
+    data: [string] Data payload to send, if any.
+    headers: [dict] Headers to write in addition to the agent's, if any.
+  """
+
+  def __new__(cls, http_type, path, data=None, headers=None):
+    return super(HttpRequestType, cls).__new__(
+        cls, http_type, path, data, headers)
+
+
 class HttpResponseType(
     collections.namedtuple('HttpResponseType',
                            ['http_code', 'output', 'exception']),
@@ -39,8 +60,42 @@ class HttpResponseType(
     http_code: The HTTP response code (or None if exception attempting to send).
     output: The HTTP response.
     exception: The exception if http_code is None
+    headers: The response headers keyed by lower-case name, if known.
+        These are not part of the tuple so do not participate in equality.
   """
 
+  # Default for instances created through namedtuple helpers such as _make().
+  __headers = None
+
+  def __new__(cls, http_code, output, exception, headers=None):
+    result = super(HttpResponseType, cls).__new__(
+        cls, http_code, output, exception)
+    result.__headers = headers
+    return result
+
+  @property
+  def headers(self):
+    """The response headers keyed by lower-case name, or None if unknown."""
+    return self.__headers
+
+  @property
+  def retry_after_secs(self):
+    """The number of seconds the server asked us to wait, or None.
+
+    This is derived from the Retry-After header, which may be either a
+    number of seconds or an HTTP date.
+    """
+    value = (self.__headers or {}).get('retry-after')
+    if value is None:
+      return None
+    value = value.strip()
+    if value.isdigit():
+      return int(value)
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+      return None
+    return max(0, email.utils.mktime_tz(parsed) - calendar.timegm(time.gmtime()))
+
   @property
   def error_message(self):
     """A string denoting the error this response represents, if any."""
@@ -137,6 +192,10 @@ class HttpOperationStatus(base_agent.AgentOperationStatus):
   def raw_http_response(self):
     return self.__http_response
 
+  @property
+  def retry_hint_secs(self):
+    return self.__http_response.retry_after_secs
+
   def __init__(self, operation, http_response):
     super(HttpOperationStatus, self).__init__(operation)
     self.__http_response = http_response
@@ -207,6 +266,19 @@ class HttpAgent(base_agent.BaseAgent):
     """Binds HttpScrubber for removing private information when logging HTTP."""
     self.__http_scrubber = scrubber
 
+  @property
+  def connection_pool(self):
+    """Returns the bound HttpConnectionPool, or None to use urllib2."""
+    return self.__connection_pool
+
+  @connection_pool.setter
+  def connection_pool(self, pool):
+    """Binds HttpConnectionPool for sending requests over kept connections.
+
+    A pool may be shared by multiple agents.
+    """
+    self.__connection_pool = pool
+
   @staticmethod
   def make_json_payload_from_object(payload_obj):
     """Make an HTTP payload as the JSON form of an object instance.
@@ -232,17 +304,21 @@ class HttpAgent(base_agent.BaseAgent):
     payload_dict = kwargs
     return json.JSONEncoder().encode(payload_dict)
 
-  def __init__(self, base_url):
+  def __init__(self, base_url, connection_pool=None):
     """Constructs instance.
 
     Args:
       base_url: [string] Specifies the base url to this agent's HTTP endpoint.
+      connection_pool: [HttpConnectionPool] If not None then send requests
+         through this pool so connections are reused. Otherwise each request
+         opens its own connection with urllib2.
     """
     super(HttpAgent, self).__init__()
     self.__base_url = base_url
     self.__status_class = HttpOperationStatus
     self.__headers = {}
     self.__http_scrubber = HttpScrubber()
+    self.__connection_pool = connection_pool
 
   def add_header(self, key, value):
     """Specifies a header to add to each request that follows.
@@ -312,7 +388,7 @@ class HttpAgent(base_agent.BaseAgent):
     return status_class(operation, http_response)
 
   def __send_http_request(self, path, http_type,
-                          data=None, headers=None, trace=True):
+                          data=None, headers=None, trace=True, stream=False):
     """Send an HTTP message.
 
     Args:
@@ -321,9 +397,12 @@ class HttpAgent(base_agent.BaseAgent):
       data: [string] Data payload to send, if any.
       headers: [dict] Headers to write, if any.
       trace: [bool] True if should log request and response.
+      stream: [bool] If True then do not read a successful response body.
 
     Returns:
-      HttpResponseType
+      HttpResponseType, or if stream then a tuple of the HttpResponseType
+      and the stream of the body (or None if the response has no stream).
+      The response output is None when there is a stream.
     """
     if headers is None:
       all_headers = self.__headers
@@ -355,20 +434,34 @@ class HttpAgent(base_agent.BaseAgent):
     code = None
     output = None
     exception = None
+    response_headers = None
+    body_stream = None
     try:
-      response = urllib2.urlopen(req)
-      code = response.getcode()
-      output = response.read()
-
-      scrubbed_output = self.__http_scrubber.scrub_response(output)
-      JournalLogger.journal_or_log_detail(
-          'HTTP {code}'.format(code=code),
-          scrubbed_output,
-          _module=self.logger.name, _alwayslog=trace, _context='response')
+      if self.__connection_pool is not None:
+        code, output, response_headers = self.__connection_pool.send(
+            url, http_type, data=data, headers=all_headers, stream=stream)
+      else:
+        response = urllib2.urlopen(req)
+        code = response.getcode()
+        output = response if stream else response.read()
+        response_headers = dict(response.info().items())
+
+      if stream:
+        body_stream, output = output, None
+        JournalLogger.journal_or_log(
+            'HTTP {code} (streaming output is not recorded)'.format(code=code),
+            _module=self.logger.name, _alwayslog=trace, _context='response')
+      else:
+        scrubbed_output = self.__http_scrubber.scrub_response(output)
+        JournalLogger.journal_or_log_detail(
+            'HTTP {code}'.format(code=code),
+            scrubbed_output,
+            _module=self.logger.name, _alwayslog=trace, _context='response')
 
     except urllib2.HTTPError as ex:
       code = ex.getcode()
       output = ex.read()
+      response_headers = dict(ex.info().items())
       scrubbed_error = self.__http_scrubber.scrub_response(output)
       JournalLogger.journal_or_log_detail(
           'HTTP {code}'.format(code=code), scrubbed_error,
@@ -379,7 +472,9 @@ class HttpAgent(base_agent.BaseAgent):
           'Caught exception: {ex}\n{stack}'.format(
               ex=ex, stack=traceback.format_exc()))
       exception = ex
-    return HttpResponseType(code, output, exception)
+    result = HttpResponseType(code, output, exception,
+                              headers=response_headers)
+    return (result, body_stream) if stream else result
 
   def patch(self, path, data, content_type='application/json', trace=True):
     """Perform an HTTP PATCH."""
@@ -409,6 +504,68 @@ class HttpAgent(base_agent.BaseAgent):
     """Perform an HTTP GET."""
     return self.__send_http_request(path, 'GET', trace=trace)
 
+  def get_stream(self, path, trace=True):
+    """Perform an HTTP GET whose response body can be read incrementally.
+
+    When tracing, the body is read and recorded as get() does. Otherwise
+    a successful body is left for the caller to read as a stream so that
+    its full text need never be held.
+
+    Returns:
+      A tuple of the HttpResponseType and a stream for reading the body.
+      If there is a stream then the response output is None and the caller
+      must close the stream. If the body was already read (or the request
+      failed) then the stream is None and the response is as get() returns.
+    """
+    if trace:
+      return self.__send_http_request(path, 'GET', trace=trace), None
+    return self.__send_http_request(path, 'GET', trace=trace, stream=True)
+
+  def request_many(self, requests, max_concurrent=8, trace=True):
+    """Perform many HTTP requests concurrently.
+
+    The requests are sent through the agent's connection_pool if it has one,
+    so they reuse connections rather than each opening their own.
+    They are journaled within a single context, in the order given.
+
+    Args:
+      requests: [list of HttpRequestType] The requests to send. These can
+         also be tuples of (http_type, path[, data[, headers]]). Requests
+         with data default to a JSON Content-Type as post() does.
+      max_concurrent: [int] The maximum number of requests in flight at once.
+      trace: [bool] True if should log each request and response.
+
+    Returns:
+      A list of HttpResponseType in the same order as the requests.
+    """
+    requests = [HttpRequestType(*request) for request in requests]
+    if not requests:
+      return []
+
+    def send_request(request):
+      """Send an individual request within a worker thread."""
+      headers = request.headers
+      if request.data is not None and not any(
+          key.lower() == 'content-type' for key in (headers or {})):
+        headers = dict(headers or {})
+        headers['Content-Type'] = 'application/json'
+      return self.__send_http_request(
+          request.path, request.http_type, data=request.data,
+          headers=headers, trace=trace)
+
+    JournalLogger.begin_context(
+        'Send {0} HTTP requests'.format(len(requests)))
+    context_relation = 'ERROR'
+    try:
+      responses = map_with_captured_journals(
+          send_request, requests, max_concurrent)
+      context_relation = ('VALID' if all(response.ok()
+                                         for response in responses)
+                          else 'INVALID')
+      return responses
+    finally:
+      JournalLogger.end_context(relation=context_relation)
+
 
 class BaseHttpOperation(base_agent.AgentOperation):
   """Specialization of AgentOperation that performs HTTP POST."""
@@ -0,0 +1,315 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Provides persistent HTTP connections that can be shared across requests.
+
+Sending each request with urllib2.urlopen opens a new TCP connection (and
+performs a new TLS handshake for https) every time. Agents that poll a
+service spend more time connecting than transferring. An HttpConnectionPool
+keeps the connections to each host open between requests so they can be
+reused.
+"""
+
+import httplib
+import socket
+import StringIO
+import threading
+import time
+import urllib2
+import urlparse
+
+
+# The redirect codes that are followed, as urllib2 would.
+_REDIRECT_CODES = [httplib.MOVED_PERMANENTLY, httplib.FOUND,
+                   httplib.SEE_OTHER, httplib.TEMPORARY_REDIRECT]
+
+# The maximum number of redirects to follow, as urllib2 would.
+_MAX_REDIRECTS = 10
+
+# The methods that can be sent again without risking a repeated effect.
+_IDEMPOTENT_METHODS = ['GET', 'HEAD', 'PUT', 'DELETE']
+
+
+class _StaleConnectionError(Exception):
+  """Indicates a request failed before the server could have processed it.
+
+  This is what happens when using a connection that the server already
+  closed: either the request cannot be written or the server closes the
+  connection without responding at all.
+  """
+
+  @property
+  def cause(self):
+    """The underlying httplib or socket error."""
+    return self.__cause
+
+  def __init__(self, cause):
+    super(_StaleConnectionError, self).__init__(str(cause))
+    self.__cause = cause
+
+
+def _is_missing_status_line(error):
+  """Determine if a BadStatusLine is because the server sent nothing at all."""
+  line = error.line or ''
+  return line in ['', "''"] or line.startswith('No status line received')
+
+
+class HttpConnectionPool(object):
+  """Sends HTTP requests over persistent connections, kept per host.
+
+  The pool is safe to use from multiple threads. Each request uses its own
+  connection for its duration; connections are only shared over time.
+  If there is no idle connection to the host then a new one is opened, so
+  requests never wait on one another. When a request completes, its
+  connection is kept for reuse unless the server closed it or the host
+  already has max_idle_per_host idle connections.
+
+  Requests are sent directly to the host, ignoring any proxy settings that
+  urllib2 would otherwise honor.
+  """
+
+  @property
+  def max_idle_per_host(self):
+    """The maximum number of idle connections kept for each host."""
+    return self.__max_idle_per_host
+
+  @property
+  def idle_timeout_secs(self):
+    """The number of seconds an idle connection remains usable."""
+    return self.__idle_timeout_secs
+
+  @property
+  def num_idle(self):
+    """The number of idle connections currently kept in the pool."""
+    with self.__lock:
+      return sum(len(connections) for connections in self.__idle.values())
+
+  def __init__(self, max_idle_per_host=4, idle_timeout_secs=30,
+               timeout_secs=None):
+    """Constructor.
+
+    Args:
+      max_idle_per_host: [int] The maximum number of idle connections to
+         keep open to each host.
+      idle_timeout_secs: [float] Idle connections older than this are
+         closed rather than reused. Servers close idle connections
+         themselves after a while, so this should be below their timeout.
+      timeout_secs: [float] If not None, the socket timeout for connections.
+    """
+    self.__max_idle_per_host = max_idle_per_host
+    self.__idle_timeout_secs = idle_timeout_secs
+    self.__timeout_secs = timeout_secs
+    self.__lock = threading.Lock()
+    self.__idle = {}  # Lists of (connection, idle since) keyed by host.
+
+  def close(self):
+    """Close all the idle connections."""
+    with self.__lock:
+      idle = self.__idle
+      self.__idle = {}
+    for connections in idle.values():
+      for connection, _ in connections:
+        connection.close()
+
+  def send(self, url, http_type, data=None, headers=None, stream=False):
+    """Send an HTTP request.
+
+    This behaves as urllib2.urlopen would, including following redirects.
+
+    Args:
+      url: [string] The URL to send to.
+      http_type: [string] The HTTP message type (e.g. POST).
+      data: [string] Data payload to send, if any.
+      headers: [dict] Headers to write, if any.
+      stream: [bool] If True then return a successful response body as a
+         stream rather than reading it. The caller must close the stream,
+         which returns the connection to the pool if it was read to the end.
+
+    Raises:
+      urllib2.HTTPError if the response was not successful.
+      urllib2.URLError if the request could not be sent or answered.
+
+    Returns:
+      A tuple of the HTTP code, response body (or stream), and the response
+      headers keyed by lower-case name.
+    """
+    headers = dict(headers or {})
+    for redirects in range(_MAX_REDIRECTS + 1):
+      key, connection, response = self.__open(url, http_type, data, headers)
+      code = response.status
+      response_headers = dict(response.getheaders())
+      location = response_headers.get('location')
+      if (code not in _REDIRECT_CODES or location is None
+          or redirects == _MAX_REDIRECTS):
+        break
+      if http_type == 'POST' and code != httplib.TEMPORARY_REDIRECT:
+        http_type = 'GET'
+        data = None
+        headers = {key: value for key, value in headers.items()
+                   if key.lower() not in ['content-length', 'content-type']}
+      elif http_type not in ['GET', 'HEAD']:
+        break
+      self.__finish(key, connection, response)
+      url = urlparse.urljoin(url, location)
+
+    if code < 200 or code >= 300:
+      output = self.__finish(key, connection, response)
+      raise urllib2.HTTPError(url, code, httplib.responses.get(code, ''),
+                              response_headers, StringIO.StringIO(output))
+    if stream:
+      return (code,
+              _ResponseStream(response, lambda: self.__release_if_read(
+                  key, connection, response)),
+              response_headers)
+    return code, self.__finish(key, connection, response), response_headers
+
+  def __open(self, url, http_type, data, headers):
+    """Send a single request without following redirects or reading the body.
+
+    A connection that was idle may have been closed by the server
+    without our knowing. If that happens to an idempotent request
+    then it is retried once on a new connection. Requests that might have
+    reached the server (e.g. timed out waiting for a response) are never
+    retried.
+
+    Returns:
+      A tuple of the pool key for the host, the connection, and the
+      httplib response.
+    """
+    parts = urlparse.urlsplit(url)
+    if parts.scheme not in ['http', 'https']:
+      raise urllib2.URLError('unknown url type: {0}'.format(parts.scheme))
+    key = (parts.scheme, parts.netloc)
+    selector = urlparse.urlunsplit(('', '', parts.path or '/',
+                                    parts.query, ''))
+
+    connection, reused = self.__acquire(key)
+    try:
+      try:
+        response = self.__exchange(connection, selector, http_type,
+                                   data, headers)
+      except _StaleConnectionError as ex:
+        connection.close()
+        if not reused or http_type not in _IDEMPOTENT_METHODS:
+          raise urllib2.URLError(ex.cause)
+        connection = self.__new_connection(key)
+        response = self.__exchange(connection, selector, http_type,
+                                   data, headers)
+    except _StaleConnectionError as ex:
+      connection.close()
+      raise urllib2.URLError(ex.cause)
+    except (httplib.HTTPException, socket.error) as ex:
+      connection.close()
+      raise urllib2.URLError(ex)
+    return key, connection, response
+
+  def __finish(self, key, connection, response):
+    """Read the body of a response and then release its connection."""
+    try:
+      output = response.read()
+    except (httplib.HTTPException, socket.error) as ex:
+      connection.close()
+      raise urllib2.URLError(ex)
+    self.__release_if_read(key, connection, response)
+    return output
+
+  def __release_if_read(self, key, connection, response):
+    """Release a connection if its response was read, otherwise close it."""
+    if response.isclosed() and not response.will_close:
+      self.__release(key, connection)
+    else:
+      connection.close()
+
+  @staticmethod
+  def __exchange(connection, selector, http_type, data, headers):
+    """Send a request on a connection and return its response.
+
+    Raises:
+      _StaleConnectionError if the server could not have processed the
+      request. Other errors (including timeouts) are raised as they are.
+    """
+    try:
+      connection.request(http_type, selector, body=data, headers=headers)
+    except socket.timeout:
+      raise
+    except (httplib.CannotSendRequest, socket.error) as ex:
+      raise _StaleConnectionError(ex)
+
+    try:
+      return connection.getresponse()
+    except httplib.BadStatusLine as ex:
+      if _is_missing_status_line(ex):
+        raise _StaleConnectionError(ex)
+      raise
+
+  def __new_connection(self, key):
+    """Open a new connection to the host key denotes."""
+    scheme, netloc = key
+    kwargs = ({} if self.__timeout_secs is None
+              else {'timeout': self.__timeout_secs})
+    if scheme == 'https':
+      return httplib.HTTPSConnection(netloc, **kwargs)
+    return httplib.HTTPConnection(netloc, **kwargs)
+
+  def __acquire(self, key):
+    """Returns an idle connection to the host or a new one.
+
+    Returns:
+      A tuple of the connection and whether it was idle in the pool.
+    """
+    expired = []
+    found = None
+    now = time.time()
+    with self.__lock:
+      connections = self.__idle.get(key, [])
+      while connections and found is None:
+        connection, since = connections.pop()
+        if now - since < self.__idle_timeout_secs:
+          found = connection
+        else:
+          expired.append(connection)
+    for connection in expired:
+      connection.close()
+    if found is not None:
+      return found, True
+    return self.__new_connection(key), False
+
+  def __release(self, key, connection):
+    """Return a connection to the pool after a completed request."""
+    with self.__lock:
+      connections = self.__idle.setdefault(key, [])
+      if len(connections) < self.__max_idle_per_host:
+        connections.append((connection, time.time()))
+        return
+    connection.close()
+
+
+class _ResponseStream(object):
+  """The body of a response that is read from its connection on demand."""
+
+  def __init__(self, response, on_close):
+    self.__response = response
+    self.__on_close = on_close
+
+  def read(self, size=-1):
+    """Read up to size bytes of the body, or all of it if size is negative."""
+    return self.__response.read(None if size < 0 else size)
+
+  def close(self):
+    """Release the connection back to the pool, if it can be reused."""
+    if self.__on_close is not None:
+      on_close = self.__on_close
+      self.__on_close = None
+      on_close()
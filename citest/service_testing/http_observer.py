@@ -16,13 +16,16 @@
 
 
 # Standard python modules.
+import httplib
 import json
 import logging
 import re
+import socket
 import traceback
 
 # citest modules.
 from .. import json_contract as jc
+from ..base import iter_json_values
 from ..json_predicate import JsonError
 from . import AgentError
 
@@ -76,17 +79,57 @@ class HttpObjectObserver(jc.ObjectObserver):
     snapshot.edge_builder.make_control(entity, 'Path', self.__path)
     super(HttpObjectObserver, self).export_to_json_snapshot(snapshot, entity)
 
+  def get_cache_key(self, context):
+    """Implements ObjectObserver interface."""
+    return self._make_cache_key(id(self.__agent), context.eval(self.__path))
+
   def collect_observation(self, context, observation, trace=True):
     # This is where we'd use an HttpAgent to get a URL then
     # collect some thing out of the results.
-    result = self.agent.get(context.eval(self.__path), trace=trace)
+    path = context.eval(self.__path)
+    # Specializations decoding the content themselves need all of it.
+    overrides_decode = (type(self)._do_decode_objects.__func__
+                        is not HttpObjectObserver._do_decode_objects.__func__)
+    if overrides_decode:
+      result, stream = self.agent.get(path, trace=trace), None
+    else:
+      result, stream = self.agent.get_stream(path, trace=trace)
     if not result.ok():
       http_agent_error = HttpAgentError(result)
       logging.getLogger(__name__).info(http_agent_error)
       observation.add_error(http_agent_error)
       return []
 
-    return self._do_decode_objects(result.output, observation)
+    if stream is None:
+      return self._do_decode_objects(result.output, observation)
+    try:
+      return self.__decode_stream(stream, observation)
+    finally:
+      stream.close()
+
+  def __decode_stream(self, stream, observation):
+    """Adds the objects in a JSON stream to the observation as they decode.
+
+    This is the same as _do_decode_objects but without holding all the
+    content at once.
+    """
+    try:
+      objects = list(iter_json_values(stream))
+    except ValueError as ex:
+      error = 'Invalid JSON in response stream: %s' % ex
+      logging.getLogger(__name__).info('%s\n%s\n----------------\n',
+                                       error, traceback.format_exc())
+      observation.add_error(JsonError(error, ex))
+      return []
+    except (httplib.HTTPException, socket.error) as ex:
+      error = 'Failed reading response stream: %s' % ex
+      logging.getLogger(__name__).info('%s\n%s\n----------------\n',
+                                       error, traceback.format_exc())
+      observation.add_error(AgentError(error))
+      return []
+
+    observation.add_all_objects(objects)
+    return observation.objects
 
   def _do_decode_objects(self, content, observation):
     """Implements helper method to extract observed objects.
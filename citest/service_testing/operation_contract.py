@@ -69,13 +69,49 @@ class OperationContract(JsonSnapshotableEntity):
     """
     return self.__cleanup
 
+  @property
+  def creates(self):
+    """The names of the resources this test case creates.
+
+    These are arbitrary names used only to determine dependencies among
+    test cases when scheduling them with an OperationContractScheduler.
+    """
+    return self.__creates
+
+  @property
+  def consumes(self):
+    """The names of the resources this test case requires to already exist."""
+    return self.__consumes
+
+  @property
+  def deletes(self):
+    """The names of the resources this test case removes.
+
+    A test case deleting a resource is scheduled after every other test case
+    that creates or consumes it.
+    """
+    return self.__deletes
+
+  @property
+  def predecessors(self):
+    """The OperationContracts that must pass before this one can run."""
+    return self.__predecessors
+
   def export_to_json_snapshot(self, snapshot, entity):
     """Implements JsonSnapshotableEntity interface."""
     snapshot.edge_builder.make(entity, 'Operation', self.__operation)
     snapshot.edge_builder.make(entity, 'Contract', self.__contract)
+    for name, value in [('Creates', self.__creates),
+                        ('Consumes', self.__consumes),
+                        ('Deletes', self.__deletes)]:
+      if value:
+        snapshot.edge_builder.make_control(entity, name, value)
+    if self.__predecessors:
+      snapshot.edge_builder.make_control(
+          entity, 'Predecessors', [pred.title for pred in self.__predecessors])
 
   def __init__(self, operation, contract,
-               status_extractor=None, cleanup=None):
+               status_extractor=None, cleanup=None, **kwargs):
     """Construct instance.
 
     Args:
@@ -85,8 +121,18 @@ class OperationContract(JsonSnapshotableEntity):
          See the status_extractor property for more information.
       cleanup: [Callable(ExecutionContext)]
          Perform any post-test cleanup.
+      creates: [list of string] See the creates property.
+      consumes: [list of string] See the consumes property.
+      deletes: [list of string] See the deletes property.
+      predecessors: [list of OperationContract] See the predecessors property.
     """
     self.__operation = operation
     self.__contract = contract
     self.__status_extractor = status_extractor
     self.__cleanup = cleanup
+    self.__creates = list(kwargs.pop('creates', None) or [])
+    self.__consumes = list(kwargs.pop('consumes', None) or [])
+    self.__deletes = list(kwargs.pop('deletes', None) or [])
+    self.__predecessors = list(kwargs.pop('predecessors', None) or [])
+    if kwargs:
+      raise TypeError('Unrecognized arguments {0}'.format(kwargs.keys()))
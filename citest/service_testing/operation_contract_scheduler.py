@@ -0,0 +1,207 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Schedules OperationContracts according to their dependencies.
+
+Each OperationContract may declare the resources it creates, consumes and
+deletes, as well as explicit predecessors. The scheduler derives a
+dependency graph from these and runs each test case as soon as all the
+test cases it depends on have passed. Test cases depending (directly or
+indirectly) on a failed test case are skipped.
+"""
+
+
+from multiprocessing.pool import ThreadPool
+import logging
+import Queue
+import threading
+import traceback
+
+
+class OperationContractScheduler(object):
+  """Runs OperationContracts concurrently while respecting dependencies."""
+
+  PASSED = 'PASSED'
+  FAILED = 'FAILED'
+  SKIPPED = 'SKIPPED'
+
+  @property
+  def test_case_list(self):
+    """The OperationContracts being scheduled in their original order."""
+    return self.__test_case_list
+
+  @property
+  def lock(self):
+    """A lock for test cases to hold while accessing state they share."""
+    return self.__lock
+
+  @property
+  def topological_order(self):
+    """The OperationContracts ordered so predecessors precede dependents.
+
+    Among test cases that do not depend on one another, the original order
+    is preserved.
+    """
+    return self.__topological_order
+
+  def __init__(self, test_case_list):
+    """Constructor.
+
+    Args:
+      test_case_list: [list of OperationContract] The test cases to schedule.
+
+    Raises:
+      ValueError if a predecessor is not in the list or there is a cycle.
+    """
+    self.logger = logging.getLogger(__name__)
+    self.__lock = threading.Lock()
+    self.__test_case_list = list(test_case_list)
+    self.__predecessors = {id(case): [] for case in self.__test_case_list}
+    self.__dependents = {id(case): [] for case in self.__test_case_list}
+    self.__add_dependencies()
+    self.__topological_order = self.__determine_topological_order()
+
+  def predecessors_of(self, test_case):
+    """Returns the test cases that must pass before test_case can run."""
+    return list(self.__predecessors[id(test_case)])
+
+  def dependents_of(self, test_case):
+    """Returns the test cases that directly depend on test_case."""
+    return list(self.__dependents[id(test_case)])
+
+  def __add_edge(self, before, after):
+    """Record that |after| depends on |before|."""
+    if before is after or before in self.__predecessors[id(after)]:
+      return
+    self.__predecessors[id(after)].append(before)
+    self.__dependents[id(before)].append(after)
+
+  def __add_dependencies(self):
+    """Derive the dependency graph from the test case declarations."""
+    creators = {}
+    consumers = {}
+    for case in self.__test_case_list:
+      for name in case.creates:
+        creators.setdefault(name, []).append(case)
+      for name in case.consumes:
+        consumers.setdefault(name, []).append(case)
+
+    for case in self.__test_case_list:
+      for pred in case.predecessors:
+        if id(pred) not in self.__predecessors:
+          raise ValueError(
+              '"{0}" has predecessor "{1}" which is not being scheduled.'
+              .format(case.title, pred.title))
+        self.__add_edge(pred, case)
+
+      for name in case.consumes:
+        for creator in creators.get(name, []):
+          self.__add_edge(creator, case)
+
+      for name in case.deletes:
+        for other in creators.get(name, []) + consumers.get(name, []):
+          self.__add_edge(other, case)
+
+  def __determine_topological_order(self):
+    """Order the test cases, raising ValueError if there is a cycle."""
+    remaining = {id(case): len(self.__predecessors[id(case)])
+                 for case in self.__test_case_list}
+    ready = [case for case in self.__test_case_list if not remaining[id(case)]]
+    order = []
+    while ready:
+      case = ready.pop(0)
+      order.append(case)
+      for dependent in self.__dependents[id(case)]:
+        remaining[id(dependent)] -= 1
+        if not remaining[id(dependent)]:
+          ready.append(dependent)
+
+    if len(order) != len(self.__test_case_list):
+      cycle = [case.title for case in self.__test_case_list
+               if remaining[id(case)]]
+      raise ValueError('Dependency cycle among {0}'.format(cycle))
+    return order
+
+  def run(self, run_test_case, max_concurrent):
+    """Run the test cases.
+
+    Args:
+      run_test_case: [callable(OperationContract)] Runs an individual test
+         case, raising an exception if it does not pass.
+      max_concurrent: [int] The number of test cases that can run at once.
+
+    Returns:
+      A list of (OperationContract, outcome) in the original order where
+      the outcome is one of PASSED, FAILED, or SKIPPED.
+    """
+    if not self.__test_case_list:
+      return []
+
+    outcome = {}
+    remaining = {id(case): len(self.__predecessors[id(case)])
+                 for case in self.__test_case_list}
+    completed = Queue.Queue()
+    num_threads = max(1, min(max_concurrent, len(self.__test_case_list)))
+    pool = ThreadPool(processes=num_threads)
+
+    def run_one(test_case):
+      """Runs test_case in a worker thread, reporting the outcome."""
+      try:
+        run_test_case(test_case)
+        completed.put((test_case, self.PASSED))
+      except BaseException:
+        self.logger.debug('"%s" failed:\n%s',
+                          test_case.title, traceback.format_exc())
+        completed.put((test_case, self.FAILED))
+
+    def skip_dependents(test_case):
+      """Mark all the transitive dependents of a failed test case skipped."""
+      pending = list(self.__dependents[id(test_case)])
+      while pending:
+        dependent = pending.pop(0)
+        if id(dependent) in outcome:
+          continue
+        self.logger.warning('Skipping "%s" because "%s" did not pass.',
+                            dependent.title, test_case.title)
+        outcome[id(dependent)] = self.SKIPPED
+        pending.extend(self.__dependents[id(dependent)])
+
+    self.logger.info('Scheduling %d tests across %d threads.',
+                     len(self.__test_case_list), num_threads)
+    try:
+      running = 0
+      for case in self.__topological_order:
+        if not remaining[id(case)]:
+          pool.apply_async(run_one, (case,))
+          running += 1
+
+      while running:
+        case, result = completed.get()
+        running -= 1
+        outcome[id(case)] = result
+        if result != self.PASSED:
+          skip_dependents(case)
+          continue
+
+        for dependent in self.__dependents[id(case)]:
+          remaining[id(dependent)] -= 1
+          if not remaining[id(dependent)] and id(dependent) not in outcome:
+            pool.apply_async(run_one, (dependent,))
+            running += 1
+    finally:
+      pool.close()
+      pool.join()
+
+    return [(case, outcome[id(case)]) for case in self.__test_case_list]
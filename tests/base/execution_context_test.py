@@ -29,6 +29,84 @@ class ExecutionContextTest(unittest.TestCase):
     self.assertEqual(123, context.eval(123))
     self.assertEqual('IX', context.eval(fn))
 
+  def test_eval_constant_is_not_copied(self):
+    context = ExecutionContext()
+    value = {'a': [1, 2, {'b': 'B'}], 'c': 'C'}
+    self.assertIs(value, context.eval(value))
+
+  def test_eval_copies_only_containers_with_callables(self):
+    context = ExecutionContext(x='X')
+    constant = [1, 2]
+    value = {'a': constant, 'b': [0, lambda ctxt: ctxt['x']]}
+    result = context.eval(value)
+    self.assertEqual({'a': [1, 2], 'b': [0, 'X']}, result)
+    self.assertIsNot(value, result)
+    self.assertIs(constant, result['a'])
+    self.assertTrue(callable(value['b'][1]))
+
+  def test_eval_memoizes_until_dependencies_change(self):
+    context = ExecutionContext()
+    context.set_internal('i', 'I')
+    context.set_snapshotable('x', 'X')
+    calls = []
+    def fn(ctxt):
+      calls.append(True)
+      return '{0}{1}'.format(ctxt['i'], ctxt.get('x', None))
+
+    self.assertEqual('IX', context.eval(fn))
+    self.assertEqual('IX', context.eval([fn])[0])
+    self.assertEqual(1, len(calls))
+
+    context.set_internal('i', 'J')
+    self.assertEqual('JX', context.eval(fn))
+    context.set_snapshotable('x', 'Y')
+    self.assertEqual('JY', context.eval(fn))
+    context.clear_key('x')
+    self.assertEqual('JNone', context.eval(fn))
+    self.assertEqual(4, len(calls))
+
+    # Unrelated keys do not invalidate the result.
+    context.set_internal('unrelated', True)
+    self.assertEqual('JNone', context.eval(fn))
+    self.assertEqual(4, len(calls))
+
+  def test_eval_nested_callable_dependencies(self):
+    context = ExecutionContext(x='X')
+    inner = lambda ctxt: ctxt['x']
+    calls = []
+    def outer(ctxt):
+      calls.append(True)
+      return ctxt.eval(inner) + '!'
+
+    self.assertEqual('X!', context.eval(outer))
+    self.assertEqual('X!', context.eval(outer))
+    self.assertEqual(1, len(calls))
+    context.set_snapshotable('x', 'Y')
+    self.assertEqual('Y!', context.eval(outer))
+    self.assertEqual(2, len(calls))
+
+  def test_eval_does_not_memoize_context_free_callables(self):
+    context = ExecutionContext()
+    calls = []
+    def fn(ctxt):
+      calls.append(True)
+      return len(calls)
+
+    self.assertEqual(1, context.eval(fn))
+    self.assertEqual(2, context.eval(fn))
+
+  def test_key_versions(self):
+    context = ExecutionContext(a='A')
+    before = context.key_versions()
+    context['b'] = 'B'
+    context.set_internal('c', 'C')
+    context.clear_key('c')
+    context.get('a', None)
+    after = context.key_versions()
+    self.assertEqual(['b', 'c'],
+                     sorted([key for key, version in after.items()
+                             if before.get(key, 0) != version]))
+
 
 if __name__ == '__main__':
   loader = unittest.TestLoader()
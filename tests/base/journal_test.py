@@ -21,10 +21,16 @@
 
 import json
 import threading
+import time
 import unittest
 
 from StringIO import StringIO
-from citest.base import Journal
+from citest.base import (
+    CapturingJournal,
+    Journal,
+    get_global_journal,
+    map_with_captured_journals,
+    set_thread_journal)
 
 from citest.base import JsonSnapshot, JsonSnapshotableEntity
 from citest.base import RecordOutputStream, RecordInputStream
@@ -200,6 +206,91 @@ class JournalTest(unittest.TestCase):
     json_object['_thread'] = threading.current_thread().ident
     self.assertItemsEqual(json_object, got[2])
 
+  def test_capturing_journal(self):
+    """Verify captured entries are transferred in order and unchanged."""
+    capture = CapturingJournal(now_function=lambda: 1.23)
+    capture.begin_context('Captured')
+    capture.write_message('Hello')
+    capture.end_context()
+    self.assertEqual(3, capture.num_entries)
+
+    journal = TestJournal(StringIO())
+    capture.write_into(journal)
+    journal.terminate()
+
+    decoder = json.JSONDecoder(encoding='ASCII')
+    got = [decoder.decode(entry)
+           for entry in RecordInputStream(StringIO(journal.final_content))]
+    self.assertEqual(['Starting journal.', None, 'Hello', None,
+                      'Finished journal.'],
+                     [entry.get('_value') for entry in got])
+    self.assertEqual(['BEGIN', 'END'],
+                     [entry['control'] for entry in got if 'control' in entry])
+    self.assertEqual([1.23] * 3, [entry['_timestamp'] for entry in got[1:4]])
+
+  def test_thread_journal(self):
+    """Verify the thread journal overrides the global one in its thread."""
+    capture = CapturingJournal()
+    global_journal = get_global_journal()
+    self.assertIsNone(set_thread_journal(capture))
+    try:
+      self.assertEqual(capture, get_global_journal())
+
+      got = []
+      thread = threading.Thread(target=lambda: got.append(get_global_journal()))
+      thread.start()
+      thread.join()
+      self.assertEqual([global_journal], got)
+    finally:
+      self.assertEqual(capture, set_thread_journal(None))
+    self.assertEqual(global_journal, get_global_journal())
+
+
+  def test_map_with_captured_journals(self):
+    """Verify concurrent entries are written grouped in item order."""
+    active = []
+    max_active = [0]
+    lock = threading.Lock()
+    def journal_item(item):
+      with lock:
+        active.append(item)
+        max_active[0] = max(max_active[0], len(active))
+      journal = get_global_journal()
+      journal.begin_context('Item {0}'.format(item))
+      time.sleep(0.01 * (5 - item))  # Finish in the reverse order.
+      journal.write_message('Message {0}'.format(item))
+      journal.end_context()
+      with lock:
+        active.remove(item)
+      if item == 3:
+        raise ValueError('Item 3')
+      return item * 10
+
+    journal = TestJournal(StringIO())
+    set_thread_journal(journal)
+    try:
+      self.assertEqual([0, 10, 20], map_with_captured_journals(
+          journal_item, range(3), 2))
+      self.assertTrue(max_active[0] <= 2)
+      self.assertRaises(ValueError, map_with_captured_journals,
+                        journal_item, range(5), 5)
+      self.assertEqual([], map_with_captured_journals(journal_item, [], 2))
+    finally:
+      set_thread_journal(None)
+    journal.terminate()
+
+    decoder = json.JSONDecoder(encoding='ASCII')
+    got = [decoder.decode(entry)
+           for entry in RecordInputStream(StringIO(journal.final_content))]
+    expect = []
+    for item in range(3) + range(5):
+      expect.extend([('BEGIN', 'Item {0}'.format(item)),
+                     (None, 'Message {0}'.format(item)),
+                     ('END', None)])
+    self.assertEqual(
+        expect,
+        [(entry.get('control'), entry.get('_value', entry.get('_title')))
+         for entry in got[1:-1]])
 
 if __name__ == '__main__':
   loader = unittest.TestLoader()
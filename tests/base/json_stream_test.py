@@ -0,0 +1,78 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+
+import json
+import StringIO
+import unittest
+
+from citest.base import iter_json_values
+
+
+_DOCUMENT = [
+    {'name': 'first', 'values': [1, 2.5, -3e10], 'nested': {'ok': True}},
+    12345678,
+    'a string with , and ] and \\" in it',
+    None,
+    [],
+    {},
+    [[1, [2]], {'x': [3]}]]
+
+
+class CountingStream(object):
+  """A stream that remembers the most it was asked to read at once."""
+
+  def __init__(self, text):
+    self.__stream = StringIO.StringIO(text)
+    self.max_read = 0
+
+  def read(self, size):
+    self.max_read = max(self.max_read, size)
+    return self.__stream.read(size)
+
+
+def decode(text, chunk_size=3):
+  return list(iter_json_values(StringIO.StringIO(text), chunk_size=chunk_size))
+
+
+class JsonStreamTest(unittest.TestCase):
+  def test_list(self):
+    text = json.dumps(_DOCUMENT)
+    for chunk_size in [1, 2, 7, 1024]:
+      self.assertEqual(_DOCUMENT, decode(text, chunk_size=chunk_size))
+    self.assertEqual(_DOCUMENT, decode(json.dumps(_DOCUMENT, indent=2)))
+    self.assertEqual([], decode(' [ ] '))
+
+  def test_single_value(self):
+    for value in [_DOCUMENT[0], 12345678, 'text', None]:
+      self.assertEqual([value], decode(json.dumps(value)))
+
+  def test_reads_incrementally(self):
+    stream = CountingStream(json.dumps([{'x': 'X' * 100}] * 100))
+    values = iter_json_values(stream, chunk_size=16)
+    self.assertEqual({'x': 'X' * 100}, next(values))
+    self.assertTrue(stream.max_read < 1000)
+    self.assertEqual(99, len(list(values)))
+
+  def test_invalid(self):
+    for text in ['', '  ', '[1, 2', '[1 2]', '[1,]', '{"a": 1} x',
+                 '[1] 2', '{"a": ']:
+      self.assertRaises(ValueError, decode, text)
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(JsonStreamTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,81 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import random
+import unittest
+
+from citest.base import (
+    ExponentialBackoffRetryPolicy,
+    FixedIntervalRetryPolicy)
+
+
+class RetryPolicyTest(unittest.TestCase):
+  def test_fixed_interval(self):
+    policy = FixedIntervalRetryPolicy(5)
+    self.assertEqual(5, policy.next_sleep_secs(0))
+    self.assertEqual(5, policy.next_sleep_secs(10, prev_sleep_secs=5))
+
+  def test_fixed_interval_bounded_by_deadline(self):
+    policy = FixedIntervalRetryPolicy(5)
+    self.assertEqual(2, policy.next_sleep_secs(0, secs_remaining=2))
+    self.assertEqual(0, policy.next_sleep_secs(0, secs_remaining=-1))
+
+  def test_hint_overrides_interval(self):
+    policy = FixedIntervalRetryPolicy(1)
+    self.assertEqual(7, policy.next_sleep_secs(0, hint_secs=7))
+
+    # Hints do not shorten the interval.
+    self.assertEqual(1, policy.next_sleep_secs(0, hint_secs=0))
+
+    # But we still will not sleep beyond the deadline.
+    self.assertEqual(3, policy.next_sleep_secs(0, secs_remaining=3,
+                                               hint_secs=7))
+
+  def test_exponential_without_jitter(self):
+    policy = ExponentialBackoffRetryPolicy(
+        initial_secs=1, max_secs=20, multiplier=2, jitter=False)
+    self.assertEqual([1, 2, 4, 8, 16, 20, 20],
+                     [policy.next_sleep_secs(i) for i in range(7)])
+
+  def test_exponential_with_jitter(self):
+    policy = ExponentialBackoffRetryPolicy(
+        initial_secs=1, max_secs=30, multiplier=3, rng=random.Random(123))
+    prev = None
+    for attempt in range(20):
+      sleep = policy.next_sleep_secs(attempt, prev_sleep_secs=prev)
+      self.assertGreaterEqual(sleep, 1)
+      self.assertLessEqual(sleep, 30)
+      self.assertLessEqual(sleep, 3 * (prev or 1))
+      prev = sleep
+
+  def test_exponential_bounded_by_deadline(self):
+    policy = ExponentialBackoffRetryPolicy(
+        initial_secs=1, max_secs=30, multiplier=2, jitter=False)
+    self.assertEqual(5, policy.next_sleep_secs(10, secs_remaining=5))
+
+  def test_exponential_invalid(self):
+    self.assertRaises(ValueError, ExponentialBackoffRetryPolicy,
+                      initial_secs=0)
+    self.assertRaises(ValueError, ExponentialBackoffRetryPolicy,
+                      initial_secs=10, max_secs=5)
+    self.assertRaises(ValueError, ExponentialBackoffRetryPolicy,
+                      multiplier=0.5)
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(RetryPolicyTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
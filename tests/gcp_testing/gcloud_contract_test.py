@@ -21,6 +21,7 @@ from citest.base import (
 
 import citest.gcp_testing as gt
 import citest.json_contract as jc
+import citest.json_predicate as jp
 import citest.service_testing as st
 
 import fake_gcloud_agent
@@ -65,6 +66,63 @@ class GCloudContractTest(unittest.TestCase):
         'instances', ['list'] + extra_args, project='PROJECT')
     self.assertEquals(command, gcloud.last_run_params)
 
+  def test_list_with_object_filter(self):
+    context = ExecutionContext()
+    default_response = st.CliResponseType(
+        0, '[{"field":"value", "n":1}, {"field":"other", "n":2}]', '')
+
+    gcloud = fake_gcloud_agent.FakeGCloudAgent(
+        'PROJECT', 'ZONE', default_response=default_response)
+    contract_builder = gt.GCloudContractBuilder(gcloud)
+
+    c1 = contract_builder.new_clause_builder('TITLE')
+    object_filter = jp.AND([jp.PathPredicate('field', jp.STR_EQ('value')),
+                            jp.PathPredicate('n', jp.NUM_LE(1))])
+    verifier = c1.list_resources('instances', object_filter=object_filter)
+    verifier.contains_path_value('n', 1)
+    verifier.excludes_path_value('field', 'other')
+
+    contract = contract_builder.build()
+    self.assertTrue(contract.verify(context))
+
+    # gcloud is asked to filter too, but only by the conditions it can
+    # express. The response was still filtered since the fake ignores it.
+    command = gcloud.build_gcloud_command_args(
+        'instances', ['list'], project='PROJECT')
+    self.assertEquals(command + ['--filter=field="value"'],
+                      gcloud.last_run_params)
+
+  def test_filter_expression(self):
+    pred = jp.AND([jp.PathPredicate('a/b', jp.STR_EQ('x')),
+                   jp.DICT_MATCHES({'c': jp.NUM_EQ(1),
+                                    'bad-name': jp.STR_EQ('y')}),
+                   jp.PathPredicate('d', jp.STR_NE('z'))])
+    self.assertEquals('a.b="x" AND c=1',
+                      gt.gcloud_contract.make_gcloud_filter_expression(pred))
+    self.assertIsNone(gt.gcloud_contract.make_gcloud_filter_expression(
+        jp.OR([jp.PathPredicate('a', jp.STR_EQ('x')),
+               jp.PathPredicate('a', jp.STR_EQ('y'))])))
+
+  def test_observer_cache_key(self):
+    context = ExecutionContext(name='NAME')
+    gcloud = fake_gcloud_agent.FakeGCloudAgent('PROJECT', 'ZONE')
+    other_gcloud = fake_gcloud_agent.FakeGCloudAgent('PROJECT', 'ZONE')
+    args = ['instances', 'list', lambda context: context['name']]
+
+    observer_class = gt.gcloud_contract.GCloudObjectObserver
+    key = observer_class(gcloud, args).get_cache_key(context)
+    self.assertEquals(
+        key,
+        observer_class(
+            gcloud, ['instances', 'list', 'NAME']).get_cache_key(context))
+    self.assertNotEquals(
+        key,
+        observer_class(other_gcloud, args).get_cache_key(context))
+    self.assertNotEquals(
+        key,
+        observer_class(
+            gcloud, ['instances', 'describe', 'NAME']).get_cache_key(context))
+
   def test_inspect_not_found_ok(self):
     context = ExecutionContext()
 
@@ -115,6 +115,18 @@ class GcpAgentTest(unittest.TestCase):
                      service.calls)
     self.assertEqual([1, 2, 3, 4, 5, 6], got)
 
+  def test_iter_resource_pages(self):
+    context = ExecutionContext()
+    service = FakeGcpService([{'items': [1, 2, 3]},
+                              {'items': [4, 5, 6]}])
+    agent = TestGcpAgent.make_test_agent(service=service)
+
+    pages = agent.iter_resource_pages(context, 'my_test')
+    self.assertEqual([1, 2, 3], next(pages))
+    pages.close()
+    self.assertEqual(['my_test', 'list({})', 'execute', 'list_next'],
+                     service.calls)
+
   def test_resource_type_to_info(self):
     # Verify we can traverse a [nested] discovery document.
     doc = TestGcpAgent.load_discovery_document(
@@ -78,6 +78,60 @@ class GcpContractTest(st.AgentTestCase):
     self.assertTrue(contract.verify(context))
     self.assertEquals({'project': 'PROJECT'}, agent.service.last_list_args)
 
+  def test_list_with_object_filter(self):
+    context = ExecutionContext()
+    default_variables = {'project': 'PROJECT'}
+    service = MyFakeGcpService([{'items': [{'name': 'r1'}]}])
+    agent = TestGcpAgent.make_test_agent(
+        service=service, default_variables=default_variables)
+
+    contract_builder = gt.GcpContractBuilder(agent)
+    c1 = contract_builder.new_clause_builder('TITLE')
+    verifier = c1.list_resource(
+        'regions', object_filter=jp.PathPredicate('name', jp.STR_EQ('r1')))
+    verifier.contains_path_value('name', 'r1')
+
+    # The filter is passed to the server because regions.list accepts one.
+    contract = contract_builder.build()
+    self.assertTrue(contract.verify(context))
+    self.assertEquals({'project': 'PROJECT', 'filter': '(name = "r1")'},
+                      agent.service.last_list_args)
+
+  def test_list_with_object_filter_not_pushed_down(self):
+    context = ExecutionContext()
+    default_variables = {'project': 'PROJECT'}
+    service = MyFakeGcpService([{'items': [{'name': 'r1'}, {'name': 'r2'}]}])
+    agent = TestGcpAgent.make_test_agent(
+        service=service, default_variables=default_variables)
+
+    # Methods that do not accept a filter are only filtered locally.
+    contract_builder = gt.GcpContractBuilder(agent)
+    c1 = contract_builder.new_clause_builder('TITLE')
+    verifier = c1.list_resource(
+        'my_test', object_filter=jp.PathPredicate('name', jp.STR_EQ('r1')))
+    verifier.excludes_path_value('name', 'r2')
+    self.assertTrue(contract_builder.build().verify(context))
+    self.assertEquals({}, agent.service.last_list_args)
+
+  def test_list_with_filter_keyword(self):
+    context = ExecutionContext()
+    default_variables = {'project': 'PROJECT'}
+    service = MyFakeGcpService([{'items': [{'name': 'r1'}]}])
+    agent = TestGcpAgent.make_test_agent(
+        service=service, default_variables=default_variables)
+    name_filter = jp.PathPredicate('name', jp.STR_EQ('r1'))
+
+    # filter is the object filter, as it is for GcpObjectObserver.
+    contract_builder = gt.GcpContractBuilder(agent)
+    c1 = contract_builder.new_clause_builder('TITLE')
+    c1.list_resource('regions', filter=name_filter)
+    self.assertTrue(contract_builder.build().verify(context))
+    self.assertEquals({'project': 'PROJECT', 'filter': '(name = "r1")'},
+                      agent.service.last_list_args)
+
+    self.assertRaises(ValueError, c1.list_resource, 'regions',
+                      filter=name_filter, object_filter=name_filter)
+
   def test_inspect_not_found_ok(self):
     context = ExecutionContext()
     response = Mock()
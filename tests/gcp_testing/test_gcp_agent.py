@@ -64,7 +64,7 @@ class TestGcpAgent(GcpAgent):
                 'methods': {'get': _method_spec(['project'])}},
             'regions': {
                 'methods': {'get': _method_spec(['project', 'region']),
-                            'list': _method_spec(['project'])}},
+                            'list': _method_spec(['project'], ['filter'])}},
             'my_test': {
                 'methods': {'get': _method_spec(['r'], ['o']),
                             'list': _method_spec([], ['o'])}}
@@ -16,11 +16,19 @@
 # pylint: disable=missing-docstring
 # pylint: disable=invalid-name
 
+import json
+import threading
 import unittest
 
+from StringIO import StringIO
+
 from citest.base import (
   ExecutionContext,
-  JsonSnapshotHelper)
+  FixedIntervalRetryPolicy,
+  Journal,
+  JsonSnapshotHelper,
+  RecordInputStream,
+  set_thread_journal)
 
 import citest.json_contract as jc
 import citest.json_predicate as jp
@@ -45,6 +53,138 @@ class FakeObserver(jc.ObjectObserver):
     return observation.objects
 
 
+class CompletingObserver(jc.ObjectObserver):
+  """Sets an event after a number of observations to mimic an operation."""
+  def __init__(self, completed, complete_on_call):
+    super(CompletingObserver, self).__init__()
+    self.__completed = completed
+    self.__complete_on_call = complete_on_call
+    self.calls = 0
+
+  def collect_observation(self, context, observation, trace=True):
+    self.calls += 1
+    if self.calls == self.__complete_on_call:
+      if context.get('Value', None) != 'A':
+        context.set_snapshotable('Value', 'A')
+      self.__completed.set()
+    observation.add_object(context['Value'])
+    return observation.objects
+
+
+class SlowObserver(jc.ObjectObserver):
+  """Tracks how many observers are collecting at the same time.
+
+  Each observer waits (for up to a few seconds) until two are collecting
+  at once, so if they are collected concurrently then they overlap.
+  """
+  lock = threading.Lock()
+  overlapped = threading.Event()
+  active = 0
+  max_active = 0
+
+  def __init__(self, value):
+    super(SlowObserver, self).__init__()
+    self.__value = value
+
+  def collect_observation(self, context, observation, trace=True):
+    with SlowObserver.lock:
+      SlowObserver.active += 1
+      SlowObserver.max_active = max(SlowObserver.max_active,
+                                    SlowObserver.active)
+      if SlowObserver.active > 1:
+        SlowObserver.overlapped.set()
+    SlowObserver.overlapped.wait(5)
+    with SlowObserver.lock:
+      SlowObserver.active -= 1
+    observation.add_object(self.__value)
+    return observation.objects
+
+
+class CountingObserver(jc.ObjectObserver):
+  """Shares its observations with other CountingObservers of the same query."""
+  def __init__(self, query, values):
+    super(CountingObserver, self).__init__()
+    self.__query = query
+    self.__values = values
+    self.calls = 0
+
+  def get_cache_key(self, context):
+    return self._make_cache_key(self.__query)
+
+  def collect_observation(self, context, observation, trace=True):
+    self.calls += 1
+    observation.add_object(self.__values[min(self.calls, len(self.__values))
+                                         - 1])
+    return observation.objects
+
+
+class PagingObserver(jc.ObjectObserver):
+  """Streams its observations a page at a time."""
+  def __init__(self, pages):
+    super(PagingObserver, self).__init__()
+    self.__pages = pages
+    self.pages_fetched = 0
+
+  @property
+  def supports_streaming(self):
+    return True
+
+  def collect_observation(self, context, observation, trace=True):
+    for _ in self.stream_observation(context, observation, trace=trace):
+      pass
+    return observation.objects
+
+  def stream_observation(self, context, observation, trace=True):
+    for page in self.__pages:
+      self.pages_fetched += 1
+      yield self.filter_all_objects_to_observation(
+          context, page, observation)
+
+
+class KeyedPagingObserver(PagingObserver):
+  """A PagingObserver whose observations can be shared by query."""
+  def __init__(self, query, pages):
+    super(KeyedPagingObserver, self).__init__(pages)
+    self.__query = query
+
+  def get_cache_key(self, context):
+    return self._make_cache_key(self.__query)
+
+
+class CountingVerifier(jc.ValueObservationVerifier):
+  """Counts how many observations were verified."""
+  def __init__(self, *args, **kwargs):
+    super(CountingVerifier, self).__init__(*args, **kwargs)
+    self.calls = 0
+
+  def __call__(self, context, observation):
+    self.calls += 1
+    return super(CountingVerifier, self).__call__(context, observation)
+
+
+class CountingContext(ExecutionContext):
+  """Counts how often the versions of its keys were requested."""
+  def __init__(self, *args, **kwargs):
+    super(CountingContext, self).__init__(*args, **kwargs)
+    self.key_version_calls = 0
+
+  def key_versions(self):
+    self.key_version_calls += 1
+    return super(CountingContext, self).key_versions()
+
+
+class RecordingRetryPolicy(FixedIntervalRetryPolicy):
+  """Records the attempt numbers that it was asked about."""
+  def __init__(self, interval_secs):
+    super(RecordingRetryPolicy, self).__init__(interval_secs)
+    self.attempts = []
+
+  def _do_next_sleep_secs(self, attempt, prev_sleep_secs):
+    self.attempts.append(attempt)
+    return super(RecordingRetryPolicy, self)._do_next_sleep_secs(
+        attempt, prev_sleep_secs)
+
+
 class JsonContractTest(unittest.TestCase):
   def assertEqual(self, expect, have, msg=''):
     if not msg:
@@ -85,6 +225,354 @@ class JsonContractTest(unittest.TestCase):
     self.assertEqual(expect_result, result)
     self.assertFalse(result)
 
+  def test_clause_stops_streaming_once_satisfied(self):
+    context = ExecutionContext()
+    pages = [[_LETTER_DICT, _COMPOSITE_DICT], [_MIXED_DICT], [_LETTER_DICT]]
+    builder = jc.ValueObservationVerifierBuilder('Test')
+    builder.contains_path_value('a', 'A', min=2)
+    builder.contains_path_value('x', 'X')
+
+    observer = PagingObserver(pages)
+    clause = jc.ContractClause('TestClause', observer, builder.build())
+    result = clause.verify(context)
+    self.assertTrue(result)
+    self.assertEqual(2, observer.pages_fetched)
+    self.assertEqual([_LETTER_DICT, _COMPOSITE_DICT, _MIXED_DICT],
+                     result.verify_results.observation.objects)
+
+  def test_contract_streams_unshared_observations(self):
+    context = ExecutionContext()
+    pages = [[_LETTER_DICT], [_MIXED_DICT], [_LETTER_DICT], [_MIXED_DICT],
+             [_LETTER_DICT]]
+    def make_clause(observer):
+      builder = jc.ValueObservationVerifierBuilder('Test')
+      builder.contains_path_value('a', 'A')
+      return jc.ContractClause('TestClause', observer, builder.build())
+
+    # Only this clause observes its query, so it stops once satisfied.
+    streamed = KeyedPagingObserver('streamed', pages)
+    shared = [KeyedPagingObserver('shared', pages) for _ in range(2)]
+    contract = jc.Contract()
+    for observer in [streamed] + shared:
+      contract.add_clause(make_clause(observer))
+    self.assertTrue(contract.verify(context))
+    self.assertEqual(1, streamed.pages_fetched)
+
+    # The shared observation is collected in full, once.
+    self.assertEqual(len(pages),
+                     sum(observer.pages_fetched for observer in shared))
+
+  def test_clause_streams_everything_unless_satisfied(self):
+    context = ExecutionContext()
+    pages = [[_LETTER_DICT], [_MIXED_DICT], [_LETTER_DICT]]
+
+    # The maximum cannot be decided until every object is observed.
+    builder = jc.ValueObservationVerifierBuilder('Test')
+    builder.contains_path_value('a', 'A', min=1, max=3)
+    observer = PagingObserver(pages)
+    clause = jc.ContractClause('TestClause', observer, builder.build())
+    self.assertTrue(clause.verify(context))
+    self.assertEqual(3, observer.pages_fetched)
+
+    # The minimum is never satisfied.
+    builder = jc.ValueObservationVerifierBuilder('Test')
+    builder.contains_path_value('x', 'X', min=2)
+    observer = PagingObserver(pages)
+    clause = jc.ContractClause('TestClause', observer, builder.build())
+    self.assertFalse(clause.verify(context))
+    self.assertEqual(3, observer.pages_fetched)
+
+  def test_clause_trace_observations(self):
+    traces = []
+    class TraceRecordingObserver(FakeObserver):
+      def collect_observation(self, context, observation, trace=True):
+        traces.append(trace)
+        return super(TraceRecordingObserver, self).collect_observation(
+            context, observation, trace=trace)
+
+    context = ExecutionContext()
+    observation = jc.Observation()
+    observation.add_object('A')
+    observer = TraceRecordingObserver(observation)
+    verifier = jc.ValueObservationVerifier(
+        'Has A', constraints=[jp.STR_EQ('A')])
+    self.assertTrue(jc.ContractClause('Traced', observer, verifier)
+                    .verify(context))
+    self.assertTrue(jc.ContractClause('Untraced', observer, verifier,
+                                      trace_observations=False)
+                    .verify(context))
+
+    builder = jc.ContractClauseBuilder('Built', observer=observer)
+    builder.verifier_builder.append_verifier(verifier)
+    self.assertTrue(builder.trace_observations)
+    builder.trace_observations = False
+    self.assertTrue(builder.build().verify(context))
+    self.assertEqual([True, False, False], traces)
+
+  def test_clause_speculative_success_is_not_final(self):
+    context = ExecutionContext(Value='A')
+    completed = threading.Event()
+    observer = CompletingObserver(completed, 2)
+    verifier = jc.ValueObservationVerifier(
+        'Has A', constraints=[jp.STR_EQ('A')])
+    clause = jc.ContractClause(
+        'TestClause', observer, verifier,
+        retry_policy=FixedIntervalRetryPolicy(0.01))
+
+    result = clause.verify(context, operation_completed=completed)
+    self.assertTrue(result)
+    # The two observations made before the operation completed were good
+    # but not sufficient. We needed a third observation afterwards.
+    self.assertEqual(3, observer.calls)
+
+  def test_clause_speculative_errors_are_not_fatal(self):
+    context = ExecutionContext()
+    completed = threading.Event()
+    observer = CompletingObserver(completed, 3)
+    verifier = jc.ValueObservationVerifier(
+        'Has A', constraints=[jp.STR_EQ('A')])
+    clause = jc.ContractClause(
+        'TestClause', observer, verifier,
+        retry_policy=FixedIntervalRetryPolicy(0.01))
+
+    # The observer raises KeyError until the "operation" supplies the value.
+    result = clause.verify(context, operation_completed=completed)
+    self.assertTrue(result)
+    self.assertEqual(4, observer.calls)
+
+  def test_clause_reuses_unchanged_speculative_result(self):
+    context = ExecutionContext(Value='A')
+    completed = threading.Event()
+    observer = CompletingObserver(completed, 2)
+    verifier = CountingVerifier('Has A', constraints=[jp.STR_EQ('A')])
+    clause = jc.ContractClause(
+        'TestClause', observer, verifier,
+        retry_policy=FixedIntervalRetryPolicy(0.01))
+
+    result = clause.verify(context, operation_completed=completed)
+    self.assertTrue(result)
+    self.assertEqual(3, observer.calls)
+    self.assertEqual(1, verifier.calls)
+    self.assertEqual(1, result.attempts)
+
+  def test_clause_reverifies_after_context_changes(self):
+    context = ExecutionContext(Expect='A')
+    completed = threading.Event()
+    calls = []
+    def collect(context, observation, trace=True):
+      calls.append(trace)
+      if len(calls) == 2:
+        # Mimic a status_extractor setting what the verifier expects.
+        context['Expect'] = 'B'
+        completed.set()
+      observation.add_object('A')
+      return observation.objects
+    observer = FakeObserver(jc.Observation())
+    observer.collect_observation = collect
+    expect_pred = jp.STR_EQ(lambda context: context['Expect'])
+    verifier = CountingVerifier('Has Expect', constraints=[expect_pred])
+    clause = jc.ContractClause(
+        'TestClause', observer, verifier,
+        retry_policy=FixedIntervalRetryPolicy(0.01))
+
+    result = clause.verify(context, operation_completed=completed)
+    self.assertFalse(result)
+    self.assertEqual(3, len(calls))
+    self.assertEqual(2, verifier.calls)
+
+  def test_clause_continues_speculative_retry_policy(self):
+    context = ExecutionContext(Value='B')
+    completed = threading.Event()
+    observer = CompletingObserver(completed, 3)
+    policy = RecordingRetryPolicy(0.01)
+    clause = jc.ContractClause(
+        'TestClause', observer,
+        jc.ValueObservationVerifier('Has Z', constraints=[jp.STR_EQ('Z')]),
+        retryable_for_secs=0.1, retry_policy=policy)
+
+    result = clause.verify(context, operation_completed=completed)
+    self.assertFalse(result)
+    self.assertEqual(range(len(policy.attempts)), policy.attempts)
+    # The operation completed during the third observation, after two
+    # retries. The last observation afterwards gave up rather than retrying.
+    self.assertEqual(observer.calls - 2, len(policy.attempts))
+    self.assertEqual(observer.calls - 3, result.attempts)
+
+  def test_contract_concurrent_clauses(self):
+    context = ExecutionContext()
+    contract = jc.Contract(max_concurrent_clauses=3)
+    values = ['A', 'B', 'A', 'A', 'C', 'A']
+    for index, value in enumerate(values):
+      contract.add_clause(jc.ContractClause(
+          'Clause{0}'.format(index), SlowObserver(value),
+          jc.ValueObservationVerifier(
+              'Has A', constraints=[jp.STR_EQ('A')])))
+
+    output = StringIO()
+    journal = Journal()
+    journal.open_with_file(output)
+    set_thread_journal(journal)
+    try:
+      SlowObserver.max_active = 0
+      SlowObserver.overlapped.clear()
+      result = contract.verify(context)
+    finally:
+      set_thread_journal(None)
+
+    self.assertFalse(result)
+    self.assertTrue(1 < SlowObserver.max_active <= 3, SlowObserver.max_active)
+    self.assertEqual(['Clause{0}'.format(i) for i in range(len(values))],
+                     [r.clause.title for r in result.clause_results])
+    self.assertEqual([value == 'A' for value in values],
+                     [bool(r) for r in result.clause_results])
+
+    # Each clause's journal context is written contiguously in clause order.
+    entries = [json.JSONDecoder().decode(text)
+               for text in RecordInputStream(StringIO(output.getvalue()))]
+    controls = [(entry['control'], entry.get('_title'))
+                for entry in entries if entry.get('control')]
+    expect = []
+    for index in range(len(values)):
+      expect.extend([
+          ('BEGIN', 'Verifying ContractClause: Clause{0}'.format(index)),
+          ('END', None)])
+    self.assertEqual(expect, controls)
+
+  def test_contract_shares_observations(self):
+    context = ExecutionContext()
+    first_observer = CountingObserver('query', ['A'])
+    second_observer = CountingObserver('query', ['B'])
+    other_observer = CountingObserver('other query', ['C'])
+
+    contract = jc.Contract()
+    for index, observer in enumerate(
+        [first_observer, second_observer, other_observer]):
+      verifier = jc.ValueObservationVerifier(
+          'Verifier', constraints=[jp.STR_NE('X')])
+      contract.add_clause(jc.ContractClause(
+          'Clause{0}'.format(index), observer, verifier))
+
+    result = contract.verify(context)
+    self.assertTrue(result)
+    self.assertEqual(1, first_observer.calls)
+    self.assertEqual(0, second_observer.calls)
+    self.assertEqual(1, other_observer.calls)
+    self.assertEqual(
+        ['A'],
+        result.clause_results[1].verify_results.observation.objects)
+
+    # Without the contract there is no cache so each clause observes.
+    contract.clauses[1].verify(context)
+    self.assertEqual(1, second_observer.calls)
+
+    # Each verification has its own cache, so observes again.
+    contract.verify(context)
+    self.assertEqual(2, first_observer.calls)
+
+  def test_concurrent_contracts_do_not_share_observations(self):
+    # Contracts verified at the same time with a shared context (as test
+    # cases run concurrently are) must not see each other's observations.
+    context = ExecutionContext()
+    started = threading.Event()
+    release = threading.Event()
+
+    class BlockingObserver(CountingObserver):
+      def collect_observation(self, context, observation, trace=True):
+        started.set()
+        release.wait(5)
+        return super(BlockingObserver, self).collect_observation(
+            context, observation, trace=trace)
+
+    first_observer = BlockingObserver('query', ['A'])
+    second_observer = CountingObserver('query', ['B'])
+    contracts = []
+    for observer in [first_observer, second_observer]:
+      contract = jc.Contract()
+      contract.add_clause(jc.ContractClause(
+          'Clause', observer, jc.ValueObservationVerifier(
+              'Verifier', constraints=[jp.STR_NE('X')])))
+      contracts.append(contract)
+
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(contracts[0].verify(context)))
+    thread.start()
+    started.wait(5)
+    second_result = contracts[1].verify(context)
+    release.set()
+    thread.join()
+
+    self.assertEqual(1, first_observer.calls)
+    self.assertEqual(1, second_observer.calls)
+    for expect, result in [(['A'], results[0]), (['B'], second_result)]:
+      self.assertEqual(
+          expect,
+          result.clause_results[0].verify_results.observation.objects)
+
+  def test_clause_retry_invalidates_cached_observation(self):
+    context = ExecutionContext()
+    cache = jc.ObservationCache()
+    observer = CountingObserver('query', ['B', 'A'])
+    verifier = jc.ValueObservationVerifier(
+        'Has A', constraints=[jp.STR_EQ('A')])
+    clause = jc.ContractClause(
+        'TestClause', observer, verifier, retryable_for_secs=5,
+        retry_policy=FixedIntervalRetryPolicy(0))
+
+    self.assertTrue(clause.verify(context, observation_cache=cache))
+    self.assertEqual(2, observer.calls)
+    self.assertEqual(2, cache.num_collected)
+
+    # The successful observation remains available to other clauses.
+    self.assertTrue(clause.verify(context, observation_cache=cache))
+    self.assertEqual(2, observer.calls)
+    self.assertEqual(1, cache.num_hits)
+
+  def test_clause_skips_unchanged_observations(self):
+    context = ExecutionContext()
+    observer = CountingObserver('query', ['B', 'B', 'B', 'A'])
+    verifier = CountingVerifier('Has A', constraints=[jp.STR_EQ('A')])
+    clause = jc.ContractClause(
+        'TestClause', observer, verifier, retryable_for_secs=5,
+        retry_policy=FixedIntervalRetryPolicy(0))
+
+    result = clause.verify(context)
+    self.assertTrue(result)
+    self.assertEqual(4, observer.calls)
+    self.assertEqual(2, verifier.calls)
+    self.assertEqual(4, result.attempts)
+
+  def test_clause_reuses_result_for_unchanged_observation(self):
+    context = ExecutionContext()
+    observer = CountingObserver('query', ['B'])
+    verifier = CountingVerifier('Has A', constraints=[jp.STR_EQ('A')])
+    clause = jc.ContractClause(
+        'TestClause', observer, verifier, retryable_for_secs=0.2,
+        retry_policy=FixedIntervalRetryPolicy(0.05))
+
+    result = clause.verify(context)
+    self.assertFalse(result)
+    self.assertTrue(observer.calls > 1)
+    self.assertEqual(1, verifier.calls)
+    self.assertEqual(observer.calls, result.attempts)
+    self.assertEqual(clause.verify_once(context), result)
+
+  def test_clause_fingerprints_only_when_retrying(self):
+    verifier = CountingVerifier('Has A', constraints=[jp.STR_EQ('A')])
+    clause = jc.ContractClause(
+        'TestClause', CountingObserver('query', ['B']), verifier,
+        retryable_for_secs=0)
+    context = CountingContext()
+    self.assertFalse(clause.verify(context))
+    self.assertEqual(0, context.key_version_calls)
+
+    clause = jc.ContractClause(
+        'TestClause', CountingObserver('query', ['B']), verifier,
+        retryable_for_secs=0.2, retry_policy=FixedIntervalRetryPolicy(0.05))
+    context = CountingContext()
+    self.assertFalse(clause.verify(context))
+    self.assertTrue(context.key_version_calls > 0)
+
   def test_contract_success(self):
     context = ExecutionContext()
     observation = jc.Observation()
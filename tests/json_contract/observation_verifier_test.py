@@ -77,6 +77,24 @@ class ObservationVerifierTest(unittest.TestCase):
                      verify_results.good_results)
 
 
+  def test_result_builder_validated_object_set(self):
+    context = ExecutionContext()
+    observation = jc.Observation()
+    observation.add_all_objects([{'a': 'A', 'n': [1]}, {'a': 'A', 'n': [1]},
+                                 {'a': 'A', 'n': [2]}, {'a': 'A', 's': set()}])
+
+    builder = jc.ObservationVerifyResultBuilder(observation)
+    for pred in [jp.PathPredicate('a', jp.STR_EQ('A')),
+                 jp.PathPredicate('a', jp.STR_NE('B'))]:
+      builder.add_map_result(jp.MapPredicate(pred)(context,
+                                                   observation.objects))
+
+    # Equal objects are only validated once, regardless of identity,
+    # and objects that cannot be hashed are still tracked.
+    objects = observation.objects
+    self.assertEqual([objects[0], objects[2], objects[3]],
+                     builder.validated_object_set)
+
   def test_result_builder_add_bad_result(self):
     context = ExecutionContext()
     observation = jc.Observation()
@@ -223,6 +241,56 @@ class ObservationVerifierTest(unittest.TestCase):
     self.assertEqual(expect, got)
     self.assertEqual(verifiers, _called_verifiers)
 
+  def test_observation_verifier_shares_results_across_terms(self):
+    transformed = []
+    def xform(context, value):
+      transformed.append(value)
+      return value
+
+    def make_verifier(title, value):
+      return jc.ValueObservationVerifier(
+          title, constraints=[
+              jp.PathPredicate('a', jp.STR_EQ(value), transform=xform)])
+
+    builder = jc.ObservationVerifierBuilder(title='Test')
+    builder.append_verifier(make_verifier('A1', 'A'))
+    builder.append_verifier(make_verifier('B', 'B'))
+    builder.append_verifier(make_verifier('A2', 'A'), new_term=True)
+    verifier = builder.build()
+
+    context = ExecutionContext()
+    observation = jc.Observation()
+    observation.add_all_objects([{'a': 'A'}, {'a': 'B'}])
+    self.assertTrue(verifier(context, observation))
+
+    # 'A' and 'B' each transform both objects. 'A2' reuses the results of 'A1'.
+    self.assertEqual(4, len(transformed))
+    self.assertFalse(jp.PREDICATE_MEMO_CONTEXT_KEY in context)
+
+  def test_observation_verifier_streaming_check(self):
+    def make_verifier(title, path, value, **kwargs):
+      return jc.ValueObservationVerifier(
+          title, constraints=[jp.CardinalityPredicate(
+              jp.PathPredicate(path, jp.STR_EQ(value)), **kwargs)])
+
+    context = ExecutionContext()
+    builder = jc.ObservationVerifierBuilder(title='Test')
+    builder.append_verifier(make_verifier('A', 'a', 'A', min=2))
+    builder.append_verifier(make_verifier('B', 'b', 'B'))
+    builder.append_verifier(make_verifier('C', 'c', 'C', max=1), new_term=True)
+    check = builder.build().begin_streaming(context)
+    self.assertFalse(check.add_objects(context, [{'a': 'A', 'c': 'C'}]))
+    self.assertFalse(check.add_objects(context, [{'a': 'A'}]))
+    self.assertTrue(check.add_objects(context, [{'b': 'B'}]))
+
+    # A term with an upper bound can never be decided early.
+    builder = jc.ObservationVerifierBuilder(title='Test')
+    builder.append_verifier(make_verifier('C', 'c', 'C', max=1))
+    self.assertIsNone(builder.build().begin_streaming(context))
+    self.assertIsNone(jc.ValueObservationVerifier(
+        'Strict', constraints=[jp.PathPredicate('a')],
+        strict=True).begin_streaming(context))
+
 
 if __name__ == '__main__':
   # pylint: disable=invalid-name
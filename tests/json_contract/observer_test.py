@@ -14,6 +14,8 @@
 
 # pylint: disable=missing-docstring
 
+import threading
+import time
 import unittest
 
 from citest.base import ExecutionContext
@@ -111,6 +113,29 @@ class JsonObserverTest(unittest.TestCase):
     # Note that filtering doesnt observe errors.
     self.assertEqual(expected, observation)
 
+  def test_object_observer_filters_iterator(self):
+    context = ExecutionContext()
+    produced = []
+    def generate():
+      for obj in [_LETTER_DICT, _NUMBER_DICT, _MIXED_DICT]:
+        produced.append(obj)
+        yield obj
+
+    observer = jc.ObjectObserver(jp.PathEqPredicate('a', 'A'))
+    observation = jc.Observation()
+    added = observer.filter_all_objects_to_observation(
+        context, generate(), observation)
+    self.assertEqual([_LETTER_DICT, _MIXED_DICT], added)
+    self.assertEqual(added, observation.objects)
+    self.assertEqual(3, len(produced))
+
+    observer = jc.ObjectObserver()
+    observation = jc.Observation()
+    added = observer.filter_all_objects_to_observation(
+        context, generate(), observation)
+    self.assertEqual([_LETTER_DICT, _NUMBER_DICT, _MIXED_DICT], added)
+    self.assertEqual(added, observation.objects)
+
   def test_observation_strict_vs_nonstrict(self):
     aA = jp.PathEqPredicate('a', 'A')
     bB = jp.PathEqPredicate('b', 'B')
@@ -157,6 +182,59 @@ class JsonObserverTest(unittest.TestCase):
           print 'GOT {0}'.format(verify_result)
           raise
 
+  def test_observation_cache(self):
+    cache = jc.ObservationCache()
+    calls = []
+    def collect(observation):
+      calls.append(observation)
+      observation.add_object(len(calls))
+
+    first = cache.get_or_collect('key', collect)
+    self.assertEqual([1], first.objects)
+    self.assertTrue(cache.get_or_collect('key', collect) is first)
+    self.assertEqual([2], cache.get_or_collect('other', collect).objects)
+    self.assertEqual(2, len(calls))
+    self.assertEqual(2, cache.num_collected)
+    self.assertEqual(1, cache.num_hits)
+
+    cache.invalidate('key')
+    self.assertEqual([3], cache.get_or_collect('key', collect).objects)
+
+  def test_observation_cache_errors_are_not_cached(self):
+    cache = jc.ObservationCache()
+    def fail(observation):
+      raise ValueError('Failed')
+    self.assertRaises(ValueError, cache.get_or_collect, 'key', fail)
+
+    def collect(observation):
+      observation.add_object('A')
+    self.assertEqual(['A'], cache.get_or_collect('key', collect).objects)
+
+  def test_observation_cache_single_flight(self):
+    cache = jc.ObservationCache()
+    calls = []
+    def collect(observation):
+      calls.append(observation)
+      time.sleep(0.05)
+      observation.add_object('A')
+
+    results = []
+    def request():
+      results.append(cache.get_or_collect('key', collect))
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(1, len(calls))
+    self.assertEqual(4, len(results))
+    self.assertTrue(all([result is calls[0] for result in results]))
+
+  def test_object_observer_cache_key(self):
+    context = ExecutionContext()
+    self.assertIsNone(jc.ObjectObserver().get_cache_key(context))
+
 
 if __name__ == '__main__':
   loader = unittest.TestLoader()
@@ -38,6 +38,15 @@ _DICT_ARRAY = [{}, _LETTER_DICT, _NUMBER_DICT, _COMPOSITE_DICT]
 _MULTI_ARRAY = [_LETTER_DICT, _NUMBER_DICT, _LETTER_DICT, _NUMBER_DICT]
 
 
+class CountingPathPredicate(jp.PathPredicate):
+  """A PathPredicate that counts the traversals it makes."""
+  traversals = 0
+
+  def traverse(self, context, source):
+    CountingPathPredicate.traversals += 1
+    return super(CountingPathPredicate, self).traverse(context, source)
+
+
 class JsonValueObservationVerifierTest(unittest.TestCase):
   def assertEqual(self, expect, have, msg=''):
     if not isinstance(expect, JsonSnapshotableEntity):
@@ -70,6 +79,130 @@ class JsonValueObservationVerifierTest(unittest.TestCase):
     count_bB = jp.CardinalityPredicate(bB, 1, None)
     self.assertEqual([count_aA, count_bB], verifier.constraints)
 
+  def test_object_observation_verifier_shares_traversals(self):
+    context = ExecutionContext()
+    objects = [_LETTER_DICT, _COMPOSITE_DICT, {'a': ['A', 'B']}, _NUMBER_DICT]
+    observation = jc.Observation()
+    observation.add_all_objects(objects)
+
+    CountingPathPredicate.traversals = 0
+    constraints = [
+        jp.CardinalityPredicate(CountingPathPredicate('a', jp.STR_EQ('A')),
+                                min=1, max=None),
+        jp.CardinalityPredicate(CountingPathPredicate('a', jp.STR_EQ('B')),
+                                min=0, max=0),
+        jp.CardinalityPredicate(CountingPathPredicate('letters/a', None),
+                                min=1, max=1),
+        CountingPathPredicate('a', jp.STR_NE('Z')),
+        jp.CardinalityPredicate(jp.DICT_MATCHES({'b': jp.NUM_EQ(2)})),
+        jp.DICT_MATCHES({'a': jp.STR_EQ('A')})]
+    verifier = jc.ValueObservationVerifier(
+        title='Shared', constraints=constraints)
+    result = verifier(context, observation)
+    self.assertEqual(2, CountingPathPredicate.traversals)
+
+    # The results are the same as applying each constraint individually.
+    expect_builder = jc.ObservationVerifyResultBuilder(observation)
+    valid = True
+    for constraint in constraints:
+      if isinstance(constraint,
+                    jp.path_predicate.ProducesPathPredicateResult):
+        constraint_result = constraint(context, objects)
+      else:
+        constraint_result = jp.PathPredicate('', constraint)(context, objects)
+      valid = valid and bool(constraint_result)
+      expect_builder.add_path_predicate_result(constraint_result)
+    expect = expect_builder.build(valid)
+    self.assertFalse(result)
+    self.assertTrue(expect == result)
+    self.assertEqual(expect.good_results, result.good_results)
+    self.assertEqual(expect.bad_results, result.bad_results)
+    self.assertEqual(expect.failed_constraints, result.failed_constraints)
+
+  def test_fast_pass_valid_omits_details(self):
+    context = ExecutionContext()
+    objects = [_LETTER_DICT, _COMPOSITE_DICT, _NUMBER_DICT]
+    observation = jc.Observation()
+    observation.add_all_objects(objects)
+    constraints = [
+        jp.CardinalityPredicate(jp.PathPredicate('a', jp.STR_EQ('A')),
+                                min=1, max=1),
+        jp.CardinalityPredicate(jp.PathPredicate('b', jp.NUM_EQ(7)),
+                                min=0, max=0),
+        jp.PathPredicate('letters/z', jp.STR_EQ('Z')),
+        jp.DICT_MATCHES({'three': jp.NUM_GE(3)})]
+
+    fast = jc.ValueObservationVerifier(
+        title='Fast', constraints=constraints, fast_pass=True)
+    result = fast(context, observation)
+    self.assertTrue(result)
+    self.assertEqual([], result.good_results)
+    self.assertEqual([], result.bad_results)
+    self.assertEqual([], result.failed_constraints)
+
+    # Diagnostic mode explains the results as if not a fast pass.
+    full = jc.ValueObservationVerifier(
+        title='Full', constraints=constraints)
+    expect = full(context, observation)
+    self.assertTrue(expect)
+    context.set_internal(jp.DIAGNOSTIC_MODE_CONTEXT_KEY, True)
+    result = fast(context, observation)
+    self.assertTrue(result)
+    self.assertTrue(expect == result)
+    self.assertNotEqual([], result.good_results)
+
+  def test_fast_pass_invalid_is_fully_explained(self):
+    context = ExecutionContext()
+    objects = [_LETTER_DICT, _NUMBER_DICT]
+    observation = jc.Observation()
+    observation.add_all_objects(objects)
+    constraints = [
+        jp.CardinalityPredicate(jp.PathPredicate('a', jp.STR_EQ('A')),
+                                min=1, max=1),
+        jp.CardinalityPredicate(jp.PathPredicate('a', jp.NUM_EQ(1)),
+                                min=0, max=0)]
+
+    fast = jc.ValueObservationVerifier(
+        title='Fast', constraints=constraints, fast_pass=True)
+    full = jc.ValueObservationVerifier(
+        title='Full', constraints=constraints)
+    result = fast(context, observation)
+    expect = full(context, observation)
+    self.assertFalse(result)
+    self.assertTrue(expect == result)
+    self.assertEqual(expect.good_results, result.good_results)
+    self.assertEqual(expect.bad_results, result.bad_results)
+    self.assertEqual(expect.failed_constraints, result.failed_constraints)
+
+  def test_fast_pass_builder(self):
+    builder = jc.ValueObservationVerifierBuilder('Fast', fast_pass=True)
+    builder.contains_path_value('a', 'A')
+    self.assertTrue(builder.build().fast_pass)
+    self.assertFalse(
+        jc.ValueObservationVerifierBuilder('Full').build().fast_pass)
+
+  def test_fast_pass_in_parallel(self):
+    context = ExecutionContext()
+    observation = jc.Observation()
+    observation.add_all_objects([_LETTER_DICT, _COMPOSITE_DICT] * 10)
+    with jp.ParallelEvaluator(min_objects=10, processes=2) as evaluator:
+      builder = jc.ValueObservationVerifierBuilder(
+          'Fast', fast_pass=True, parallel_evaluator=evaluator)
+      builder.contains_path_value('a', 'A', min=10, max=10)
+      builder.excludes_path_value('z', 'A')
+      result = builder.build()(context, observation)
+      self.assertTrue(result)
+      self.assertEqual([], result.good_results)
+
+      builder.contains_path_value('a', 'A', max=9)
+      expect = jc.ValueObservationVerifierBuilder('Full')
+      expect.contains_path_value('a', 'A', min=10, max=10)
+      expect.excludes_path_value('z', 'A')
+      expect.contains_path_value('a', 'A', max=9)
+      result = builder.build()(context, observation)
+      self.assertFalse(result)
+      self.assertTrue(expect.build()(context, observation) == result)
+
   def test_object_observation_verifier_multiple_constraint_found(self):
     context = ExecutionContext()
     pred_list = [jp.PathPredicate('a', jp.STR_EQ('A')),
@@ -297,6 +430,57 @@ class JsonValueObservationVerifierTest(unittest.TestCase):
       self.assertEqual(expect_results, verify_results)
 
 
+  def test_early_exit_failure_is_fully_explained(self):
+    context = ExecutionContext()
+    observation = jc.Observation()
+    observation.add_all_objects([_LETTER_DICT, _LETTER_DICT, {'a': 'X'}])
+    builder = jc.ValueObservationVerifierBuilder('Test', early_exit=True)
+    builder.contains_path_value('a', 'A')
+    builder.excludes_path_value('b', 'B')
+    verifier = builder.build()
+    self.assertTrue(verifier.constraints[0].early_exit)
+
+    result = verifier(context, observation)
+    self.assertFalse(result)
+    self.assertEqual([verifier.constraints[1]], result.failed_constraints)
+
+    # The satisfied constraint stopped at the first 'A' found whereas
+    # the failed one was applied again to find every 'B'.
+    self.assertEqual(
+        [_LETTER_DICT['a'], _LETTER_DICT['b'], _LETTER_DICT['b']],
+        [attempt.obj for attempt in result.good_results])
+
+  def test_diagnostic_mode_does_not_modify_context(self):
+    class ModeRecordingPredicate(jp.ValuePredicate):
+      def __init__(self, pred):
+        self.__pred = pred
+        self.modes = []
+
+      def __call__(self, context, value):
+        self.modes.append(
+            (jp.is_diagnostic_mode(context),
+             jp.DIAGNOSTIC_MODE_CONTEXT_KEY in context,
+             jp.PREDICATE_MEMO_CONTEXT_KEY in context))
+        return self.__pred(context, value)
+
+    context = ExecutionContext()
+    observation = jc.Observation()
+    observation.add_all_objects([_LETTER_DICT, _LETTER_DICT])
+    recorder = ModeRecordingPredicate(jp.STR_EQ('B'))
+    verifier = jc.ValueObservationVerifier(
+        'Test', constraints=[jp.CardinalityPredicate(
+            jp.PathPredicate('b', recorder), max=0, early_exit=True)])
+
+    self.assertFalse(verifier(context, observation))
+    # The failure was explained again in diagnostic mode without the
+    # context itself ever being put into diagnostic mode.
+    self.assertEqual((False, False, False), recorder.modes[0])
+    self.assertTrue(len(recorder.modes) > 1)
+    self.assertEqual([(True, False, False)] * (len(recorder.modes) - 1),
+                     recorder.modes[1:])
+    self.assertFalse(jp.is_diagnostic_mode(context))
+
+
 if __name__ == '__main__':
   loader = unittest.TestLoader()
   suite = loader.loadTestsFromTestCase(JsonValueObservationVerifierTest)
@@ -62,6 +62,103 @@ class JsonBinaryPredicateTest(unittest.TestCase):
                                 source=source, target_path=target_path),
                      got_result)
 
+  def test_check_agrees_with_call(self):
+    context = ExecutionContext()
+    values = ['abc', 'ABC', '', 1, 2.5, True, [], ['a', 1], {},
+              {'a': 'A', 'b': 2}, {'a': {'b': 'B'}}, None]
+    predicates = [
+        jp.STR_EQ('abc'), jp.STR_NE('abc'), jp.STR_SUBSTR('b'),
+        jp.NUM_EQ(1), jp.NUM_LE(2), jp.NUM_GE(2),
+        jp.LIST_EQ(['a', 1]), jp.LIST_SUBSET(['a']), jp.LIST_MEMBER('a'),
+        jp.DICT_EQ({}), jp.DICT_SUBSET({'a': 'A'}),
+        jp.DICT_MATCHES({'a': jp.STR_EQ('A')}),
+        jp.DICT_MATCHES({'a': jp.STR_EQ('A')}, strict=True),
+        jp.EQUIVALENT('abc'), jp.EQUIVALENT({'a': {'b': 'B'}}),
+        jp.DIFFERENT(1), jp.CONTAINS('b'), jp.CONTAINS({'b': 'B'}),
+        jp.NOT(jp.CONTAINS('b'))]
+    for pred in predicates:
+      for value in values:
+        try:
+          expect = bool(pred(context, value))
+        except (AttributeError, NotImplementedError, TypeError) as ex:
+          self.assertRaises(type(ex), pred.check, context, value)
+          continue
+        self.assertEqual(expect, pred.check(context, value),
+                         '{0} on {1!r}'.format(pred, value))
+
+  def test_polymorphic_numeric_values(self):
+    context = ExecutionContext()
+    for value in [2, 2L, 2.0]:
+      for pred, expect in [(jp.EQUIVALENT(2), True), (jp.EQUIVALENT(3), False),
+                           (jp.DIFFERENT(3), True), (jp.DIFFERENT(2), False),
+                           (jp.CONTAINS(2.0), True), (jp.CONTAINS(3), False)]:
+        self.assertEqual(expect, bool(pred(context, value)))
+        self.assertEqual(expect, pred.check(context, value))
+
+  def test_compiled_plan_is_reused(self):
+    context = ExecutionContext()
+    pred = jp.DICT_MATCHES({'a': jp.EQUIVALENT('A'), 'b': jp.NUM_LE(2)})
+    plan = pred.compile()
+    self.assertTrue(plan is pred.compile())
+    self.assertTrue(pred.check(context, {'a': 'A', 'b': 1}))
+    self.assertFalse(pred.check(context, {'a': 'A', 'b': 3}))
+    self.assertFalse(pred.check(context, {'a': 'B', 'b': 1}))
+    self.assertTrue(plan is pred.compile())
+
+  def test_check_agrees_with_overridden_call(self):
+    class LenientEquivalentPredicate(jp.EquivalentPredicate):
+      def __call__(self, context, value):
+        if value is None:
+          return jp.PathValueResult(pred=self, source=value, target_path='',
+                                    path_value=PathValue('', value),
+                                    valid=True)
+        return super(LenientEquivalentPredicate, self).__call__(context, value)
+
+    class StrictEquivalentPredicate(LenientEquivalentPredicate):
+      def _do_compile(self):
+        return lambda context, value: False
+
+    context = ExecutionContext()
+    pred = LenientEquivalentPredicate('abc')
+    self.assertTrue(pred.check(context, None))
+    self.assertTrue(pred.check(context, 'abc'))
+    self.assertFalse(pred.check(context, 'xyz'))
+
+    # A subclass that compiles its own plan is trusted to mirror __call__.
+    self.assertFalse(StrictEquivalentPredicate('abc').check(context, None))
+
+  def test_compiled_plan_evaluates_callable_operand(self):
+    pred = jp.STR_EQ(lambda context: context['want'])
+    self.assertTrue(pred.check(ExecutionContext(want='A'), 'A'))
+    self.assertFalse(pred.check(ExecutionContext(want='B'), 'A'))
+
+    pred = jp.EQUIVALENT(lambda context: context['want'])
+    self.assertTrue(pred.check(ExecutionContext(want=[1, 2]), [2, 1]))
+    self.assertFalse(pred.check(ExecutionContext(want='A'), [1, 2]))
+
+  def test_list_subset_indexed_members(self):
+    context = ExecutionContext()
+    source = [{'a': 'A', 'b': [1, 2], 'c': {'d': 'D'}},
+              {'a': 'X'}, [1, 2, 3], 'text', 4]
+    self.assertTrue(jp.LIST_SUBSET(
+        [4, 'text', [2, 3], {'b': [1]}, {'c': {'d': 'D'}}])(context, source))
+    self.assertFalse(jp.LIST_SUBSET([{'a': 'A', 'z': 'Z'}])(context, source))
+    self.assertFalse(jp.LIST_SUBSET([[4]])(context, source))
+    self.assertTrue(jp.LIST_SUBSET(
+        [{'a': 'X'}, [1, 2, 3]], strict=True)(context, source))
+    self.assertFalse(jp.LIST_SUBSET([{'a': 'A'}], strict=True)(context, source))
+    self.assertTrue(jp.LIST_MEMBER({'c': {}})(context, source))
+    self.assertFalse(jp.LIST_MEMBER(5)(context, source))
+
+  def test_lists_equivalent(self):
+    self.assertTrue(jp.binary_predicate.lists_equivalent(
+        [{'a': 1}, [2, {'b': 3}], 'x'], ['x', {'a': 1}, [2, {'b': 3}]]))
+    self.assertTrue(jp.binary_predicate.lists_equivalent(
+        [{'a': 1}, {'a': 1}, {'b': 2}], [{'a': 1}, {'b': 2}, {'a': 1}]))
+    self.assertFalse(jp.binary_predicate.lists_equivalent(
+        [{'a': 1}, {'a': 1}, {'b': 2}], [{'a': 1}, {'b': 2}, {'b': 2}]))
+    self.assertFalse(jp.binary_predicate.lists_equivalent([[1, 2]], [[2, 1]]))
+
   def test_string_eq(self):
     context = ExecutionContext()
     eq_abc = jp.STR_EQ('abc')
@@ -262,13 +359,39 @@ class JsonBinaryPredicateTest(unittest.TestCase):
     match_pred = jp.LIST_MATCHES(want, unique=True)
     result = match_pred(context, source)
 
+    # Both predicates only match the first value.
     expect = (jp.SequencedPredicateResultBuilder(match_pred)
               .append_result(jp.MapPredicate(jp.NUM_EQ(1))(context, source))
               .append_result(jp.MapPredicate(jp.NUM_NE(2))(context, source))
-              .build(True))
+              .append_result(jp.PredicateResult(
+                  valid=False,
+                  comment='No value is left to uniquely match {0}'.format(
+                      jp.NUM_NE(2))))
+              .build(False))
 
-    self.assertTrue(result)
+    self.assertFalse(result)
     self.assertEquals(expect, result)
+    self.assertFalse(match_pred.check(context, source))
+
+  def test_list_match_unique_assignment(self):
+    context = ExecutionContext()
+    source = [1, 2, 3]
+
+    # NUM_GE(1) accepts every value but must leave 2 for NUM_EQ(2).
+    want = [jp.NUM_GE(1), jp.NUM_EQ(2), jp.NUM_LE(2)]
+    match_pred = jp.LIST_MATCHES(want, unique=True)
+    result = match_pred(context, source)
+    expect = jp.SequencedPredicateResultBuilder(match_pred)
+    for pred in want:
+      expect.append_result(jp.MapPredicate(pred)(context, source))
+    self.assertTrue(result)
+    self.assertEquals(expect.build(True), result)
+    self.assertTrue(match_pred.check(context, source))
+
+    # There are not enough values for four predicates.
+    match_pred = jp.LIST_MATCHES(want + [jp.NUM_GE(0)], unique=True)
+    self.assertFalse(match_pred(context, source))
+    self.assertFalse(match_pred.check(context, source))
 
   def test_list_match_strict_ok(self):
     context = ExecutionContext()
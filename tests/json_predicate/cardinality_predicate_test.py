@@ -151,6 +151,67 @@ class CardinalityPredicateTest(unittest.TestCase):
               result)
 
 
+  def test_check_agrees_with_call(self):
+    context = ExecutionContext()
+    sources = [_CAB, ['A', 'A', 'X'], [], ['C'],
+               {'letters': _CAB}, [{'letters': ['A']}, {'letters': 'B'}]]
+    for min in range(0, 3):
+      for max in [None, 0, 1, 2]:
+        if max is not None and min > max:
+          continue
+        for pred in [jp.CardinalityPredicate(_AorX, min=min, max=max),
+                     jp.CardinalityPredicate(jp.PathPredicate('letters', _eq_A),
+                                             min=min, max=max)]:
+          for source in sources:
+            self.assertEqual(bool(pred(context, source)),
+                             pred.check(context, source))
+
+  def test_early_exit(self):
+    context = ExecutionContext()
+    source = ['A', 'B', 'A', 'A']
+    excludes = jp.CardinalityPredicate(_eq_A, min=0, max=0, early_exit=True)
+    result = excludes(context, source)
+    self.assertFalse(result)
+    self.assertTrue(result.truncated)
+    self.assertEqual(1, result.count)
+
+    contains = jp.CardinalityPredicate(_eq_A, min=1, early_exit=True)
+    result = contains(context, source)
+    self.assertTrue(result)
+    self.assertTrue(result.truncated)
+    self.assertEqual(1, result.count)
+
+    at_most_two = jp.CardinalityPredicate(_eq_A, min=1, max=2,
+                                          early_exit=True)
+    result = at_most_two(context, source)
+    self.assertFalse(result)
+    self.assertEqual(3, result.count)
+
+    result = jp.CardinalityPredicate(_eq_B, max=0, early_exit=True)(
+        context, ['A', 'A', 'B'])
+    self.assertFalse(result)
+    self.assertFalse(result.truncated)
+
+    # Early exit never changes the outcome.
+    for min in range(0, 3):
+      for max in [None, 0, 1, 2]:
+        for source in [_CAB, ['A', 'A', 'X'], [], ['A', 'A', 'A']]:
+          self.assertEqual(
+              bool(jp.CardinalityPredicate(_AorX, min=min, max=max)(
+                  context, source)),
+              bool(jp.CardinalityPredicate(_AorX, min=min, max=max,
+                                           early_exit=True)(context, source)))
+
+  def test_early_exit_ignored_in_diagnostic_mode(self):
+    context = ExecutionContext()
+    context.set_internal(jp.DIAGNOSTIC_MODE_CONTEXT_KEY, True)
+    excludes = jp.CardinalityPredicate(_eq_A, min=0, max=0, early_exit=True)
+    result = excludes(context, ['A', 'B', 'A'])
+    self.assertFalse(result)
+    self.assertFalse(result.truncated)
+    self.assertEqual(2, result.count)
+
+
 if __name__ == '__main__':
   # pylint: disable=invalid-name
   loader = unittest.TestLoader()
@@ -0,0 +1,103 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+
+
+"""Tests the citest.json_predicate.columnar module."""
+
+
+import unittest
+
+from citest.base import ExecutionContext
+import citest.json_predicate as jp
+from citest.json_predicate import columnar
+
+
+_NUM_RECORDS = columnar.MIN_COLUMN_SIZE + 44
+
+
+def _make_records():
+  return [{'name': 'instance-{0}'.format(index),
+           'zone': 'us-central1-{0}'.format('abc'[index % 3]),
+           'size': index % 10,
+           'load': index / 7.0}
+          for index in range(_NUM_RECORDS)]
+
+
+class ColumnarTest(unittest.TestCase):
+  def test_evaluate_column(self):
+    column = ['us-central1-{0}'.format('abc'[index % 3])
+              for index in range(_NUM_RECORDS)]
+    mask = columnar.evaluate_column(jp.STR_SUBSTR('1-b'), column)
+    self.assertEqual([value.endswith('b') for value in column], list(mask))
+    self.assertEqual(_NUM_RECORDS / 3, columnar.count_true(mask))
+
+    column = range(_NUM_RECORDS)
+    mask = columnar.evaluate_column(jp.NUM_LE(9), column)
+    self.assertEqual([value <= 9 for value in column],
+                     [bool(valid) for valid in mask])
+    self.assertEqual(10, columnar.count_true(mask))
+
+  def test_evaluate_column_declines(self):
+    column = range(_NUM_RECORDS)
+    self.assertIsNone(columnar.evaluate_column(jp.NUM_EQ(1), column[:10]))
+    self.assertIsNone(columnar.evaluate_column(
+        jp.NUM_EQ(lambda context: 1), column))
+    self.assertIsNone(columnar.evaluate_column(jp.DICT_EQ({}), column))
+    self.assertIsNone(columnar.evaluate_column(jp.NUM_EQ(1), column + ['x']))
+
+  def test_path_predicate_results_are_unchanged(self):
+    context = ExecutionContext()
+    records = _make_records()
+    preds = [jp.PathPredicate('zone', jp.STR_EQ('us-central1-a')),
+             jp.PathPredicate('name', jp.STR_SUBSTR('-1')),
+             jp.PathPredicate('size', jp.NUM_GE(5)),
+             jp.PathPredicate('load', jp.NUM_NE(2))]
+
+    columnar_results = [pred(context, records) for pred in preds]
+    columnar_counts = [pred.count_traversal(context,
+                                            pred.traverse(context, records))
+                       for pred in preds]
+    min_size = columnar.MIN_COLUMN_SIZE
+    try:
+      columnar.MIN_COLUMN_SIZE = _NUM_RECORDS + 1
+      expect_results = [pred(context, records) for pred in preds]
+    finally:
+      columnar.MIN_COLUMN_SIZE = min_size
+
+    self.assertEqual(expect_results, columnar_results)
+    self.assertEqual([len(result.path_values) for result in expect_results],
+                     columnar_counts)
+
+  def test_cardinality_from_mask(self):
+    context = ExecutionContext()
+    records = _make_records()
+    pred = jp.CardinalityPredicate(jp.PathPredicate('size', jp.NUM_EQ(3)),
+                                   min=_NUM_RECORDS / 10,
+                                   max=_NUM_RECORDS / 10)
+    self.assertTrue(pred.check(context, records))
+    self.assertTrue(pred(context, records))
+
+    pred = jp.CardinalityPredicate(jp.PathPredicate('size', jp.NUM_EQ(3)),
+                                   min=0, max=1)
+    self.assertFalse(pred.check(context, records))
+    self.assertFalse(pred(context, records))
+
+
+if __name__ == '__main__':
+  # pylint: disable=invalid-name
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(ColumnarTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,79 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest
+
+import citest.json_predicate as jp
+
+
+class FilterTermsTest(unittest.TestCase):
+  def test_path_equality(self):
+    self.assertEqual(
+        [jp.EqualityTerm(['a', 'b'], 'X')],
+        jp.find_equality_terms(jp.PathPredicate('a/b', jp.STR_EQ('X'))))
+    self.assertEqual(
+        [jp.EqualityTerm(['n'], 3)],
+        jp.find_equality_terms(jp.PathPredicate('n', jp.NUM_EQ(3))))
+    self.assertEqual(
+        [jp.EqualityTerm(['a'], 'X')],
+        jp.find_equality_terms(jp.PathPredicate('a', jp.EQUIVALENT('X'))))
+
+  def test_conjunction(self):
+    pred = jp.AND([jp.PathPredicate('a', jp.STR_EQ('X')),
+                   jp.PathPredicate('b', jp.STR_SUBSTR('Y')),
+                   jp.PathPredicate('c', jp.AND([jp.NUM_EQ(1)]))])
+    self.assertEqual([jp.EqualityTerm(['a'], 'X'), jp.EqualityTerm(['c'], 1)],
+                     jp.find_equality_terms(pred))
+
+  def test_dict_matches(self):
+    pred = jp.PathPredicate(
+        'metadata', jp.DICT_MATCHES({'labels': jp.DICT_MATCHES(
+            {'app': jp.STR_EQ('web')})}))
+    self.assertEqual([jp.EqualityTerm(['metadata', 'labels', 'app'], 'web')],
+                     jp.find_equality_terms(pred))
+
+  def test_unsupported(self):
+    for pred in [
+        None,
+        jp.STR_EQ('X'),
+        jp.OR([jp.PathPredicate('a', jp.STR_EQ('X')),
+               jp.PathPredicate('a', jp.STR_EQ('Y'))]),
+        jp.NOT(jp.PathPredicate('a', jp.STR_EQ('X'))),
+        jp.PathPredicate('a', jp.STR_NE('X')),
+        jp.PathPredicate('a', jp.STR_EQ(lambda context: context['a'])),
+        jp.PathPredicate('a', jp.DICT_EQ({'b': 'X'})),
+        jp.PathPredicate('a[0]', jp.STR_EQ('X')),
+        jp.PathPredicate('a', jp.STR_EQ('X'), transform=lambda ctxt, x: x)]:
+      self.assertEqual([], jp.find_equality_terms(pred))
+
+  def test_make_filter_expression(self):
+    pred = jp.AND([jp.PathPredicate('a/b', jp.STR_EQ('x')),
+                   jp.DICT_MATCHES({'c': jp.NUM_EQ(1),
+                                    'bad-name': jp.STR_EQ('y')}),
+                   jp.PathPredicate('d', jp.STR_NE('z'))])
+    format_term = lambda field, value: '<{0}:{1}>'.format(field, value)
+    self.assertEqual('<a.b:"x"> AND <c:1>',
+                     jp.make_filter_expression(pred, format_term))
+    self.assertIsNone(jp.make_filter_expression(
+        jp.PathPredicate('a', jp.STR_NE('x')), format_term))
+    self.assertIsNone(jp.make_filter_expression(None, format_term))
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(FilterTermsTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
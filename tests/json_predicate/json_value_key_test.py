@@ -0,0 +1,51 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+
+
+"""Tests the citest.json_predicate.json_value_key module."""
+
+
+import unittest
+
+from citest.json_predicate import json_value_key
+
+
+class JsonValueKeyTest(unittest.TestCase):
+  def test_scalar_keys(self):
+    for value in [None, True, 1, 1.5, 'a', u'b']:
+      self.assertEqual(value, json_value_key(value))
+
+  def test_equal_values_have_equal_keys(self):
+    value = {'a': [1, {'b': 'B', 'c': None}], 'd': {}}
+    same = {'d': {}, 'a': [1, {'c': None, 'b': 'B'}]}
+    self.assertEqual(json_value_key(value), json_value_key(same))
+    self.assertEqual(hash(json_value_key(value)), hash(json_value_key(same)))
+
+  def test_different_values_have_different_keys(self):
+    self.assertNotEqual(json_value_key({'a': 1}), json_value_key({'a': 2}))
+    self.assertNotEqual(json_value_key([1, 2]), json_value_key([2, 1]))
+    self.assertNotEqual(json_value_key({'a': 1}), json_value_key([['a', 1]]))
+    self.assertNotEqual(json_value_key([]), json_value_key({}))
+
+  def test_unhashable_value(self):
+    self.assertRaises(TypeError, json_value_key, [set([1])])
+
+
+if __name__ == '__main__':
+  # pylint: disable=invalid-name
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(JsonValueKeyTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
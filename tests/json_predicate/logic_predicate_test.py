@@ -227,6 +227,44 @@ class LogicPredicateTest(unittest.TestCase):
       self.assertFalse(result)
       self.assertEqual(expect, result)
 
+  def test_memo_shares_structurally_equal_predicates(self):
+    transformed = []
+    def xform(context, value):
+      transformed.append(value)
+      return value
+
+    aA_1 = jc.PathPredicate('a', jc.STR_EQ('A'), transform=xform)
+    aA_2 = jc.PathPredicate('a', jc.STR_EQ('A'), transform=xform)
+    aB = jc.PathPredicate('a', jc.STR_EQ('B'), transform=xform)
+    bZ = jp.PathEqPredicate('b', 'Z')
+    bB = jp.PathEqPredicate('b', 'B')
+    disjunction = jc.OR([jc.AND([aA_1, bZ]), jc.AND([aA_2, bB]), aB])
+
+    memo = jc.PredicateMemo()
+    self.assertIs(aA_1, memo.intern(aA_1))
+    self.assertIs(aA_1, memo.intern(aA_2))
+    self.assertIs(aB, memo.intern(aB))
+
+    context = ExecutionContext()
+    self.assertTrue(disjunction(context, _LETTER_DICT))
+    self.assertEqual(2, len(transformed))
+
+    del transformed[:]
+    context.set_internal(jc.PREDICATE_MEMO_CONTEXT_KEY, memo)
+    result = disjunction(context, _LETTER_DICT)
+    self.assertTrue(result)
+    self.assertEqual(1, len(transformed))
+    self.assertEqual(result.results[0].results[0],
+                     result.results[1].results[0])
+
+  def test_conditional_else_predicate(self):
+    aA = jp.PathEqPredicate('a', 'A')
+    bB = jp.PathEqPredicate('b', 'B')
+    zZ = jp.PathEqPredicate('z', 'Z')
+    conditional = jc.IF(aA, bB, zZ)
+    self.assertEqual(zZ, conditional.else_predicate)
+    self.assertNotEqual(conditional, jc.IF(aA, bB, aA))
+
 
 if __name__ == '__main__':
   # pylint: disable=invalid-name
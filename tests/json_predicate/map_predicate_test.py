@@ -37,6 +37,18 @@ _DICT_ARRAY = [{}, _LETTER_DICT, _NUMBER_DICT, _COMPOSITE_DICT]
 _MULTI_ARRAY = [_LETTER_DICT, _NUMBER_DICT, _LETTER_DICT, _NUMBER_DICT]
 
 
+class CountingPredicate(jp.ValuePredicate):
+  """Counts the values a predicate was applied to."""
+  def __init__(self, pred):
+    super(CountingPredicate, self).__init__()
+    self.__pred = pred
+    self.calls = 0
+
+  def __call__(self, context, value):
+    self.calls += 1
+    return self.__pred(context, value)
+
+
 class JsonMapPredicateTest(unittest.TestCase):
   def assertEqual(self, expect, have, msg=''):
     JsonSnapshotHelper.AssertExpectedValue(expect, have, msg)
@@ -187,6 +199,51 @@ class JsonMapPredicateTest(unittest.TestCase):
     aA = jp.PathPredicate('a', jp.STR_EQ('A'))
     self._try_map(context, aA, None, True, min=0)
 
+  def test_early_exit(self):
+    context = ExecutionContext()
+    aA = jp.PathPredicate('a', jp.STR_EQ('A'))
+    found = jp.MapPredicate(aA, early_exit=True)(context, _MULTI_ARRAY)
+    self.assertTrue(found)
+    self.assertTrue(found.truncated)
+    self.assertEqual([_LETTER_DICT], found.obj_list)
+
+    too_many = jp.MapPredicate(aA, min=0, max=0, early_exit=True)(
+        context, _MULTI_ARRAY)
+    self.assertFalse(too_many)
+    self.assertTrue(too_many.truncated)
+    self.assertEqual(1, len(too_many.good_object_result_mappings))
+
+    context.set_internal(jp.DIAGNOSTIC_MODE_CONTEXT_KEY, True)
+    full = jp.MapPredicate(aA, min=0, max=0, early_exit=True)(
+        context, _MULTI_ARRAY)
+    self.assertFalse(full)
+    self.assertFalse(full.truncated)
+    self.assertEqual(2, len(full.good_object_result_mappings))
+
+  def test_early_exit_without_max(self):
+    context = ExecutionContext()
+    aA = jp.PathPredicate('a', jp.STR_EQ('A'))
+    found = jp.MapPredicate(aA, min=0, early_exit=True)(context, _MULTI_ARRAY)
+    self.assertTrue(found)
+    self.assertTrue(found.truncated)
+    self.assertEqual([_LETTER_DICT], found.obj_list)
+
+  def test_compiled_early_exit(self):
+    context = ExecutionContext()
+    aA = CountingPredicate(jp.PathPredicate('a', jp.STR_EQ('A')))
+    self.assertTrue(
+        jp.MapPredicate(aA, early_exit=True).check(context, _MULTI_ARRAY))
+    self.assertEqual(1, aA.calls)
+
+    aA.calls = 0
+    self.assertFalse(jp.MapPredicate(aA, min=0, max=0, early_exit=True).check(
+        context, _MULTI_ARRAY))
+    self.assertEqual(1, aA.calls)
+
+    aA.calls = 0
+    self.assertTrue(jp.MapPredicate(aA).check(context, _MULTI_ARRAY))
+    self.assertEqual(len(_MULTI_ARRAY), aA.calls)
+
 
 if __name__ == '__main__':
   loader = unittest.TestLoader()
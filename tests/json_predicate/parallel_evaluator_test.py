@@ -0,0 +1,96 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import pickle
+import unittest
+
+from citest.base import ExecutionContext
+import citest.json_predicate as jp
+
+
+_OBJECTS = [{'a': 'A', 'n': index, 'list': [{'b': 'B'}, {'b': 'X'}]}
+            for index in range(50)]
+
+
+def _serial_count(path_pred, object_list, stop_at=None):
+  context = ExecutionContext()
+  return path_pred.count_traversal(
+      context, path_pred.traverse(context, object_list), stop_at=stop_at)
+
+
+class ParallelEvaluatorTest(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.evaluator = jp.ParallelEvaluator(min_objects=10, processes=2)
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.evaluator.close()
+
+  def test_predicates_pickle(self):
+    pred = jp.PathPredicate('a', jp.AND([jp.STR_SUBSTR('A'),
+                                         jp.NOT(jp.STR_EQ('B'))]))
+    self.assertTrue(pred.check(ExecutionContext(), _OBJECTS))
+    copy = pickle.loads(pickle.dumps(pred, pickle.HIGHEST_PROTOCOL))
+    self.assertEqual(pred, copy)
+    self.assertEqual(pred.structural_key(), copy.structural_key())
+    self.assertTrue(copy.check(ExecutionContext(), _OBJECTS))
+
+  def test_count_matches_serial(self):
+    for path_pred in [
+        jp.PathPredicate('a', jp.STR_EQ('A')),
+        jp.PathPredicate('n', jp.NUM_GE(17)),
+        jp.PathPredicate('list/b', jp.STR_NE('B')),
+        jp.PathPredicate('list[b=B]'),
+        jp.PathPredicate('', jp.DICT_SUBSET({'n': 3}))]:
+      expect = _serial_count(path_pred, _OBJECTS)
+      self.assertEqual(expect, self.evaluator.count(path_pred, _OBJECTS))
+      self.assertEqual(min(expect, 4),
+                       self.evaluator.count(path_pred, _OBJECTS, stop_at=4))
+
+  def test_count_below_threshold(self):
+    self.assertIsNone(self.evaluator.count(
+        jp.PathPredicate('a', jp.STR_EQ('A')), _OBJECTS[:9]))
+
+  def test_count_unsplittable_path(self):
+    for path_pred in [jp.PathPredicate('[0]/a', jp.STR_EQ('A')),
+                      jp.PathPredicate('', jp.LIST_SIMILAR([]),
+                                       enumerate_terminals=False),
+                      jp.PathPredicate('@', jp.LIST_SIMILAR([]))]:
+      self.assertFalse(path_pred.traverses_list_elements())
+      self.assertIsNone(self.evaluator.count(path_pred, _OBJECTS))
+
+  def test_count_context_dependent(self):
+    self.assertIsNone(self.evaluator.count(
+        jp.PathPredicate('a', jp.STR_EQ(lambda context: context['a'])),
+        _OBJECTS))
+    self.assertIsNone(self.evaluator.count(
+        jp.PathPredicate('a', jp.STR_EQ('A'), transform=_serial_count),
+        _OBJECTS))
+
+  def test_close(self):
+    path_pred = jp.PathPredicate('a', jp.STR_EQ('A'))
+    with jp.ParallelEvaluator(min_objects=10, processes=1) as evaluator:
+      self.assertEqual(50, evaluator.count(path_pred, _OBJECTS))
+    self.assertRaises(ValueError, evaluator.count, path_pred, _OBJECTS)
+    evaluator.close()
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(ParallelEvaluatorTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
@@ -267,6 +267,91 @@ class JsonPathPredicateTest(unittest.TestCase):
     self.assertEqual([], values.path_failures)
 
 
+  def test_collect_from_dict_with_index(self):
+    # """Path with an explicit index into a dict is a type mismatch."""
+    context = ExecutionContext()
+    source = {'letters': _LETTER_DICT}
+    pred = PathPredicate(PATH_SEP.join(['letters[0]', 'a']))
+    values = pred(context, source)
+    self.assertEqual([], values.path_values)
+    self.assertEqual(
+        [jp.TypeMismatchError(list, dict, _LETTER_DICT, 'letters[0]/a',
+                              PathValue('letters', _LETTER_DICT))],
+        values.path_failures)
+
+  def test_parsed_paths_are_reused(self):
+    # """Traversing the same path text reuses the parsed path."""
+    context = ExecutionContext()
+    path = PATH_SEP.join(['parsed_paths_are_reused', 'a[1]', 'b'])
+    source = {'parsed_paths_are_reused': {'a': [{'b': 1}, {'b': 2}]}}
+    values = PathPredicate(path)(context, source)
+    self.assertEqual([PathValue('parsed_paths_are_reused/a[1]/b', 2)],
+                     values.path_values)
+
+    parsed = jp.path_predicate._parse_path(path)
+    self.assertEqual(['field', 'field', 'index', 'field'],
+                     [step.kind for step in parsed.steps])
+    self.assertTrue(parsed is jp.path_predicate._parse_path(path))
+    values = PathPredicate(path)(context, source)
+    self.assertEqual([PathValue('parsed_paths_are_reused/a[1]/b', 2)],
+                     values.path_values)
+
+  def test_collect_wildcard(self):
+    context = ExecutionContext()
+    source = {'a': [{'x': 'X', 'y': 'Y'}, 'Plain'], 'b': ['B0', 'B1']}
+    values = PathPredicate('a[0]/*')(context, source)
+    self.assertEqual([PathValue('a[0]/x', 'X'), PathValue('a[0]/y', 'Y')],
+                     values.path_values)
+
+    # Lists enumerate their elements.
+    values = PathPredicate('*/*')(context, source)
+    self.assertEqual([PathValue('a[0]', {'x': 'X', 'y': 'Y'}),
+                      PathValue('a[1]', 'Plain'),
+                      PathValue('b[0]', 'B0'),
+                      PathValue('b[1]', 'B1')],
+                     values.path_values)
+    self.assertEqual([], values.path_failures)
+
+  def test_collect_recursive_descent(self):
+    context = ExecutionContext()
+    source = {'metadata': {'status': 'TOP',
+                           'items': [{'status': 'A'}, {'other': 'X'}, 7],
+                           'nested': {'deep': {'status': 'B'}}}}
+    values = PathPredicate('metadata/**/status')(context, source)
+    self.assertEqual(
+        sorted([PathValue('metadata/status', 'TOP'),
+                PathValue('metadata/items[0]/status', 'A'),
+                PathValue('metadata/nested/deep/status', 'B')]),
+        sorted(values.path_values))
+
+    # Values in the descent without the remaining path are not failures.
+    self.assertEqual([], values.path_failures)
+
+    values = PathPredicate('**/missing')(context, source)
+    self.assertEqual([], values.path_values)
+    self.assertEqual([], values.path_failures)
+
+  def test_collect_filter_segment(self):
+    context = ExecutionContext()
+    boot = {'name': 'boot', 'boot': True, 'size': 10}
+    data = {'name': 'data', 'boot': False, 'size': 100}
+    source = {'disks': [boot, data, 'bogus']}
+
+    values = PathPredicate('disks[?boot==true]/name')(context, source)
+    self.assertEqual([PathValue('disks[0]/name', 'boot')], values.path_values)
+    self.assertEqual([], values.path_failures)
+
+    values = PathPredicate('disks[?name!=boot]')(context, source)
+    self.assertEqual([PathValue('disks[1]', data)], values.path_values)
+
+    values = PathPredicate('disks[?size==100]/size')(context, source)
+    self.assertEqual([PathValue('disks[1]/size', 100)], values.path_values)
+
+    # A dict is selected by the filter itself.
+    values = PathPredicate('disks/*[?boot==false]')(
+        context, {'disks': {'first': boot, 'second': data}})
+    self.assertEqual([PathValue('disks/second', data)], values.path_values)
+
   def test_collect_from_list_of_list_with_index(self):
     # """Path with explicit list indexes to traverse through nested lists."""
     context = ExecutionContext()
@@ -0,0 +1,106 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest
+
+from citest.base import ExecutionContext
+import citest.json_predicate as jp
+
+
+class SourcePoolTest(unittest.TestCase):
+  def tearDown(self):
+    jp.set_global_source_pool(None)
+
+  def test_pool_shares_references(self):
+    pool = jp.SourcePool(max_retained=2)
+    source = {'a': 'A'}
+    ref = pool.reference(source)
+    self.assertIs(ref, pool.reference(source))
+    self.assertIs(source, ref.value)
+    self.assertFalse(ref.released)
+
+  def test_pool_releases_least_recently_used(self):
+    pool = jp.SourcePool(max_retained=2)
+    first = pool.reference(['first'])
+    second = pool.reference(['second'])
+    pool.reference(first.value)
+    pool.reference(['third'])
+
+    self.assertEqual(2, pool.num_retained)
+    self.assertFalse(first.released)
+    self.assertTrue(second.released)
+    self.assertEqual(jp.RELEASED_SOURCE, second.value)
+
+    pool.release_all()
+    self.assertEqual(0, pool.num_retained)
+    self.assertTrue(first.released)
+
+  def test_results_without_pool_retain_source(self):
+    source = [{'a': 'A'}]
+    result = jp.PathPredicate('a', jp.STR_EQ('A'))(ExecutionContext(), source)
+    self.assertIs(source, result.source)
+    self.assertIs(source, result.valid_candidates[0].result.source)
+
+  def test_results_release_source(self):
+    pool = jp.SourcePool(max_retained=1)
+    jp.set_global_source_pool(pool)
+    source = [{'a': 'A'}]
+    result = jp.PathPredicate('a', jp.STR_EQ('A'))(ExecutionContext(), source)
+    self.assertIs(source, result.source)
+    self.assertEqual(['A'], result.values)
+
+    pool.reference({'other': 'source'})
+    self.assertEqual(jp.RELEASED_SOURCE, result.source)
+    self.assertEqual(jp.RELEASED_SOURCE,
+                     result.valid_candidates[0].result.source)
+    self.assertEqual(['A'], result.values)
+
+  def test_path_value_of_released_source(self):
+    pool = jp.SourcePool(max_retained=1)
+    jp.set_global_source_pool(pool)
+    source = {'a': 'A'}
+    error = jp.MissingPathError(source, 'b')
+    self.assertEqual(jp.PathValue('b', source), error.path_value)
+
+    pool.release_all()
+    self.assertEqual(jp.PathValue('b', jp.RELEASED_SOURCE), error.path_value)
+
+  def test_released_sources_are_unequal(self):
+    pool = jp.SourcePool()
+    jp.set_global_source_pool(pool)
+    pred = jp.PathPredicate('a', jp.STR_EQ('A'))
+    result = pred(ExecutionContext(), [{'a': 'A'}, {'b': 'B'}])
+    same_result = pred(ExecutionContext(), [{'a': 'A'}, {'b': 'B'}])
+    other_result = pred(ExecutionContext(), [{'a': 'A'}, {'c': 'C'}])
+    error = jp.MissingPathError({'a': 'A'}, 'b')
+    other_error = jp.MissingPathError({'a': 'A', 'c': 'C'}, 'b')
+    self.assertEqual(result, same_result)
+    self.assertNotEqual(result, other_result)
+    self.assertNotEqual(error, other_error)
+
+    pool.release_all()
+    self.assertEqual(result, result)
+    self.assertNotEqual(result, same_result)
+    self.assertNotEqual(result, other_result)
+    self.assertEqual(error, error)
+    self.assertNotEqual(error, other_error)
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(SourcePoolTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
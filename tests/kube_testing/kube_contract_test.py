@@ -0,0 +1,119 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest
+
+from citest.base import ExecutionContext
+import citest.json_predicate as jp
+import citest.kube_testing as kt
+import citest.service_testing as st
+from citest.kube_testing.kube_contract import make_kube_selector_args
+
+
+_POD_LIST = {
+    'kind': 'List',
+    'items': [
+        {'metadata': {'name': 'web-1', 'labels': {'app': 'web'}}},
+        {'metadata': {'name': 'db-1', 'labels': {'app': 'db'}}}]}
+
+
+class FakeKubeCtlAgent(kt.KubeCtlAgent):
+  def __init__(self, doc):
+    super(FakeKubeCtlAgent, self).__init__()
+    self.__doc = doc
+    self.last_run_params = None
+
+  def run_and_decode_json(self, args, trace=True):
+    self.last_run_params = args
+    return st.CliResponseType(0, '', ''), [self.__doc], None
+
+
+_WEB_FILTER = jp.PathPredicate(
+    'metadata', jp.DICT_MATCHES({
+        'name': jp.STR_EQ('web-1'),
+        'labels': jp.DICT_MATCHES({'app': jp.STR_EQ('web')})}))
+
+
+class KubeContractTest(unittest.TestCase):
+  def test_selector_args(self):
+    self.assertEqual(
+        ['--selector=app=web', '--field-selector=metadata.name=web-1'],
+        make_kube_selector_args(_WEB_FILTER))
+    self.assertEqual(
+        ['--selector=app=web'],
+        make_kube_selector_args(
+            jp.PathPredicate('metadata/labels/app', jp.STR_EQ('web'))))
+    self.assertEqual(
+        ['--field-selector=metadata.namespace=prod'],
+        make_kube_selector_args(
+            jp.PathPredicate('metadata/namespace', jp.STR_EQ('prod'))))
+
+  def test_selector_args_unsupported(self):
+    for pred in [
+        jp.PathPredicate('metadata/labels/app', jp.STR_EQ('a b')),
+        jp.PathPredicate('metadata/uid', jp.STR_EQ('1234')),
+        jp.PathPredicate('spec/replicas', jp.NUM_EQ(1)),
+        jp.PathPredicate('metadata/labels/app', jp.STR_NE('web'))]:
+      self.assertEqual([], make_kube_selector_args(pred))
+
+  def test_selector_args_keep_given_selectors(self):
+    self.assertEqual(
+        ['--field-selector=metadata.name=web-1'],
+        make_kube_selector_args(_WEB_FILTER, ['-l', 'tier=front']))
+    self.assertEqual(
+        ['--selector=app=web'],
+        make_kube_selector_args(_WEB_FILTER, ['--field-selector=x=y']))
+
+  def test_selector_args_skipped_for_named_resources(self):
+    self.assertEqual(
+        ['--selector=app=web', '--field-selector=metadata.name=web-1'],
+        make_kube_selector_args(_WEB_FILTER, ['--namespace', 'prod',
+                                              '--all-namespaces']))
+    self.assertEqual([], make_kube_selector_args(_WEB_FILTER, ['web-1']))
+    self.assertEqual(
+        [], make_kube_selector_args(_WEB_FILTER, ['-n', 'prod', 'web-1']))
+    self.assertEqual(
+        [], make_kube_selector_args(_WEB_FILTER,
+                                    [lambda context: context['name']]))
+
+  def test_get_resources_with_object_filter(self):
+    kubectl = FakeKubeCtlAgent(_POD_LIST)
+    contract_builder = kt.KubeContractBuilder(kubectl)
+    clause = contract_builder.new_clause_builder('TITLE')
+    verifier = clause.get_resources('pods', object_filter=_WEB_FILTER)
+    verifier.contains_path_value('items/metadata/name', 'web-1')
+    verifier.excludes_path_value('items/metadata/name', 'db-1')
+    self.assertTrue(contract_builder.build().verify(ExecutionContext()))
+    self.assertEqual(
+        ['get', 'pods', '--output=json', '--selector=app=web',
+         '--field-selector=metadata.name=web-1'],
+        kubectl.last_run_params)
+
+  def test_get_named_resource_with_object_filter(self):
+    kubectl = FakeKubeCtlAgent(_POD_LIST['items'][0])
+    contract_builder = kt.KubeContractBuilder(kubectl)
+    clause = contract_builder.new_clause_builder('TITLE')
+    clause.get_resources('pods/web-1', object_filter=_WEB_FILTER)
+    self.assertTrue(contract_builder.build().verify(ExecutionContext()))
+    self.assertEqual(['get', 'pods/web-1', '--output=json'],
+                     kubectl.last_run_params)
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(KubeContractTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
@@ -20,6 +20,7 @@ import unittest
 import citest.service_testing.agent_test_case as agent_test_case
 import citest.service_testing as st
 import citest.json_contract as jc
+import citest.json_predicate as jp
 
 from citest.base import ExecutionContext
 from fake_agent import (
@@ -44,6 +45,18 @@ class FakeVerifier(jc.ObservationVerifier):
         good_results=[], bad_results=[], failed_constraints=[])
 
 
+class SourcePoolTestCase(st.AgentTestCase):
+  def __init__(self, methodName='runTest'):
+    super(SourcePoolTestCase, self).__init__(methodName=methodName)
+    self.pool = None
+    self.reference = None
+
+  def test_refer_to_source(self):
+    self.pool = jp.get_global_source_pool()
+    if self.pool is not None:
+      self.reference = self.pool.reference(['observed'])
+
+
 class AgentTestCaseTest(st.AgentTestCase):
   def setUp(self):
     self.testing_agent = FakeAgent()
@@ -165,6 +178,120 @@ class AgentTestCaseTest(st.AgentTestCase):
     self._do_run_test_case(
         succeed=False, with_callbacks=True, with_context=False)
 
+  def test_run_test_overlap_verification(self):
+    for succeed in [True, False]:
+      operation = FakeOperation('TestOperation', self.testing_agent)
+      clause = jc.ContractClause(
+          'TestClause', observer=FakeObserver(),
+          verifier=FakeVerifier(succeed))
+      contract = jc.Contract()
+      contract.add_clause(clause)
+      extracted = []
+      operation_contract = st.OperationContract(
+          operation, contract,
+          status_extractor=lambda status, context: extracted.append(status))
+
+      context = ExecutionContext()
+      if succeed:
+        self.run_test_case(operation_contract, context=context,
+                           overlap_verification=True)
+      else:
+        self.assertRaises(AssertionError, self.run_test_case,
+                          operation_contract, context=context,
+                          overlap_verification=True)
+      self.assertEqual(1, len(extracted))
+      self.assertEqual(extracted[0], context.get('OperationStatus', None))
+      self.assertEqual(
+          bool(succeed), bool(context.get('ContractVerifyResults', None)))
+
+  def test_run_test_case_graph(self):
+    cleanups = []
+    def make_case(title, succeed=True, **kwargs):
+      clause = jc.ContractClause(
+          'TestClause', observer=FakeObserver(),
+          verifier=FakeVerifier(succeed))
+      contract = jc.Contract()
+      contract.add_clause(clause)
+      return st.OperationContract(
+          FakeOperation(title, self.testing_agent), contract,
+          cleanup=lambda context: cleanups.append(title), **kwargs)
+
+    create = make_case('Create', creates=['r'])
+    verify = make_case('Verify', consumes=['r'])
+    delete = make_case('Delete', deletes=['r'])
+    self.run_test_case_graph(ExecutionContext(), [delete, verify, create], 2)
+    self.assertEqual(['Delete', 'Verify', 'Create'], cleanups)
+
+    del cleanups[:]
+    create = make_case('Create', succeed=False, creates=['r'])
+    verify = make_case('Verify', consumes=['r'])
+    other = make_case('Other')
+    self.assertRaises(AssertionError, self.run_test_case_graph,
+                      ExecutionContext(), [create, verify, other], 2)
+    self.assertEqual(sorted(['Create', 'Other']), sorted(cleanups))
+
+  def test_run_test_case_graph_publishes_extracted_status(self):
+    seen = {}
+    def make_case(title, **kwargs):
+      def record_context(context):
+        seen[title] = (context.get('Name', None),
+                       context.get('OperationStatus', None))
+        return []
+      observer = FakeObserver()
+      observer.collect_observation = (
+          lambda context, observation, trace=True: record_context(context))
+      contract = jc.Contract()
+      contract.add_clause(jc.ContractClause(
+          'TestClause', observer=observer, verifier=FakeVerifier(True)))
+      return st.OperationContract(
+          FakeOperation(title, self.testing_agent), contract, **kwargs)
+
+    def extract_name(status, context):
+      context['Name'] = 'created'
+
+    create = make_case('Create', creates=['r'], status_extractor=extract_name)
+    verify = make_case('Verify', consumes=['r'])
+    context = ExecutionContext()
+    self.run_test_case_graph(context, [verify, create], 2)
+
+    self.assertEqual('created', seen['Create'][0])
+    self.assertEqual('created', seen['Verify'][0])
+    # Each case saw its own status, which was not published.
+    self.assertNotEqual(seen['Create'][1], seen['Verify'][1])
+    self.assertEqual('created', context['Name'])
+    self.assertFalse('OperationStatus' in context)
+    self.assertFalse('ContractVerifyResults' in context)
+
+
+  def test_source_pool_released_between_tests(self):
+    outer_pool = jp.get_global_source_pool()
+    try:
+      # A global pool is used and released, but remains installed.
+      pool = jp.SourcePool()
+      jp.set_global_source_pool(pool)
+      test = SourcePoolTestCase('test_refer_to_source')
+      result = unittest.TestResult()
+      test(result)
+      self.assertTrue(result.wasSuccessful())
+      self.assertIs(pool, test.pool)
+      self.assertTrue(test.reference.released)
+      self.assertEqual(0, pool.num_retained)
+      self.assertIs(pool, jp.get_global_source_pool())
+    finally:
+      jp.set_global_source_pool(outer_pool)
+
+  def test_source_pool_is_opt_in(self):
+    outer_pool = jp.get_global_source_pool()
+    try:
+      jp.set_global_source_pool(None)
+      test = SourcePoolTestCase('test_refer_to_source')
+      result = unittest.TestResult()
+      test(result)
+      self.assertTrue(result.wasSuccessful())
+      self.assertIsNone(test.pool)
+      self.assertIsNone(jp.get_global_source_pool())
+    finally:
+      jp.set_global_source_pool(outer_pool)
 
 if __name__ == '__main__':
   loader = unittest.TestLoader()
@@ -16,6 +16,8 @@
 import unittest
 import citest.service_testing as st
 
+from citest.base import ExponentialBackoffRetryPolicy
+
 from .fake_agent import (
     FakeAgent,
     FakeStatus)
@@ -180,6 +182,34 @@ class BaseAgentTest(unittest.TestCase):
     # Last call truncated to the 2 secs remaining.
     self.assertEqual(2, status.got_sleep_secs)
 
+  def test_wait_retry_policy(self):
+    agent = FakeAgent()
+    operation = st.AgentOperation('TestStatus', agent=agent)
+    status = FakeStatus(operation)
+    sleeps = []
+    status.got_sleep_secs = sleeps
+    status._do_sleep = sleeps.append
+
+    status.set_expected_iterations(4)
+    status.wait(retry_policy=ExponentialBackoffRetryPolicy(
+        initial_secs=1, max_secs=5, multiplier=2, jitter=False))
+    self.assertTrue(status.finished)
+    self.assertEqual([1, 2, 4, 5], sleeps)
+
+  def test_wait_retry_hint(self):
+    class HintedStatus(FakeStatus):
+      @property
+      def retry_hint_secs(self):
+        return 30
+
+    agent = FakeAgent()
+    operation = st.AgentOperation('TestStatus', agent=agent)
+    status = HintedStatus(operation)
+
+    status.set_expected_iterations(1)
+    status.wait()
+    self.assertEqual(30, status.got_sleep_secs)
+
 
 if __name__ == '__main__':
   loader = unittest.TestLoader()
@@ -0,0 +1,63 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+
+import unittest
+
+from citest.base import JsonScrubber
+from citest.service_testing import CliAgent
+
+
+_OUTPUT = '[{"name": "a", "password": "secret"}, {"name": "b"}]'
+
+
+class CliAgentTest(unittest.TestCase):
+  def test_run_and_decode_json(self):
+    agent = CliAgent('sh', output_scrubber=JsonScrubber())
+    expect = [{'name': 'a', 'password': JsonScrubber.REDACTED},
+              {'name': 'b'}]
+    for trace in [True, False]:
+      response, values, error = agent.run_and_decode_json(
+          ['-c', "echo '{0}'".format(_OUTPUT)], trace=trace)
+      self.assertTrue(response.ok())
+      self.assertEqual(expect, values)
+      self.assertIsNone(error)
+      if not trace:
+        self.assertEqual('', response.output)
+
+  def test_run_and_decode_json_failure(self):
+    agent = CliAgent('sh')
+    for trace in [True, False]:
+      response, values, error = agent.run_and_decode_json(
+          ['-c', "echo '[1'; echo oops >&2; exit 3"], trace=trace)
+      self.assertEqual(3, response.exit_code)
+      self.assertEqual('oops', response.error)
+      self.assertIsNone(values)
+      self.assertIsNone(error)
+
+  def test_run_and_decode_json_invalid(self):
+    agent = CliAgent('sh')
+    for trace in [True, False]:
+      response, values, error = agent.run_and_decode_json(
+          ['-c', "echo '[1, oops]'"], trace=trace)
+      self.assertTrue(response.ok())
+      self.assertIsNone(values)
+      self.assertTrue(isinstance(error, ValueError))
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(CliAgentTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
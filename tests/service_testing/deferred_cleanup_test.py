@@ -0,0 +1,106 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# pylint: disable=missing-docstring
+
+import threading
+import unittest
+
+import citest.json_contract as jc
+import citest.service_testing as st
+
+from citest.base import (
+    ExecutionContext,
+    FixedIntervalRetryPolicy)
+from fake_agent import (
+    FakeAgent,
+    FakeOperation)
+
+
+class CleanupRecorder(object):
+  def __init__(self, failures=0):
+    self.lock = threading.Lock()
+    self.calls = []
+    self.failures = failures
+
+  def __call__(self, context):
+    with self.lock:
+      self.calls.append(context['Name'])
+      if self.failures:
+        self.failures -= 1
+        raise ValueError('Injected failure')
+
+
+def make_case(title, cleanup):
+  return st.OperationContract(
+      FakeOperation(title, FakeAgent()), jc.Contract(), cleanup=cleanup)
+
+
+class DeferredCleanupQueueTest(unittest.TestCase):
+  def do_test_flush(self, background):
+    recorder = CleanupRecorder()
+    queue = st.DeferredCleanupQueue(max_concurrent=3, background=background)
+    cases = [make_case('Case{0}'.format(i), recorder) for i in range(5)]
+    for case in cases:
+      queue.add(case, ExecutionContext(Name=case.title))
+    self.assertEqual(5, queue.num_pending)
+
+    results = queue.flush()
+    self.assertEqual(0, queue.num_pending)
+    self.assertEqual([case.title for case in cases],
+                     [result.test_case.title for result in results])
+    self.assertTrue(all(results))
+    self.assertEqual(sorted([case.title for case in cases]),
+                     sorted(recorder.calls))
+    self.assertEqual([], queue.flush())
+
+  def test_flush(self):
+    self.do_test_flush(background=False)
+
+  def test_flush_background(self):
+    self.do_test_flush(background=True)
+
+  def test_ignores_cases_without_cleanup(self):
+    queue = st.DeferredCleanupQueue()
+    queue.add(make_case('NoCleanup', None), ExecutionContext())
+    self.assertEqual(0, queue.num_pending)
+
+  def test_retry(self):
+    recorder = CleanupRecorder(failures=2)
+    queue = st.DeferredCleanupQueue(
+        max_retries=2, retry_policy=FixedIntervalRetryPolicy(0))
+    case = make_case('Retried', recorder)
+    queue.add(case, ExecutionContext(Name=case.title))
+    results = queue.flush()
+    self.assertEqual(1, len(results))
+    self.assertTrue(results[0])
+    self.assertEqual(3, results[0].attempts)
+
+  def test_failure(self):
+    recorder = CleanupRecorder(failures=2)
+    queue = st.DeferredCleanupQueue(
+        max_retries=1, retry_policy=FixedIntervalRetryPolicy(0))
+    case = make_case('Failed', recorder)
+    queue.add(case, ExecutionContext(Name=case.title))
+    results = queue.flush()
+    self.assertFalse(results[0])
+    self.assertEqual(2, results[0].attempts)
+    self.assertIsInstance(results[0].exception, ValueError)
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(DeferredCleanupQueueTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,198 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import BaseHTTPServer
+import SocketServer
+import calendar
+import email.utils
+import json
+import threading
+import time
+import unittest
+
+from citest.base import (
+    CapturingJournal,
+    set_thread_journal)
+from citest.service_testing import (
+    HttpAgent,
+    HttpConnectionPool,
+    HttpRequestType,
+    HttpResponseType)
+
+
+class RecordingJournal(CapturingJournal):
+  """Keeps the decoded entries so they can be examined."""
+  def __init__(self):
+    self.entries = []
+    super(RecordingJournal, self).__init__()
+
+  def append(self, text):
+    self.entries.append(json.JSONDecoder().decode(text))
+
+
+class SlowHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  """Takes a while to answer so that concurrent requests overlap."""
+  protocol_version = 'HTTP/1.1'
+
+  def log_message(self, format, *args):
+    pass
+
+  def __respond(self, code, body):
+    server = self.server
+    with server.lock:
+      server.active += 1
+      server.max_active = max(server.max_active, server.active)
+    time.sleep(0.02)
+    with server.lock:
+      server.active -= 1
+
+    self.send_response(code)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def do_GET(self):
+    if self.path == '/hello':
+      self.__respond(200, 'Hello')
+    else:
+      self.__respond(404, 'Not Found')
+
+  def do_POST(self):
+    data = self.rfile.read(int(self.headers['Content-Length']))
+    self.server.content_types.append(self.headers.get('Content-Type'))
+    self.__respond(201, data.upper())
+
+
+class SlowServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+  def __init__(self):
+    BaseHTTPServer.HTTPServer.__init__(self, ('localhost', 0), SlowHandler)
+    self.lock = threading.Lock()
+    self.active = 0
+    self.max_active = 0
+    self.content_types = []
+
+
+class HttpAgentTest(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.server = SlowServer()
+    cls.base_url = 'http://localhost:{0}'.format(cls.server.server_address[1])
+    thread = threading.Thread(target=cls.server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.server.shutdown()
+    cls.server.server_close()
+
+  def test_response_headers_not_part_of_equality(self):
+    response = HttpResponseType(200, 'OK', None, headers={'x': 'y'})
+    self.assertEqual({'x': 'y'}, response.headers)
+    self.assertEqual(HttpResponseType(200, 'OK', None), response)
+    self.assertEqual((200, 'OK', None), tuple(response))
+    self.assertIsNone(HttpResponseType(200, 'OK', None).headers)
+
+  def test_retry_after_secs(self):
+    self.assertIsNone(HttpResponseType(503, '', None).retry_after_secs)
+    self.assertEqual(
+        120, HttpResponseType(
+            503, '', None, headers={'retry-after': '120'}).retry_after_secs)
+    self.assertIsNone(HttpResponseType(
+        503, '', None, headers={'retry-after': 'bogus'}).retry_after_secs)
+
+  def test_retry_after_date(self):
+    when = email.utils.formatdate(
+        calendar.timegm(time.gmtime()) + 60, usegmt=True)
+    secs = HttpResponseType(
+        429, '', None, headers={'retry-after': when}).retry_after_secs
+    self.assertTrue(55 <= secs <= 60, secs)
+
+    when = email.utils.formatdate(0, usegmt=True)
+    self.assertEqual(0, HttpResponseType(
+        429, '', None, headers={'retry-after': when}).retry_after_secs)
+
+
+  def test_request_many(self):
+    requests = []
+    expect = []
+    for index in range(12):
+      if index % 3 == 0:
+        requests.append(('POST', 'echo', 'item{0}'.format(index)))
+        expect.append(HttpResponseType(201, 'ITEM{0}'.format(index), None))
+      elif index % 3 == 1:
+        requests.append(HttpRequestType('GET', 'hello'))
+        expect.append(HttpResponseType(200, 'Hello', None))
+      else:
+        requests.append(('GET', 'missing', None, {'X-Index': str(index)}))
+        expect.append(HttpResponseType(404, 'Not Found', None))
+
+    for pool in [None, HttpConnectionPool()]:
+      self.server.max_active = 0
+      del self.server.content_types[:]
+      agent = HttpAgent(self.base_url, connection_pool=pool)
+      self.assertEqual(
+          expect, agent.request_many(requests, max_concurrent=3, trace=False))
+      self.assertTrue(self.server.max_active <= 3, self.server.max_active)
+      self.assertEqual(['application/json'] * 4, self.server.content_types)
+      self.assertEqual([], agent.request_many([]))
+      if pool is not None:
+        pool.close()
+
+  def test_request_many_journal(self):
+    agent = HttpAgent(self.base_url)
+    requests = [('GET', 'missing'), ('POST', 'echo', 'data'), ('GET', 'hello')]
+    journal = RecordingJournal()
+    set_thread_journal(journal)
+    try:
+      agent.request_many(requests, max_concurrent=3, trace=False)
+      agent.request_many(requests[1:], max_concurrent=3, trace=False)
+    finally:
+      set_thread_journal(None)
+
+    # Each request is followed by its response, in the order requested,
+    # within a context for all of them.
+    def summarize(entry):
+      if entry['_type'] == 'JournalContextControl':
+        return (entry['control'],
+                entry.get('_title') or entry.get('relation'))
+      return (entry['_context'], entry['_value'].split('\n')[0])
+
+    url = self.base_url
+    self.assertEqual(
+        [('BEGIN', 'Send 3 HTTP requests'),
+         ('request', 'GET {0}/missing'.format(url)),
+         ('response', 'HTTP 404'),
+         ('request', 'POST {0}/echo'.format(url)),
+         ('response', 'HTTP 201'),
+         ('request', 'GET {0}/hello'.format(url)),
+         ('response', 'HTTP 200'),
+         ('END', 'INVALID'),
+         ('BEGIN', 'Send 2 HTTP requests'),
+         ('request', 'POST {0}/echo'.format(url)),
+         ('response', 'HTTP 201'),
+         ('request', 'GET {0}/hello'.format(url)),
+         ('response', 'HTTP 200'),
+         ('END', 'VALID')],
+        [summarize(entry) for entry in journal.entries])
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(HttpAgentTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,304 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import BaseHTTPServer
+import httplib
+import json
+import socket
+import SocketServer
+import threading
+import time
+import unittest
+
+from citest.base import ExecutionContext
+import citest.json_contract as jc
+from citest.service_testing import (
+    AgentError,
+    HttpAgent,
+    HttpConnectionPool,
+    HttpObjectObserver,
+    HttpResponseType)
+
+
+_JSON_LIST = [{'name': 'item{0}'.format(index), 'index': index}
+              for index in range(100)]
+
+
+class BrokenStream(object):
+  """A response body whose connection fails after some of it was read."""
+  def __init__(self, error):
+    self.__error = error
+    self.__data = '[1, 2'
+    self.closed = False
+
+  def read(self, size=-1):
+    if self.__data:
+      data, self.__data = self.__data, ''
+      return data
+    raise self.__error
+
+  def close(self):
+    self.closed = True
+
+
+class BrokenStreamAgent(object):
+  """Returns successful responses whose body cannot be read in full."""
+  def __init__(self, error):
+    self.error = error
+    self.streams = []
+
+  def get_stream(self, path, trace=True):
+    self.streams.append(BrokenStream(self.error))
+    return HttpResponseType(200, None, None), self.streams[-1]
+
+
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+
+  def setup(self):
+    BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+    self.server.connections.append(self)
+
+  def log_message(self, format, *args):
+    pass
+
+  def __respond(self, code, body, headers=None):
+    self.send_response(code)
+    for key, value in (headers or {}).items():
+      self.send_header(key, value)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def do_GET(self):
+    if self.path == '/redirect':
+      self.__respond(302, '', {'Location': '/hello'})
+    elif self.path == '/loop':
+      self.__respond(302, 'Again', {'Location': '/loop'})
+    elif self.path == '/hello':
+      self.__respond(200, 'Hello')
+    elif self.path == '/json':
+      self.__respond(200, json.dumps(_JSON_LIST))
+    elif self.path == '/close':
+      self.__respond(200, 'Bye', {'Connection': 'close'})
+      self.close_connection = 1
+    elif self.path == '/drop':
+      # Answer, then drop the connection without telling the client,
+      # as a server does when an idle connection times out.
+      self.__respond(200, 'Dropped')
+      self.close_connection = 1
+    else:
+      self.__respond(404, 'Not Found')
+
+  def do_POST(self):
+    data = self.rfile.read(int(self.headers['Content-Length']))
+    self.server.posts.append(self.path)
+    if self.path == '/slow':
+      time.sleep(1.5)
+    self.__respond(201, data.upper())
+    if self.path == '/drop':
+      self.close_connection = 1
+
+
+class KeepAliveServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+  def __init__(self):
+    BaseHTTPServer.HTTPServer.__init__(self, ('localhost', 0),
+                                       KeepAliveHandler)
+    self.connections = []
+    self.posts = []
+
+
+class HttpConnectionPoolTest(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.server = KeepAliveServer()
+    cls.base_url = 'http://localhost:{0}'.format(cls.server.server_address[1])
+    thread = threading.Thread(target=cls.server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.server.shutdown()
+    cls.server.server_close()
+
+  def setUp(self):
+    del self.server.connections[:]
+    del self.server.posts[:]
+
+  def test_reuses_connection(self):
+    pool = HttpConnectionPool()
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    for _ in range(3):
+      self.assertEqual(HttpResponseType(200, 'Hello', None),
+                       agent.get('hello', trace=False))
+    self.assertEqual(HttpResponseType(201, 'DATA', None),
+                     agent.post('echo', 'data', trace=False))
+    self.assertEqual(1, len(self.server.connections))
+    pool.close()
+
+  def test_same_responses_as_urllib2(self):
+    pooled_agent = HttpAgent(self.base_url,
+                             connection_pool=HttpConnectionPool())
+    agent = HttpAgent(self.base_url)
+    for path in ['hello', 'redirect', 'missing', 'close']:
+      expect = agent.get(path, trace=False)
+      got = pooled_agent.get(path, trace=False)
+      self.assertEqual(expect, got)
+      self.assertEqual(expect.headers.get('content-length'),
+                       got.headers.get('content-length'))
+    self.assertEqual(404, pooled_agent.get('missing', trace=False).http_code)
+    pooled_agent.connection_pool.close()
+
+  def test_redirect_limit_releases_connection_once(self):
+    pool = HttpConnectionPool()
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    response = agent.get('loop', trace=False)
+    self.assertEqual(302, response.http_code)
+    self.assertEqual('Again', response.output)
+    self.assertEqual(1, len(self.server.connections))
+    self.assertEqual(1, pool.num_idle)
+    pool.close()
+    self.assertEqual(0, pool.num_idle)
+
+  def test_connection_errors(self):
+    agent = HttpAgent('http://localhost:1',
+                      connection_pool=HttpConnectionPool())
+    response = agent.get('hello', trace=False)
+    self.assertIsNone(response.http_code)
+    self.assertIsNotNone(response.exception)
+
+  def test_closed_connection_not_reused(self):
+    pool = HttpConnectionPool()
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    agent.get('close', trace=False)
+    agent.get('hello', trace=False)
+    self.assertEqual(2, len(self.server.connections))
+    pool.close()
+
+  def test_retries_stale_connection(self):
+    pool = HttpConnectionPool()
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    self.assertEqual(HttpResponseType(200, 'Dropped', None),
+                     agent.get('drop', trace=False))
+    self.assertEqual(HttpResponseType(200, 'Hello', None),
+                     agent.get('hello', trace=False))
+    self.assertEqual(2, len(self.server.connections))
+    pool.close()
+
+  def test_does_not_retry_post_on_stale_connection(self):
+    pool = HttpConnectionPool()
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    self.assertEqual(201, agent.post('drop', 'a', trace=False).http_code)
+    response = agent.post('echo', 'b', trace=False)
+    self.assertIsNone(response.http_code)
+    self.assertIsNotNone(response.exception)
+    self.assertEqual(['/drop'], self.server.posts)
+    pool.close()
+
+  def test_slow_post_sent_once(self):
+    pool = HttpConnectionPool(timeout_secs=0.5)
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    self.assertEqual(201, agent.post('echo', 'a', trace=False).http_code)
+    response = agent.post('slow', 'b', trace=False)
+    self.assertIsNone(response.http_code)
+    self.assertIsNotNone(response.exception)
+    self.assertEqual(['/echo', '/slow'], self.server.posts)
+    pool.close()
+
+  def test_idle_timeout(self):
+    pool = HttpConnectionPool(idle_timeout_secs=0)
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    agent.get('hello', trace=False)
+    agent.get('hello', trace=False)
+    self.assertEqual(2, len(self.server.connections))
+    pool.close()
+
+  def test_concurrent_requests(self):
+    pool = HttpConnectionPool(max_idle_per_host=2)
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    responses = []
+    def get_hello():
+      for _ in range(5):
+        responses.append(agent.get('hello', trace=False))
+    threads = [threading.Thread(target=get_hello) for _ in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual([HttpResponseType(200, 'Hello', None)] * 20, responses)
+    pool.close()
+
+  def test_get_stream(self):
+    for pool in [None, HttpConnectionPool()]:
+      agent = HttpAgent(self.base_url, connection_pool=pool)
+      response, stream = agent.get_stream('json', trace=True)
+      self.assertEqual(_JSON_LIST, json.loads(response.output))
+      self.assertIsNone(stream)
+
+      response, stream = agent.get_stream('json', trace=False)
+      self.assertEqual(200, response.http_code)
+      self.assertIsNone(response.output)
+      self.assertEqual(_JSON_LIST, json.loads(stream.read()))
+      stream.close()
+
+      response, stream = agent.get_stream('missing', trace=False)
+      self.assertEqual(HttpResponseType(404, 'Not Found', None), response)
+      self.assertIsNone(stream)
+      agent.get('hello', trace=False)
+
+    # The pooled requests all used the one connection.
+    self.assertEqual(1 + 4, len(self.server.connections))
+    pool.close()
+
+  def test_observer_decodes_stream(self):
+    pool = HttpConnectionPool()
+    agent = HttpAgent(self.base_url, connection_pool=pool)
+    observer = HttpObjectObserver(agent, 'json')
+    for trace in [True, False]:
+      observation = jc.Observation()
+      observer.collect_observation(ExecutionContext(), observation,
+                                   trace=trace)
+      self.assertEqual(_JSON_LIST, observation.objects)
+      self.assertEqual([], observation.errors)
+
+    observation = jc.Observation()
+    HttpObjectObserver(agent, 'hello').collect_observation(
+        ExecutionContext(), observation, trace=False)
+    self.assertEqual([], observation.objects)
+    self.assertEqual(1, len(observation.errors))
+    pool.close()
+
+  def test_observer_stream_errors(self):
+    for error in [httplib.IncompleteRead('[1, 2'),
+                  socket.error(104, 'Connection reset by peer')]:
+      agent = BrokenStreamAgent(error)
+      observation = jc.Observation()
+      HttpObjectObserver(agent, 'json').collect_observation(
+          ExecutionContext(), observation, trace=False)
+      self.assertEqual([], observation.objects)
+      self.assertEqual(1, len(observation.errors))
+      self.assertTrue(isinstance(observation.errors[0], AgentError))
+      self.assertTrue(agent.streams[0].closed)
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(HttpConnectionPoolTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)
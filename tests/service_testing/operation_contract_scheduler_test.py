@@ -0,0 +1,113 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# pylint: disable=missing-docstring
+
+import threading
+import unittest
+
+import citest.json_contract as jc
+import citest.service_testing as st
+
+from fake_agent import (
+    FakeAgent,
+    FakeOperation)
+
+
+def make_case(title, **kwargs):
+  return st.OperationContract(
+      FakeOperation(title, FakeAgent()), jc.Contract(), **kwargs)
+
+
+class OperationContractSchedulerTest(unittest.TestCase):
+  def test_independent(self):
+    cases = [make_case('A'), make_case('B'), make_case('C')]
+    scheduler = st.OperationContractScheduler(cases)
+    self.assertEqual(cases, scheduler.topological_order)
+    for case in cases:
+      self.assertEqual([], scheduler.predecessors_of(case))
+
+    ran = []
+    outcomes = scheduler.run(ran.append, 2)
+    self.assertEqual(sorted(cases), sorted(ran))
+    self.assertEqual([(case, 'PASSED') for case in cases], outcomes)
+
+  def test_resource_dependencies(self):
+    delete = make_case('Delete', deletes=['r'])
+    verify = make_case('Verify', consumes=['r'])
+    create = make_case('Create', creates=['r'])
+    other = make_case('Other')
+    scheduler = st.OperationContractScheduler([delete, verify, create, other])
+
+    self.assertEqual([create], scheduler.predecessors_of(verify))
+    self.assertEqual(sorted([create, verify]),
+                     sorted(scheduler.predecessors_of(delete)))
+    self.assertEqual([create, other, verify, delete],
+                     scheduler.topological_order)
+
+    lock = threading.Lock()
+    ran = []
+    def run(case):
+      with lock:
+        for pred in scheduler.predecessors_of(case):
+          self.assertIn(pred, ran)
+        ran.append(case)
+
+    outcomes = scheduler.run(run, 4)
+    self.assertEqual(4, len(ran))
+    self.assertEqual(['PASSED'] * 4, [outcome for _, outcome in outcomes])
+
+  def test_explicit_predecessors(self):
+    first = make_case('First')
+    second = make_case('Second', predecessors=[first])
+    scheduler = st.OperationContractScheduler([second, first])
+    self.assertEqual([first, second], scheduler.topological_order)
+    self.assertEqual([second], scheduler.dependents_of(first))
+
+  def test_unknown_predecessor(self):
+    first = make_case('First')
+    second = make_case('Second', predecessors=[first])
+    self.assertRaises(ValueError, st.OperationContractScheduler, [second])
+
+  def test_cycle(self):
+    first = make_case('First', creates=['a'], consumes=['b'])
+    second = make_case('Second', creates=['b'], consumes=['a'])
+    self.assertRaises(ValueError, st.OperationContractScheduler,
+                      [first, second])
+
+  def test_skip_dependents_of_failure(self):
+    create = make_case('Create', creates=['r'])
+    verify = make_case('Verify', consumes=['r'])
+    delete = make_case('Delete', deletes=['r'])
+    other = make_case('Other')
+    scheduler = st.OperationContractScheduler([create, verify, delete, other])
+
+    ran = []
+    def run(case):
+      ran.append(case)
+      if case is create:
+        raise AssertionError('Failed')
+
+    outcomes = scheduler.run(run, 2)
+    self.assertEqual(sorted([create, other]), sorted(ran))
+    self.assertEqual([(create, 'FAILED'), (verify, 'SKIPPED'),
+                      (delete, 'SKIPPED'), (other, 'PASSED')],
+                     outcomes)
+
+
+if __name__ == '__main__':
+  loader = unittest.TestLoader()
+  suite = loader.loadTestsFromTestCase(OperationContractSchedulerTest)
+  unittest.TextTestRunner(verbosity=2).run(suite)